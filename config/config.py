@@ -1,11 +1,17 @@
 
+from pathlib import Path
+
 from dynaconf import Dynaconf
 
 settings = Dynaconf(
     envvar_prefix="DYNACONF",
+    root_path=Path(__file__).resolve().parent.parent,
     settings_files=['config/settings.toml', 'config/.secrets.toml'],
     environments=['dev', 'prod'],
+    env='dev',
 )
 
 # `envvar_prefix` = export envvars with `export DYNACONF_FOO=bar`.
+# `root_path` = settings files are found relative to the project root, whatever the cwd.
 # `settings_files` = Load these files in the order.
+# `env` = default profile; switch with `export ENV_FOR_DYNACONF=prod`.
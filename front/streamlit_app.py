@@ -1,6 +1,11 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-from utils import *
+
+from utils import (
+    figura_periodo,
+    forecast_wind,
+    forecast_wind_ao_vivo,
+    plotar_grafico,
+)
 
 st.title('Previsão de Produção de Energia')
 st.sidebar.header('Configurações')
@@ -20,11 +25,23 @@ modelo_selecionado = st.sidebar.selectbox('Tipo de Modelo', ('Por periodo', 'A c
 
 if modelo_selecionado == 'A cada 5 min':
     previsao_horizonte = st.sidebar.slider('Previsão Horizonte (em minutos)', min_value=5, max_value=30, step=5, value=30)
-    df_day, df_prediction = forecast_wind(previsao_horizonte)
+    ao_vivo = st.sidebar.toggle('Atualização automática')
+
+    if ao_vivo:
+        # Apenas este trecho é reexecutado a cada 5 segundos
+        @st.fragment(run_every=5)
+        def grafico_ao_vivo():
+            df_day, df_prediction = forecast_wind_ao_vivo(previsao_horizonte)
+            fig = plotar_grafico(df_day, df_prediction, previsao_horizonte)
+            st.plotly_chart(fig, use_container_width=True)
 
-    fig = plotar_grafico(df_day, df_prediction, previsao_horizonte)
+        grafico_ao_vivo()
+    else:
+        df_day, df_prediction = forecast_wind(previsao_horizonte)
 
-    st.plotly_chart(fig, use_container_width=True)
+        fig = plotar_grafico(df_day, df_prediction, previsao_horizonte)
+
+        st.plotly_chart(fig, use_container_width=True)
 
 
 if modelo_selecionado == 'Por periodo':
@@ -50,17 +67,14 @@ if modelo_selecionado == 'Por periodo':
     # Loop para prever e exibir gráficos para cada energia selecionada
     for energy_type in tipos_energia:
         st.subheader(f"Previsão para {energy_type.capitalize()} ({periodo_selecionado.capitalize()})")
-        base_path_model = f"ml_models/{energy_type}/"
-        model_path = f"prophet_{periodo_selecionado}.joblib"
-
-        model = carregar_modelo(base_path_model + model_path)  # Carregar o modelo correspondente
-        forecast = prever(model, periods)  # Gerar a previsão
 
-        plt.figure()
-        fig = model.plot(forecast)  # Gerar o gráfico
-        plt.title(f"Previsão para {energy_type.capitalize()} ({periodo_selecionado})")
+        # Figura decimada e em cache por energia, período e horizonte
+        fig = figura_periodo(energy_type, periodo_selecionado, periods)
 
         if grafico_dinamico:
             st.plotly_chart(fig, use_container_width=True)
         else:
-            st.pyplot(fig)  # Exibir o gráfico
\ No newline at end of file
+            # Exibir o gráfico (estático, sem interação)
+            st.plotly_chart(
+                fig, use_container_width=True, config={'staticPlot': True}
+            )
@@ -1,110 +1,225 @@
-from deltalake import DeltaTable
+import os
+
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import joblib
-import numpy as np
-from prophet import Prophet
-
-scaler = joblib.load('ml_models/min_max_scaler.joblib')
-model_lgbm = joblib.load('ml_models/lgbm.joblib')
-
-def prepara_base_para_treino(df, freq, start, end):
-    """Prepara a base para treino agregando os dados pela frequência especificada."""
-    df_agg = df.groupby(df['interval_start_local'].dt.to_period(freq))['wind'].median().reset_index()
-    df_agg.rename(columns={"interval_start_local": "ds", "wind": "y"}, inplace=True)
-    df_agg['ds'] = pd.to_datetime(df_agg['ds'].astype(str))
-    df_filtered = df_agg[(df_agg["ds"] >= start) & (df_agg["ds"] <= end)]
-    df_filtered.reset_index(drop=True, inplace=True)
-    return df_filtered
-
-def treina_e_salva_modelo(df_train, output_file):
-    """Treina o modelo Prophet e salva em um arquivo."""
-    #print(f"Treinando modelo para {output_file}...")
-    model = Prophet()
-    model.fit(df_train)
-    joblib.dump(model, output_file)
-    return model
-
-def carregar_modelo(model_path):
-    """Carrega o modelo Prophet e realiza a previsão."""
-    #print(f"Carregando modelo de {model_path}...")
-    model = joblib.load(model_path)
-    return model
-
-def prever(model, periods):
-    """Realiza previsão usando o modelo Prophet."""
-    future = model.make_future_dataframe(periods=periods)
-    forecast = model.predict(future)
-    return forecast
+import requests
+import streamlit as st
 
-def forecast_wind(previsao_horizonte):
-    model_por_5min = carregar_modelo('ml_models/lgbm.joblib')
-    
-    df = DeltaTable('lake/delta_table').to_pandas()
-    df_wind = df[['interval_start_local', 'wind']]
-    del df
+from src.ao_vivo import BufferCircular
+from src.decimacao import decima
 
-    df_wind = df_wind.sort_values(by='interval_start_local')
+# Endereço da API de dados do dashboard (`uvicorn src.api:app`)
+API_URL = os.getenv('API_URL', 'http://localhost:8000')
 
-    quantidade_de_retornos = 6
-    intervalo_minutos = 5
+# Pontos por traço após a decimação (~2 por pixel de um gráfico largo)
+PONTOS_POR_TRACO = 2_000
 
-    last_time = df_wind['interval_start_local'].iloc[-2]
-    start_time = last_time - pd.Timedelta(minutes=5 * quantidade_de_retornos)
+# Acima deste número de pontos o traço é desenhado com WebGL (Scattergl)
+LIMITE_WEBGL = 1_000
 
-    df_test = df_wind.loc[(df_wind["interval_start_local"] > start_time) & (df_wind["interval_start_local"] <= last_time)]
-    X_test = df_test['wind'].values
+# Fuso dos horários exibidos no gráfico (o do `interval_start_local`)
+FUSO_GRAFICO = 'America/Sao_Paulo'
 
-    X_test_scaled = scaler.transform(X_test.reshape(-1, 1))
+# Horizonte (minutos) de um único passo, desenhado como ponto e não como linha
+HORIZONTE_PONTUAL = 5
 
-    future_predictions = []
-    future_times = []
+# Última resposta de cada rota (ETag e conteúdo), revalidada a cada chamada.
+# O ETag é o hash do corpo, então vale mesmo que os parâmetros mudem (o
+# `desde` do modo ao vivo muda a cada atualização): guardar por rota, e não
+# por rota e parâmetros, mantém o dicionário limitado ao número de rotas.
+_respostas = {}
 
-    current_scaled = X_test_scaled.copy()
-    current_time = last_time
 
-    for _ in range(previsao_horizonte // intervalo_minutos):
-        y_pred = model_por_5min.predict(current_scaled.reshape(1, -1)).reshape(-1, 1)
-        next_wind = scaler.inverse_transform(y_pred)[0, 0]
+def busca_api(rota, **params):
+    """Consulta a API; se o ETag não mudou (304), reaproveita a última resposta."""
+    anterior = _respostas.get(rota)
+    headers = {'If-None-Match': anterior[0]} if anterior else {}
 
-        future_predictions.append(next_wind)
-        current_time += pd.Timedelta(minutes=intervalo_minutos)
-        future_times.append(current_time)
+    resposta = requests.get(
+        f'{API_URL}{rota}', params=params, headers=headers, timeout=30
+    )
+    if resposta.status_code == requests.codes.not_modified and anterior:
+        return anterior[1]
+    resposta.raise_for_status()
 
-        current_scaled = current_scaled[1:, :]  # Remover o valor mais antigo
-        current_scaled = np.append(current_scaled, scaler.transform([[next_wind]]), axis=0)  # Adicionar a nova previsão
+    dados = resposta.json()
+    _respostas[rota] = (resposta.headers.get('ETag'), dados)
+    return dados
 
-    df_prediction = pd.DataFrame({'interval_start_local': future_times, 'wind': future_predictions})
 
-    last_day = df_wind["interval_start_local"].dt.floor("D").max()
-    df_day = df_wind[df_wind["interval_start_local"].dt.floor("D") == last_day]
+def forecast_wind(previsao_horizonte):
+    """Últimas 24h de vento e a previsão do horizonte pedido, vindas da API."""
+    df_day = pd.DataFrame(busca_api('/janela', n=288))
+    df_prediction = pd.DataFrame(busca_api('/previsao', horizonte=previsao_horizonte))
+
+    for df in (df_day, df_prediction):
+        df['interval_start_utc'] = pd.to_datetime(df['interval_start_utc'])
 
     return df_day, df_prediction
 
+
+def forecast_wind_ao_vivo(previsao_horizonte):
+    """Como `forecast_wind`, mas pede à API apenas as observações novas.
+
+    As últimas 24h ficam num buffer circular da sessão; a cada chamada só as
+    linhas posteriores à última já recebida são acrescentadas.
+    """
+    buffer = st.session_state.setdefault('buffer_ao_vivo', BufferCircular(288))
+    params = {'horizonte': previsao_horizonte}
+    if buffer.ultimo_tempo is not None:
+        params['desde'] = buffer.ultimo_tempo.isoformat()
+
+    dados = busca_api('/ao_vivo', **params)
+    observado = pd.DataFrame(dados['observado'])
+    if len(observado):
+        buffer.acrescenta(observado['interval_start_utc'], observado['wind'])
+
+    # Todas as colunas da previsão, inclusive as faixas de quantis (`wind_p10`...)
+    df_prediction = pd.DataFrame(dados['previsao'])
+    if df_prediction.empty:
+        df_prediction = pd.DataFrame(columns=['interval_start_utc', 'wind'])
+    df_prediction['interval_start_utc'] = pd.to_datetime(
+        df_prediction['interval_start_utc']
+    )
+    return buffer.como_dataframe(), df_prediction
+
+
+def traco(x, y, metodo='lttb', n_pontos=PONTOS_POR_TRACO, **kwargs):
+    """Cria um traço decimado; séries grandes são desenhadas com WebGL."""
+    x, y = np.asarray(x), np.asarray(y)
+    indices = decima(x, y, n_pontos, metodo)
+    classe = go.Scattergl if len(indices) > LIMITE_WEBGL else go.Scatter
+    return classe(x=x[indices], y=y[indices], **kwargs)
+
+
+def grafico_prophet(historico, forecast, titulo, n_pontos=PONTOS_POR_TRACO):
+    """Gráfico plotly equivalente ao `model.plot(forecast)` do Prophet.
+
+    O histórico usa decimação mín/máx (preserva picos) e a previsão usa LTTB;
+    a faixa de incerteza reaproveita os índices escolhidos para `yhat`.
+    """
+    fig = go.Figure()
+
+    fig.add_trace(traco(
+        historico['ds'], historico['y'],
+        metodo='min_max', n_pontos=n_pontos,
+        mode='markers', name='Histórico',
+        marker=dict(color='black', size=3)
+    ))
+
+    indices = decima(forecast['ds'].values, forecast['yhat'].values, n_pontos)
+    previsto = forecast.iloc[indices]
+    classe = go.Scattergl if len(indices) > LIMITE_WEBGL else go.Scatter
+
+    fig.add_trace(classe(
+        x=previsto['ds'], y=previsto['yhat_upper'],
+        mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+    ))
+    fig.add_trace(classe(
+        x=previsto['ds'], y=previsto['yhat_lower'],
+        mode='lines', line=dict(width=0), fill='tonexty',
+        fillcolor='rgba(0, 114, 178, 0.2)', name='Intervalo de incerteza'
+    ))
+    fig.add_trace(classe(
+        x=previsto['ds'], y=previsto['yhat'],
+        mode='lines', name='Previsão', line=dict(color='#0072B2')
+    ))
+
+    fig.update_layout(
+        title=titulo, xaxis_title='ds', yaxis_title='y', template='plotly_white'
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, ttl=60)
+def figura_periodo(energy_type, periodo_selecionado, periods):
+    """Figura da previsão por período, em cache por energia, período e horizonte."""
+    dados = busca_api(
+        f'/periodo/{energy_type}/{periodo_selecionado}',
+        periods=periods, pontos=PONTOS_POR_TRACO
+    )
+    historico = pd.DataFrame(dados['historico'])
+    forecast = pd.DataFrame(dados['previsao'])
+    for df in (historico, forecast):
+        df['ds'] = pd.to_datetime(df['ds'])
+
+    titulo = f"Previsão para {energy_type.capitalize()} ({periodo_selecionado})"
+    return grafico_prophet(historico, forecast, titulo)
+
+
+def faixa_quantis(df_prediction):
+    """Traços da faixa P10-P90 da previsão (vazio se não houver quantis)."""
+    if not {'wind_p10', 'wind_p90'} <= set(df_prediction.columns):
+        return []
+    if df_prediction[['wind_p10', 'wind_p90']].isna().any(axis=None):
+        return []
+
+    # Um único ponto (5 minutos): barra de erro no lugar da faixa
+    if len(df_prediction) == 1:
+        return [go.Scatter(
+            x=df_prediction['interval_start_local'], y=df_prediction['wind'],
+            mode='markers', marker=dict(size=0, color='red'), name='Intervalo P10-P90',
+            error_y=dict(
+                type='data', symmetric=False,
+                array=(df_prediction['wind_p90'] - df_prediction['wind']).clip(0),
+                arrayminus=(df_prediction['wind'] - df_prediction['wind_p10']).clip(0),
+            )
+        )]
+
+    return [
+        go.Scatter(
+            x=df_prediction['interval_start_local'], y=df_prediction['wind_p90'],
+            mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+        ),
+        go.Scatter(
+            x=df_prediction['interval_start_local'], y=df_prediction['wind_p10'],
+            mode='lines', line=dict(width=0), fill='tonexty',
+            fillcolor='rgba(255, 0, 0, 0.15)', name='Intervalo P10-P90'
+        ),
+    ]
+
+
+def horario_local(instantes):
+    """Converte instantes UTC para o horário local exibido (sem fuso)."""
+    instantes = pd.to_datetime(instantes, utc=True)
+    return instantes.dt.tz_convert(FUSO_GRAFICO).dt.tz_localize(None)
+
+
 def plotar_grafico(df_day, df_prediction, previsao_horizonte):
     """Função para criar e exibir o gráfico interativo."""
+    df_day = df_day.assign(
+        interval_start_local=horario_local(df_day['interval_start_utc'])
+    )
+    df_prediction = df_prediction.assign(
+        interval_start_local=horario_local(df_prediction['interval_start_utc'])
+    )
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
-        x=df_day['interval_start_local'], 
-        y=df_day['wind'],
+    fig.add_trace(traco(
+        df_day['interval_start_local'],
+        df_day['wind'],
         mode='lines',
         name='Histórico do Dia',
         line=dict(color='blue')
     ))
 
-    if previsao_horizonte == 5:
+    # Faixa de incerteza desenhada antes da predição, que fica por cima
+    for faixa in faixa_quantis(df_prediction):
+        fig.add_trace(faixa)
+
+    if previsao_horizonte == HORIZONTE_PONTUAL:
         fig.add_trace(go.Scatter(
-            x=df_prediction['interval_start_local'], 
+            x=df_prediction['interval_start_local'],
             y=df_prediction['wind'],
             mode='markers',
             name='Predição (5 Minutos)',
             marker=dict(color='red', size=10)
         ))
     else:
-       
+
         fig.add_trace(go.Scatter(
-            x=df_prediction['interval_start_local'], 
+            x=df_prediction['interval_start_local'],
             y=df_prediction['wind'],
             mode='lines',
             name=f'Predição (Próximos {previsao_horizonte} Minutos)',
@@ -120,4 +235,4 @@ def plotar_grafico(df_day, df_prediction, previsao_horizonte):
         template='plotly_white'
     )
 
-    return fig
\ No newline at end of file
+    return fig
@@ -5,11 +5,12 @@
 import os
 from datetime import datetime, timedelta
 
-import pandas as pd
-from deltalake.writer import write_deltalake
 from gridstatusio import GridStatusClient
 from zoneinfo import ZoneInfo
 
+from src.catalogo import catalogo
+from src.esquema import escreve_energy_grid
+
 # ================================================================================
 # CONSTANTES
 # ================================================================================
@@ -77,23 +78,15 @@ def handler(event, context):
     )
     print("Dataset fetched!")
 
-    # Parseia as datas para o formato datetime
-    data["interval_start_utc"] = pd.to_datetime(data["interval_start_utc"])
-    data["interval_end_utc"] = pd.to_datetime(data["interval_end_utc"])
-
-    # Cria uma coluna para particionar os dados por ano e mês
-    data["year_month"] = data["interval_start_utc"].dt.strftime("%Y-%m")
-
-    # Escreve os dados no Delta Lake no S3
+    # Escreve os dados no Delta Lake no S3, no esquema da tabela: instantes
+    # em UTC (us), fontes em float32 e partições por ano e mês
     print("save_on_s3 ...")
-    aws_config = {"AWS_REGION": "us-east-1", "AWS_S3_ALLOW_UNSAFE_RENAME": "true"}
-    write_deltalake(
-        "s3://alecrimtechchallengetresbronze/energy_grid_api/",
+    escreve_energy_grid(
+        catalogo().uri("energy_grid_api"),
         data,
         description="Tabela extraída da API pública através do dataset caiso_fuel_mix",
-        partition_by=["year_month"],
         mode="append",
-        storage_options=aws_config,
+        storage_options=catalogo().storage_options,
     )
     print("save_on_s3 success!")
 
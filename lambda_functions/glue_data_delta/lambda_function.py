@@ -4,7 +4,15 @@ from io import BytesIO
 import boto3
 import pandas as pd
 from botocore.exceptions import ClientError
-from deltalake import DeltaTable
+
+from src.cache_derivados import CacheDerivados
+from src.catalogo import catalogo
+
+# Cache em disco reaproveitado entre invocações do mesmo container
+cache = CacheDerivados("/tmp/cache_derivados", max_bytes=256 * 1024**2)
+
+# Faixas de incerteza gravadas pela `predictDataDelta` (quando há modelos de quantil)
+COLUNAS_QUANTIS = ["wind_p10", "wind_p50", "wind_p90"]
 
 
 def s3_file_exists(bucket: str, file_key: str) -> bool:
@@ -58,7 +66,9 @@ def load_parquet_from_s3(object_key: str):
         DataFrame: Retorna um DataFrame do pandas com os dados do arquivo Parquet.
     """
     s3 = boto3.resource("s3")
-    s3_object = s3.Object(os.getenv("BUCKET_BRONZE"), object_key)
+    s3_object = s3.Object(
+        os.getenv("BUCKET_BRONZE", catalogo().bucket("bronze")), object_key
+    )
     # Usa o gerenciador de contexto 'with' para gerenciar o buffer
     with BytesIO() as buffer:
         s3_object.download_fileobj(buffer)
@@ -79,39 +89,47 @@ def handler(event, context):
     """
 
     # Specify the bucket name
-    gold_layer = os.getenv("BUCKET_GOLD")  # "'alecrimtechchallengetresgold'
+    gold_layer = os.getenv("BUCKET_GOLD", catalogo().bucket("gold"))
 
-    API_DATA_URI = "s3://alecrimtechchallengetresbronze/energy_grid_api/"
-    PREDICTED_DATA_URI = "s3://alecrimtechchallengetresbronze/predicted_data/"
+    API_DATA_URI = catalogo().uri("energy_grid_api")
+    PREDICTED_DATA_URI = catalogo().uri("predicted_data")
+    AWS_KEYS = catalogo().storage_options
 
-    AWS_KEYS = {
-        "AWS_REGION": "us-east-1",
-        "AWS_S3_ALLOW_UNSAFE_RENAME": "true"
-    }
-
-    api_data = DeltaTable(
-        table_uri=API_DATA_URI,
-        storage_options=AWS_KEYS
-    )
-
-    predicted_data = DeltaTable(
-        table_uri=PREDICTED_DATA_URI,
-        storage_options=AWS_KEYS
-    )
+    # Handles mantidos entre invocações e atualizados com `update_incremental`
+    api_data = catalogo().tabela("energy_grid_api")
+    predicted_data = catalogo().tabela("predicted_data")
 
+    # Apenas os arquivos novos desde a última invocação são lidos
     api_data_latest = (
-        api_data.to_pandas()[["interval_start_utc", "wind"]]
-        .sort_values('interval_start_utc', ascending=False)
-        .head(17280)
+        cache.tabela(
+            API_DATA_URI,
+            colunas=["interval_start_utc", "wind"],
+            ordenar_por="interval_start_utc",
+            storage_options=AWS_KEYS,
+            dt=api_data,
+        )
+        .tail(17280)
         .reset_index(drop=True)
     )
+    # Tabelas gravadas antes dos modelos de quantil não têm as faixas
+    colunas_previstas = [f.name for f in predicted_data.schema().fields]
     predicted_data_latest = (
-        predicted_data.to_pandas()[["interval_start_utc", "wind"]]
-        .sort_values('interval_start_utc', ascending=False)
-        .head(6)
+        cache.tabela(
+            PREDICTED_DATA_URI,
+            colunas=["interval_start_utc", "wind"]
+            + [c for c in COLUNAS_QUANTIS if c in colunas_previstas],
+            ordenar_por="interval_start_utc",
+            storage_options=AWS_KEYS,
+            dt=predicted_data,
+        )
+        .tail(6)
         .reset_index(drop=True)
     )
 
+    # Marca a origem de cada linha (usada pela API do dashboard)
+    api_data_latest["previsto"] = False
+    predicted_data_latest["previsto"] = True
+
     # Combine the data
     combined_data = (
         pd.concat([api_data_latest, predicted_data_latest], ignore_index=True)
@@ -120,7 +138,7 @@ def handler(event, context):
     )
 
     # Chave do arquivo com os dados de visualização
-    s3_file_path = "data_vis/data.parquet"
+    s3_file_path = catalogo().chave("data_vis")
     print(f"{s3_file_path = }")
 
     # Escreve o DataFrame em um buffer em memória
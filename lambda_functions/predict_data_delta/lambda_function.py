@@ -7,18 +7,30 @@ from io import BytesIO
 
 import boto3
 import joblib
-import numpy as np
 import pandas as pd
 from botocore.exceptions import ClientError
 from deltalake.writer import write_deltalake
 
+from src.arvore_compilada import EnsembleCompilado
+from src.catalogo import catalogo
+from src.esquema import filtro_periodo
+from src.features import INTERVALO, historico_necessario
+from src.previsao import previsao_recursiva, previsao_recursiva_features
+from src.quantis import ModeloQuantis
+
 # ================================================================================
 # CONSTANTES
 # ================================================================================
 
 # Nome do bucket
-BUCKET_DATA = os.getenv("BUCKET_DATA")  # "alecrimtechchallengetresbronze"
-BUCKET_MODELS = os.getenv("BUCKET_MODELS")  # "alecrimtechchallengetressilver"
+BUCKET_DATA = os.getenv("BUCKET_DATA", catalogo().bucket("bronze"))
+BUCKET_MODELS = os.getenv("BUCKET_MODELS", catalogo().bucket("silver"))
+
+# Features do modelo "raw": apenas a janela das últimas observações do vento
+TAMANHO_JANELA = 6
+
+# Modelo e scaler mantidos entre invocações do mesmo container
+_MODELOS_CARREGADOS = {}
 
 # ================================================================================
 # FUNÇÕES
@@ -40,8 +52,8 @@ def get_s3_latest_parquet() -> str:
     s3 = boto3.client("s3")
 
     # Nome do bucket e prefixo para filtrar os objetos
-    bucket_name = "alecrimtechchallengetresbronze"
-    prefix = "energy_grid_api/"
+    bucket_name = BUCKET_DATA
+    prefix = catalogo().chave("energy_grid_api") + "/"
 
     # Lista os objetos no bucket filtrando para arquivos .parquet
     response = s3.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
@@ -185,6 +197,71 @@ def load_parquet_from_s3(object_key: str):
     return parquet_df
 
 
+def carrega_modelo_e_scaler() -> tuple:
+    """Carrega o modelo compilado e o scaler, reaproveitando-os entre invocações.
+
+    O modelo de regressão é baixado do S3 e achatado em um ``EnsembleCompilado``
+    apenas no primeiro uso do container; invocações seguintes (warm start)
+    reutilizam os objetos já carregados.
+
+    Returns:
+        tuple: O modelo compilado e o scaler.
+    """
+
+    if not _MODELOS_CARREGADOS:
+        model = load_joblib_from_s3(catalogo().chave("regression_model"))
+        _MODELOS_CARREGADOS["model"] = EnsembleCompilado.de_lgbm(model)
+        print("Modelo carregado!")
+        _MODELOS_CARREGADOS["scaler"] = load_joblib_from_s3(
+            catalogo().chave("min_max_scaler")
+        )
+        print("Scaler carregado!")
+
+    return _MODELOS_CARREGADOS["model"], _MODELOS_CARREGADOS["scaler"]
+
+
+def carrega_modelo_quantis():
+    """Carrega os modelos de quantil (P10/P50/P90), se existirem no bucket.
+
+    Returns:
+        ModeloQuantis | None: O modelo compilado ou ``None`` se não houver
+            modelos de quantil salvos.
+    """
+
+    if "quantis" not in _MODELOS_CARREGADOS:
+        try:
+            salvo = load_joblib_from_s3(catalogo().chave("quantile_model"))
+        except (ClientError, FileNotFoundError, KeyError):
+            print("Modelos de quantil não encontrados!")
+            _MODELOS_CARREGADOS["quantis"] = None
+        else:
+            _MODELOS_CARREGADOS["quantis"] = ModeloQuantis.de_boosters(salvo)
+            print("Modelos de quantil carregados!")
+
+    return _MODELOS_CARREGADOS["quantis"]
+
+
+def load_historico_recente(ultimo_intervalo: pd.Timestamp) -> pd.DataFrame:
+    """Lê da tabela ``energy_grid_api`` o histórico exigido pelas features.
+
+    Args:
+        ultimo_intervalo (pd.Timestamp): Início do intervalo mais recente.
+
+    Returns:
+        pd.DataFrame: Observações da maior janela móvel, ordenadas pelo tempo.
+    """
+
+    inicio = ultimo_intervalo - historico_necessario() * INTERVALO
+    # Handle mantido entre invocações: só os commits novos são lidos do log
+    dataset = catalogo().tabela("energy_grid_api").to_pyarrow_dataset()
+
+    # O filtro inclui as partições (ano/mês): só os meses do período são lidos
+    historico = dataset.to_table(
+        filter=filtro_periodo(inicio, ultimo_intervalo + pd.Timedelta(minutes=5))
+    ).to_pandas()
+    return historico.sort_values("interval_start_utc").reset_index(drop=True)
+
+
 def predict_meia_hora(x, scaler, model):
     """Realiza previsões de valores futuros com um modelo de aprendizado de máquina.
 
@@ -195,47 +272,49 @@ def predict_meia_hora(x, scaler, model):
     Args:
         x (np.ndarray): Os dados de entrada que serão usados para a previsão.
         scaler: O scaler utilizado para transformar os dados de entrada.
-        model: O modelo de aprendizado de máquina que fará as previsões.
+        model: O modelo compilado (``EnsembleCompilado``) que fará as previsões.
 
     Returns:
         np.ndarray: Um array contendo as previsões feitas pelo modelo.
     """
 
-    # Escala os dados de entrada e ajusta a forma
-    x_scaled = scaler.transform(x).reshape(1, 6)
-
-    # Inicializa a previsão com o último valor escalonado
-    forsee = np.array(x_scaled[0, -1]).ravel()
-
     # Define parâmetros para o loop de previsão
-    num_points = 6
     num_forsee = 6
     tamanho_janela = 6
 
+    # Escala os dados de entrada e mantém apenas a última janela
+    x_scaled = scaler.transform(x).ravel()[-tamanho_janela:]
+
     # Realiza previsões em uma janela deslizante
-    for i in range(num_forsee):
-        if i == 0:
-            # Faz a primeira previsão
-            a = model.predict(x_scaled).reshape(-1, 1)
-            b = x_scaled[:num_points][-tamanho_janela:].reshape(1, tamanho_janela)[
-                :, -(tamanho_janela - 1) :
-            ]
-            c = np.concatenate((b, a), axis=1)
-            forsee = np.concatenate((forsee, a.ravel()))
-            continue
-
-        # Faz previsões subsequentes
-        a = model.predict(c).reshape(-1, 1)
-        b = c[[-1], -(tamanho_janela - 1) :]
-        c = np.concatenate((b, a), axis=1)
-        forsee = np.concatenate((forsee, a.ravel()))
+    forsee = previsao_recursiva(x_scaled, num_forsee, model)
 
     # Inverte a transformação dos dados escalonados para obter os valores reais
-    forsee = np.vectorize(
-        lambda x: scaler.inverse_transform(np.array(x).reshape(-1, 1))
-    )(forsee)
+    return scaler.inverse_transform(forsee.reshape(-1, 1)).ravel()
+
+
+def predict_quantis_meia_hora(x, scaler, modelo_quantis) -> pd.DataFrame:
+    """Quantis da próxima meia hora em uma única avaliação dos modelos.
 
-    return forsee[1:]  # Retorna as previsões, excluindo o primeiro valor
+    Args:
+        x (np.ndarray): Os dados de entrada que serão usados para a previsão.
+        scaler: O scaler utilizado para transformar os dados de entrada.
+        modelo_quantis (ModeloQuantis): Modelos de quantil compilados.
+
+    Returns:
+        pd.DataFrame: Uma coluna por quantil (``wind_p10``...) e uma linha
+            por ponto previsto.
+    """
+
+    tamanho_janela = modelo_quantis.ensemble.n_features
+    x_scaled = scaler.transform(x).ravel()[-tamanho_janela:]
+
+    # (quantis, passos) na escala do modelo
+    quantis = modelo_quantis.preve(x_scaled)[0]
+    valores = scaler.inverse_transform(quantis.reshape(-1, 1)).reshape(quantis.shape)
+
+    return pd.DataFrame(
+        valores.T, columns=[f"wind_{coluna}" for coluna in modelo_quantis.colunas]
+    )
 
 
 def handler(event, context):
@@ -264,18 +343,20 @@ def handler(event, context):
         return f"Arquivo não encontrado! '{s3_file_path}'"
 
     # Carrega o modelo e o scaler do S3
-    model = load_joblib_from_s3("models/regression_model.joblib")
-    print("Modelo carregado!")
-    scaler = load_joblib_from_s3("models/min_max_scaler.joblib")
-    print("Scaler carregado!")
+    model, scaler = carrega_modelo_e_scaler()
 
     # Carrega os dados de energia do arquivo Parquet
     energy_grid_data = load_parquet_from_s3(s3_file_path)
     print("Dados carregados!")
 
     # Realiza a previsão com base nos dados de vento
-    wind_data = energy_grid_data["wind"].values
-    prox_meia_hora = predict_meia_hora(wind_data.reshape(-1, 1), scaler, model)
+    if model.n_features == TAMANHO_JANELA:
+        wind_data = energy_grid_data["wind"].values
+        prox_meia_hora = predict_meia_hora(wind_data.reshape(-1, 1), scaler, model)
+    else:
+        # Modelos com features adicionais precisam de histórico (até 24h)
+        historico = load_historico_recente(energy_grid_data["interval_start_utc"].max())
+        prox_meia_hora = previsao_recursiva_features(historico, 6, model)
     print("Previsão feita!")
 
     # Cria um DataFrame com as colunas necessárias
@@ -302,19 +383,31 @@ def handler(event, context):
         rows.append(new_row)
 
     df_predicted = pd.DataFrame(rows)
+
+    # Faixas de incerteza (P10/P50/P90) para os mesmos pontos, se disponíveis
+    modelo_quantis = carrega_modelo_quantis()
+    if modelo_quantis is not None and modelo_quantis.passos == len(df_predicted):
+        faixas = predict_quantis_meia_hora(
+            energy_grid_data["wind"].values.reshape(-1, 1), scaler, modelo_quantis
+        )
+        df_predicted = pd.concat([df_predicted, faixas], axis=1)
+        print("Quantis previstos!")
+
+    # Minutos entre a última observação e o ponto previsto (usado pelo monitor)
+    df_predicted["horizonte"] = 5 * (df_predicted.index + 1)
     df_predicted["year_month"] = df_predicted["interval_start_utc"].dt.strftime("%Y-%m")
     print("Dataframe criado!")
 
     # Faz o upload dos dados preditos para o S3
     print("save_on_s3 ...")
-    aws_config = {"AWS_REGION": "us-east-1", "AWS_S3_ALLOW_UNSAFE_RENAME": "true"}
     write_deltalake(
-        "s3://alecrimtechchallengetresbronze/predicted_data/",
+        catalogo().uri("predicted_data"),
         df_predicted,
         description="Dados preditos pelo modelo de regressão.",
         partition_by=["year_month"],
         mode="append",
-        storage_options=aws_config,
+        schema_mode="merge",
+        storage_options=catalogo().storage_options,
     )
     print("save_on_s3 success!")
 
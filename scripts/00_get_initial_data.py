@@ -1,5 +1,7 @@
 from gridstatusio import GridStatusClient
-from deltalake.writer import write_deltalake
+
+from src.catalogo import catalogo
+from src.esquema import escreve_energy_grid
 
 grid_client = GridStatusClient() #api_key=**************
 QUERY_LIMIT = 600_000
@@ -12,9 +14,13 @@ data = grid_client.get_dataset(
     limit=QUERY_LIMIT,
 )
 
-data['year'] = data['interval_start_local'].dt.year
 data = data.sort_values(by="interval_start_local").reset_index(drop=True)
 
-write_deltalake('./lake/delta_table', data,
-                description= 'Tabela extraída da API pública através do dataset caiso_fuel_mix',
-                partition_by= ['year'])
\ No newline at end of file
+# Mesmo esquema e partições (ano/mês, em UTC) da ingestão incremental
+escreve_energy_grid(
+    catalogo().uri("delta_table"),
+    data,
+    mode='error',
+    storage_options=catalogo().storage_options,
+    description='Tabela extraída da API pública através do dataset caiso_fuel_mix',
+)
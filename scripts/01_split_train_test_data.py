@@ -7,6 +7,8 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import MinMaxScaler
 
+from config.config import settings
+from src.features import janelas_deslizantes, salva_features_parquet
 from src.utils import get_path_projeto
 
 # Diretórios
@@ -20,10 +22,7 @@ dir_models.mkdir(exist_ok=True)
 
 # 1. Carregando os dados
 path_csv = dir_staged / "dados_empilhados.csv"
-config_csv = {
-    "sep": "\t",
-    "encoding": "utf-8"
-}
+config_csv = dict(settings.csv_config)
 
 dataset = pd.read_csv(path_csv, **config_csv)
 
@@ -44,15 +43,10 @@ wind_power_generation_scaled_values = scaler.fit_transform(wind_power_generation
 
 # 5. Criando os dados de "features" e "target"
 window_len = 6  # Número de pontos que existem por meia hora
-X = []
-y = []
-
-for i in range(len(wind_power_generation_scaled_values) - window_len):
-    X.append(wind_power_generation_scaled_values[i:i + window_len])
-    y.append(wind_power_generation_scaled_values[i + window_len])
+X, y = janelas_deslizantes(wind_power_generation_scaled_values, window_len)
 
-X = np.array(X)
-y = np.array(y)
+X = np.ascontiguousarray(X)
+y = np.ascontiguousarray(y)
 
 # 6. Dividindo os dados de treino e de teste
 X_train, X_test, y_train, y_test = train_test_split(X, y, train_size=0.8, random_state=42)
@@ -77,4 +71,15 @@ train_test_data = {
 }
 
 with open(dir_staged / "train_test_data.pkl", "wb") as pkl_f:
-    pickle.dump(obj=train_test_data, file=pkl_f)
\ No newline at end of file
+    pickle.dump(obj=train_test_data, file=pkl_f)
+
+# 8. Dataset com features adicionais (lags, estatísticas móveis, calendário e
+# demais fontes), gravado em blocos para não depender da memória disponível
+dataset["interval_start_utc"] = pd.to_datetime(
+    dataset["interval_start_local"], utc=True
+)
+salva_features_parquet(
+    dataset.sort_values(by="interval_start_utc"),
+    dir_staged / "features",
+    tamanho_bloco=100_000,
+)
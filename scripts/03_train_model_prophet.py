@@ -1,17 +1,26 @@
 import joblib
-from deltalake import DeltaTable
 from prophet import Prophet
 import pandas as pd
 
-# Carregar e processar o dataframe
-print("Carregando dados da DeltaTable...")
-df = DeltaTable('lake/delta_table').to_pandas()
-df = df.sort_values(by='interval_start_local')
+from src.cache_derivados import CacheDerivados
+from src.catalogo import catalogo
+from src.servico_modelos import FUSO_PROPHET
+from src.utils import get_path_projeto
+
+# Diretórios
+dir_projeto = get_path_projeto()
+dir_models = dir_projeto / "ml_models"
+
+# Cache das séries agregadas (reaproveitado entre execuções e pelo front)
+cache = CacheDerivados(dir_projeto / "data/cache")
 
 def prepara_base_para_treino(df, freq, start, end):
     """Prepara a base para treino agregando os dados pela frequência especificada."""
-    df_agg = df.groupby(df['interval_start_local'].dt.to_period(freq))['wind'].median().reset_index()
-    df_agg.rename(columns={"interval_start_local": "ds", "wind": "y"}, inplace=True)
+    # O lake guarda os instantes em UTC; os períodos do Prophet são no horário local
+    local = df['interval_start_utc'].dt.tz_convert(FUSO_PROPHET).dt.tz_localize(None)
+    periodos = local.dt.to_period(freq).rename("ds")
+    df_agg = df.groupby(periodos)['wind'].median().reset_index()
+    df_agg.rename(columns={"wind": "y"}, inplace=True)
     df_agg['ds'] = pd.to_datetime(df_agg['ds'].astype(str))
     df_filtered = df_agg[(df_agg["ds"] >= start) & (df_agg["ds"] <= end)]
     df_filtered.reset_index(drop=True, inplace=True)
@@ -46,9 +55,18 @@ frequencias = {
 # Processar dados, treinar e salvar modelos
 modelos = {}
 for periodo, config in frequencias.items():
-    df_train = prepara_base_para_treino(df, config['freq'], config['start'], config['end'])
-    model_path = f"ml_models/prophet_por_{periodo}.joblib"
+    print(f"Carregando dados agregados por '{config['freq']}'...")
+    df_train = cache.deriva(
+        catalogo().uri("delta_table"),
+        prepara_base_para_treino,
+        params={
+            "freq": config["freq"], "start": config["start"], "end": config["end"]
+        },
+        colunas=["interval_start_utc", "wind"],
+        ordenar_por="interval_start_utc",
+        storage_options=catalogo().storage_options,
+        dt=catalogo().tabela("delta_table"),
+    )
+    model_path = dir_models / f"prophet_por_{periodo}.joblib"
     modelos[periodo] = treina_e_salva_modelo(df_train, model_path)
-    del df_train
-
-del df
\ No newline at end of file
+    del df_train
\ No newline at end of file
@@ -1,7 +1,11 @@
 import pickle
+import time
+
 import joblib
 from sklearn.metrics import root_mean_squared_error
 
+from src.arvore_compilada import EnsembleCompilado, verifica_paridade
+from src.servico_modelos import carrega_servico
 from src.utils import get_path_projeto
 
 dir_projeto = get_path_projeto()
@@ -19,11 +23,37 @@ y_test = train_test_data["y"]["test"]
 scaler = joblib.load(dir_models / "min_max_scaler.joblib")
 model = joblib.load(dir_models / "lgbm.joblib")
 
-y_pred = model.predict(X_test).reshape(-1, 1)
+# Paridade do ensemble compilado (usado na previsão recursiva do front e da
+# Lambda) em uma amostra do teste
+model_compilado = EnsembleCompilado.de_lgbm(model)
+diferenca = verifica_paridade(model.booster_, model_compilado, X_test[:1000])
+print(f"paridade com o LightGBM: max |diff| = {diferenca:.3e}")
+
+# Em lote o booster do LightGBM é o caminho mais rápido
+inicio = time.perf_counter()
+y_pred = model.booster_.predict(X_test).reshape(-1, 1)
+duracao = time.perf_counter() - inicio
+print(f"tempo de inferência: {duracao:.3f}s ({len(X_test)} linhas)")
 
 rmse = root_mean_squared_error(
     scaler.inverse_transform(y_pred),
-    scaler.inverse_transform(y_test)
+    scaler.inverse_transform(y_test.reshape(-1, 1))
 )
 
-print(f"rmse = {rmse }")
\ No newline at end of file
+print(f"rmse = {rmse }")
+
+
+# Comparação dos modelos de janela sobre as mesmas janelas de teste. O
+# Prophet fica de fora: o split aleatório não guarda os instantes das janelas
+# (a comparação com ele é feita sobre dados recentes, no endpoint `/comparacao`)
+servico = carrega_servico(dir_models, nomes=("lgbm", "svr"))
+resultado = servico.preve_janelas(X_test, None, passos=1)
+y_real = scaler.inverse_transform(y_test.reshape(-1, 1))
+
+previsoes = {**resultado["modelos"], "ensemble": resultado["ensemble"]}
+for nome, y_modelo in previsoes.items():
+    latencia = resultado["latencia"].get(nome, sum(resultado["latencia"].values()))
+    print(
+        f"{nome:>8}: rmse = {root_mean_squared_error(y_modelo, y_real):.3f}"
+        f" | {1e6 * latencia / len(X_test):.2f} µs/linha"
+    )
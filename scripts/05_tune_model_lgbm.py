@@ -0,0 +1,63 @@
+# Bibliotecas
+import pickle
+
+import joblib
+from lightgbm import LGBMRegressor
+
+from src.otimizacao import (
+    carrega_memmap,
+    melhores_parametros,
+    otimiza,
+    salva_memmap,
+    salva_parametros,
+)
+from src.utils import get_path_projeto
+
+# Diretórios
+dir_projeto = get_path_projeto()
+dir_staged = dir_projeto / "data/staged"
+dir_models = dir_projeto / "ml_models"
+dir_memmap = dir_staged / "memmap"
+
+# Configuração da busca
+config_busca = {
+    "nome_estudo": "lgbm_wind",
+    "storage": f"sqlite:///{dir_staged / 'optuna.db'}",
+    "n_trials": 100,
+    "timeout": 3_600,  # segundos, por worker
+    "n_workers": None,  # padrão: até 4 processos
+    "n_folds": 4,
+    "max_linhas_treino": 200_000,  # janela deslizante: custo limitado por fold
+}
+
+
+def main() -> None:
+    # 1. Matrizes de treino em ordem temporal, gravadas uma única vez em disco
+    if not (dir_memmap / "X.npy").exists():
+        with open(dir_staged / "train_test_data.pkl", "rb") as pkl_f:
+            train_test_data = pickle.load(file=pkl_f)
+        salva_memmap(
+            train_test_data["X"]["raw"], train_test_data["y"]["raw"], dir_memmap
+        )
+        del train_test_data
+
+    # 2. Busca em paralelo (retoma o estudo se ele já existir)
+    estudo = otimiza(dir_memmap, **config_busca)
+    print(f"Melhor RMSE (escalonado): {estudo.best_value:.6f}")
+    print(f"Melhores parâmetros: {estudo.best_params}")
+
+    # 3. Treina o modelo final com os melhores parâmetros em toda a série
+    params = melhores_parametros(estudo)
+    salva_parametros(params, dir_models / "lgbm_otimizado.json")
+
+    X, y = carrega_memmap(dir_memmap)
+    model = LGBMRegressor(**params)
+    model.fit(X, y)
+
+    joblib.dump(model, dir_models / "lgbm_otimizado.joblib")
+
+
+# Os workers da busca são processos "spawn", que reimportam este módulo: sem o
+# guard cada um deles começaria outra busca (e o multiprocessing aborta)
+if __name__ == "__main__":
+    main()
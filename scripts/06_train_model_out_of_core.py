@@ -0,0 +1,30 @@
+# Bibliotecas
+import joblib
+
+from src.catalogo import catalogo
+from src.treino_out_of_core import treina_out_of_core
+from src.utils import get_path_projeto
+
+# Diretórios
+dir_projeto = get_path_projeto()
+dir_staged = dir_projeto / "data/staged"
+dir_staged.mkdir(parents=True, exist_ok=True)
+dir_models = dir_projeto / "ml_models"
+
+# Configuração do treino
+config_treino = {
+    "fonte": catalogo().uri("delta_table"),
+    "storage_options": catalogo().storage_options,
+    "coluna_tempo": "interval_start_utc",
+    "modo": "dataset",  # ou "continuado"
+    "params": {"objective": "regression", "learning_rate": 0.05, "num_leaves": 63},
+    "num_boost_round": 500,
+    "tamanho_lote": 100_000,
+    "path_dataset_binario": dir_staged / "features_treino.bin",
+}
+
+# 1. Treina lendo o histórico completo do lake em lotes
+booster = treina_out_of_core(**config_treino)
+
+# 2. Salva o modelo (compatível com `EnsembleCompilado.de_booster`)
+joblib.dump(booster, dir_models / "lgbm_out_of_core.joblib")
@@ -0,0 +1,47 @@
+# Bibliotecas
+import json
+import runpy
+
+import joblib
+import numpy as np
+
+from src.catalogo import catalogo
+from src.monitoramento import executa_monitor
+from src.utils import get_path_projeto
+
+# Diretórios
+dir_projeto = get_path_projeto()
+dir_lake = dir_projeto / "lake"
+dir_models = dir_projeto / "ml_models"
+
+# Configuração do monitor
+config_monitor = {
+    "previsoes_uri": catalogo().uri("predicted_data"),
+    "observados_uri": catalogo().uri("energy_grid_api"),
+    "metricas_uri": catalogo().uri("monitoring_metrics"),
+    "storage_options": catalogo().storage_options,
+    "limite_rmse": 500.0,
+    "limite_psi": 0.2,
+}
+retreinar_automaticamente = False
+
+# 1. Bins do histograma de drift na faixa vista pelo scaler no treino
+scaler = joblib.load(dir_models / "min_max_scaler.joblib")
+limites_bins = np.linspace(scaler.data_min_[0], scaler.data_max_[0], 11)
+
+
+# 2. Retreino disparado quando algum limite é ultrapassado
+def dispara_retreino(metricas):
+    print("Limite ultrapassado! Retreino necessário:")
+    print(metricas.loc[metricas["retreinar"]].to_string(index=False))
+    with open(dir_lake / "retreino_pendente.json", "w", encoding="utf-8") as json_f:
+        json.dump(metricas.to_dict(orient="records"), json_f, default=str)
+    if retreinar_automaticamente:
+        runpy.run_path(str(dir_projeto / "scripts/06_train_model_out_of_core.py"))
+
+
+# 3. Processa apenas as versões novas das tabelas e grava as métricas
+metricas = executa_monitor(
+    limites_bins=limites_bins, dispara_retreino=dispara_retreino, **config_monitor
+)
+print(metricas.to_string(index=False))
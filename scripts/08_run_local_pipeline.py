@@ -0,0 +1,43 @@
+# Bibliotecas
+import cProfile
+import pstats
+
+import pandas as pd
+
+from src.pipeline_local import PipelineLocal
+from src.utils import get_path_projeto
+
+# Diretórios
+dir_projeto = get_path_projeto()
+dir_staged = dir_projeto / "data/staged"
+dir_staged.mkdir(parents=True, exist_ok=True)
+
+# Configuração da simulação
+config_pipeline = {
+    "inicio": pd.Timestamp("2024-10-01T00:00", tz="UTC"),
+    "aceleracao": 0.0,  # 0: em sequência; 60: 1 minuto simulado por segundo
+    "dir_lake": dir_projeto / "lake",
+}
+config_execucao = {
+    "n_execucoes": 48,  # 24h com o agendamento a cada 30 minutos
+    "intervalo": pd.Timedelta(minutes=30),
+}
+historico_inicial = pd.Timedelta(hours=24)
+perfilar = False
+
+# 1. Lambdas carregadas com o lake em disco e o GridStatus reproduzido de `data/raw`
+#    (ao sair do bloco, o catálogo e o ambiente do processo são restaurados)
+with PipelineLocal(dir_projeto, **config_pipeline) as pipeline:
+    # 2. Histórico anterior ao início (as últimas 24h usadas pela `glueDataDelta`)
+    if historico_inicial:
+        pipeline.semeia_historico(historico_inicial)
+
+    # 3. Execução ingestão → predição → agregação
+    perfil = cProfile.Profile() if perfilar else None
+    tempos = pipeline.executa(perfil=perfil, **config_execucao)
+
+# 4. Resumo das durações por handler
+print(tempos.drop(columns="instante").describe(percentiles=[0.5, 0.95]).T)
+if perfil is not None:
+    perfil.dump_stats(dir_staged / "pipeline_local.prof")
+    pstats.Stats(perfil).sort_stats("cumulative").print_stats(25)
@@ -0,0 +1,55 @@
+# Bibliotecas
+import pickle
+import time
+
+import joblib
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from src.quantis import ModeloQuantis, alvos_multi_horizonte, cobertura, treina_quantis
+from src.utils import get_path_projeto
+
+# Diretórios
+dir_projeto = get_path_projeto()
+dir_staged = dir_projeto / "data/staged"
+dir_models = dir_projeto / "ml_models"
+
+# Configuração do treino
+config_treino = {
+    "quantis": (0.1, 0.5, 0.9),
+    "params": {"learning_rate": 0.05, "num_leaves": 31},
+    "num_boost_round": 200,
+}
+passos = 6  # Meia hora à frente, em pontos de 5 minutos
+
+# 1. Mesmas janelas (e scaler) do modelo de 5 minutos
+with open(dir_staged / "train_test_data.pkl", "rb") as pkl_f:
+    train_test_data = pickle.load(file=pkl_f)
+
+# `raw` mantém as janelas consecutivas, necessárias para montar os horizontes
+X, Y = alvos_multi_horizonte(
+    train_test_data["X"]["raw"], train_test_data["y"]["raw"], passos
+)
+X_train, X_test, Y_train, Y_test = train_test_split(
+    X, Y, train_size=0.8, random_state=42
+)
+
+# 2. Um modelo de quantil por quantil e horizonte
+inicio = time.perf_counter()
+salvo = treina_quantis(X_train, Y_train, **config_treino)
+print(f"treino: {time.perf_counter() - inicio:.1f}s")
+
+# 3. Cobertura no teste, com todos os quantis e horizontes em uma travessia
+modelo = ModeloQuantis.de_boosters(salvo)
+inicio = time.perf_counter()
+previsto = modelo.preve(X_test)
+print(f"inferência: {1e6 * (time.perf_counter() - inicio) / len(X_test):.2f} µs/janela")
+
+scaler = joblib.load(dir_models / "min_max_scaler.joblib")
+largura = scaler.data_range_[0] * (previsto[:, -1] - previsto[:, 0]).mean(axis=0)
+for coluna, fracao in zip(modelo.colunas, cobertura(previsto, Y_test)):
+    print(f"{coluna}: cobertura por horizonte = {np.round(fracao, 3)}")
+print(f"largura média P10-P90 por horizonte = {np.round(largura, 1)}")
+
+# 4. Salva os boosters (compilados na carga, como o `lgbm.joblib`)
+joblib.dump(salvo, dir_models / "lgbm_quantis.joblib")
@@ -0,0 +1,34 @@
+# Bibliotecas
+from deltalake.exceptions import TableNotFoundError
+
+from src.catalogo import catalogo
+from src.esquema import migra_tabela
+
+# Tabelas com os dados do caiso_fuel_mix (carga inicial e ingestão incremental)
+tabelas = ["delta_table", "energy_grid_api"]
+
+# Linhas convertidas por lote (limita a memória usada na migração)
+tamanho_lote = 100_000
+
+# 1. Regrava cada tabela no esquema (UTC em us, fontes em float32, ano/mês).
+#    A ingestão (`getDataDeltaSchedule`) deve estar pausada: um commit durante
+#    a migração a interrompe com `ErroMigracao`, sem alterar a tabela
+for nome in tabelas:
+    try:
+        resultado = migra_tabela(
+            catalogo().uri(nome),
+            storage_options=catalogo().storage_options,
+            tamanho_lote=tamanho_lote,
+        )
+    except TableNotFoundError:
+        print(f"{nome}: tabela não encontrada, nada a migrar")
+        continue
+
+    # 2. A migração é um commit novo: os handles abertos e os caches por versão
+    #    seguem válidos, e a versão de origem fica acessível por time travel
+    print(
+        f"{nome}: {resultado['linhas']} linhas | "
+        f"{resultado['bytes_antes'] / 1024**2:.1f} MB -> "
+        f"{resultado['bytes_depois'] / 1024**2:.1f} MB "
+        f"(versão {resultado['versao_origem']} -> {resultado['versao']})"
+    )
@@ -0,0 +1,251 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from deltalake import DeltaTable
+
+from src.cache_derivados import arquivos_adicionados, le_arquivos
+from src.catalogo import sistema_arquivos
+from src.previsao import previsao_recursiva
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Observações mantidas em memória (24h de dados de 5 minutos)
+CAPACIDADE = 288
+
+# Pontos previstos a cada atualização (30 minutos)
+PASSOS_PREVISAO = 6
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Buffer circular de observações
+# -----------------------------------------------------------------------------
+
+
+class BufferCircular:
+    """Últimas ``capacidade`` observações em vetores NumPy de tamanho fixo.
+
+    Acrescentar linhas não realoca nada: a posição de escrita gira sobre os
+    vetores e apenas as linhas mais novas que a última já guardada entram.
+
+    Attributes:
+        capacidade (int): Número máximo de observações.
+    """
+
+    def __init__(self, capacidade: int = CAPACIDADE) -> None:
+        self.capacidade = capacidade
+        self._tempos = np.zeros(capacidade, dtype="datetime64[ns]")
+        self._valores = np.zeros(capacidade, dtype=np.float64)
+        self._inicio = 0
+        self._tamanho = 0
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    @property
+    def ultimo_tempo(self) -> Optional[pd.Timestamp]:
+        if not self._tamanho:
+            return None
+        posicao = (self._inicio + self._tamanho - 1) % self.capacidade
+        return pd.Timestamp(self._tempos[posicao], tz="UTC")
+
+    def acrescenta(self, tempos, valores) -> int:
+        """Acrescenta as observações novas (ordenadas) e retorna quantas entraram."""
+        tempos = (
+            pd.to_datetime(pd.Series(tempos), utc=True)
+            .dt.tz_localize(None)
+            .to_numpy(dtype="datetime64[ns]")
+        )
+        valores = np.asarray(valores, dtype=np.float64)
+
+        ultimo = self.ultimo_tempo
+        if ultimo is not None:
+            novos = tempos > np.datetime64(ultimo.tz_localize(None))
+            tempos, valores = tempos[novos], valores[novos]
+
+        # Só as últimas `capacidade` linhas podem sobreviver
+        tempos, valores = tempos[-self.capacidade :], valores[-self.capacidade :]
+        for tempo, valor in zip(tempos, valores):
+            posicao = (self._inicio + self._tamanho) % self.capacidade
+            self._tempos[posicao], self._valores[posicao] = tempo, valor
+            if self._tamanho < self.capacidade:
+                self._tamanho += 1
+            else:
+                self._inicio = (self._inicio + 1) % self.capacidade
+        return len(tempos)
+
+    def _ordem(self) -> np.ndarray:
+        return (self._inicio + np.arange(self._tamanho)) % self.capacidade
+
+    def ultimos_valores(self, n: int) -> np.ndarray:
+        """Os ``n`` valores mais recentes, do mais antigo para o mais novo."""
+        return self._valores[self._ordem()[-n:]]
+
+    def como_dataframe(self) -> pd.DataFrame:
+        ordem = self._ordem()
+        return pd.DataFrame(
+            {
+                "interval_start_utc": pd.to_datetime(self._tempos[ordem], utc=True),
+                "wind": self._valores[ordem],
+            }
+        )
+
+
+# -----------------------------------------------------------------------------
+# Fontes com verificação barata de mudança
+# -----------------------------------------------------------------------------
+
+
+class FonteDataVis:
+    """``data_vis/data.parquet`` (local ou no S3); a versão é o ``mtime``/tamanho
+    do arquivo.
+
+    Apenas as linhas observadas posteriores ao último instante conhecido são
+    materializadas (o filtro usa as estatísticas dos row groups).
+    """
+
+    def __init__(self, caminho: str, storage_options: Optional[dict] = None) -> None:
+        self.caminho = caminho
+        self._sistema, self._caminho = sistema_arquivos(caminho, storage_options)
+
+    def versao(self) -> str:
+        info = self._sistema.get_file_info(self._caminho)
+        if info.type == pafs.FileType.NotFound:
+            raise FileNotFoundError(self.caminho)
+        return f"{info.mtime_ns}-{info.size}"
+
+    def novas_linhas(self, desde: Optional[pd.Timestamp]) -> pd.DataFrame:
+        filtros = None if desde is None else [("interval_start_utc", ">", desde)]
+        df = pq.read_table(
+            self._caminho, filesystem=self._sistema, filters=filtros
+        ).to_pandas()
+        if "previsto" in df.columns:
+            df = df.loc[~df["previsto"]]
+        return df.sort_values("interval_start_utc")
+
+
+class FonteDelta:
+    """Tabela Delta; a versão vem do log e só os arquivos novos são lidos."""
+
+    def __init__(self, table_uri: str, storage_options: Optional[dict] = None):
+        self.table_uri = table_uri
+        self.storage_options = storage_options
+        self._dt = None
+        self._versao_lida = None
+
+    def versao(self) -> int:
+        if self._dt is None:
+            self._dt = DeltaTable(self.table_uri, storage_options=self.storage_options)
+        else:
+            self._dt.update_incremental()
+        return self._dt.version()
+
+    def novas_linhas(self, desde: Optional[pd.Timestamp]) -> pd.DataFrame:
+        colunas = ["interval_start_utc", "wind"]
+        novos = (
+            None
+            if self._versao_lida is None
+            else arquivos_adicionados(self._dt, self._versao_lida, self.storage_options)
+        )
+        if novos is None:
+            df = self._dt.to_pandas(columns=colunas)
+        else:
+            df = le_arquivos(self._dt, novos, colunas) if novos else None
+        self._versao_lida = self._dt.version()
+
+        if df is None:
+            return pd.DataFrame(columns=colunas)
+        df["interval_start_utc"] = pd.to_datetime(df["interval_start_utc"], utc=True)
+        if desde is not None:
+            df = df.loc[df["interval_start_utc"] > desde]
+        return df.sort_values("interval_start_utc")
+
+
+# -----------------------------------------------------------------------------
+# Atualização incremental da visão de 5 minutos
+# -----------------------------------------------------------------------------
+
+
+class MonitorAoVivo:
+    """Mantém as últimas 24h e a previsão de 30 min atualizadas incrementalmente.
+
+    ``atualiza`` consulta apenas a versão da fonte; se ela mudou, lê só as
+    linhas novas para o ``BufferCircular`` e recalcula a previsão recursiva
+    apenas se a janela final do modelo mudou.
+
+    Attributes:
+        fonte: ``FonteDataVis`` ou ``FonteDelta``.
+        buffer (BufferCircular): Observações em memória.
+        previsao (pd.DataFrame): Última previsão calculada.
+    """
+
+    def __init__(
+        self,
+        fonte,
+        modelo,
+        scaler,
+        tamanho_janela: int = 6,
+        capacidade: int = CAPACIDADE,
+    ) -> None:
+        self.fonte = fonte
+        self.modelo = modelo
+        self.scaler = scaler
+        self.tamanho_janela = tamanho_janela
+        self.buffer = BufferCircular(capacidade)
+        self.previsao = pd.DataFrame(columns=["interval_start_utc", "wind"])
+        self.versao = None
+        self._lock = threading.Lock()
+
+    def atualiza(self) -> bool:
+        """Verifica a fonte e aplica as novidades; retorna se algo mudou."""
+        with self._lock:
+            versao = self.fonte.versao()
+            if versao == self.versao:
+                return False
+
+            novas = self.fonte.novas_linhas(self.buffer.ultimo_tempo)
+            self.versao = versao
+            if not self.buffer.acrescenta(
+                novas["interval_start_utc"], novas["wind"]
+            ):
+                return False
+
+            self._atualiza_previsao()
+            return True
+
+    def _atualiza_previsao(self) -> None:
+        if len(self.buffer) < self.tamanho_janela:
+            return
+        janela = self.buffer.ultimos_valores(self.tamanho_janela).reshape(-1, 1)
+        y_pred = previsao_recursiva(
+            self.scaler.transform(janela), PASSOS_PREVISAO, self.modelo
+        )
+        ultimo = self.buffer.ultimo_tempo
+        self.previsao = pd.DataFrame(
+            {
+                "interval_start_utc": [
+                    ultimo + pd.Timedelta(minutes=5 * (i + 1))
+                    for i in range(PASSOS_PREVISAO)
+                ],
+                "wind": self.scaler.inverse_transform(y_pred.reshape(-1, 1)).ravel(),
+            }
+        )
+
+    def novidades(self, desde: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """Observações do buffer posteriores a ``desde``."""
+        df = self.buffer.como_dataframe()
+        if desde is None:
+            return df
+        return df.loc[df["interval_start_utc"] > desde]
@@ -0,0 +1,490 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional
+
+import joblib
+import pandas as pd
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+
+from src.ao_vivo import FonteDataVis, MonitorAoVivo
+from src.arvore_compilada import EnsembleCompilado
+from src.catalogo import catalogo, sistema_arquivos
+from src.decimacao import decima
+from src.previsao import previsao_recursiva
+from src.quantis import ModeloQuantis
+from src.servico_modelos import ServicoModelos, carrega_servico
+from src.utils import get_path_projeto
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Arquivo da camada gold (o store de previsões vem do catálogo)
+DATA_VIS_PATH = os.getenv("DATA_VIS_PATH", catalogo().arquivo("data_vis"))
+
+# Diretório dos modelos
+DIR_MODELS = Path(os.getenv("DIR_MODELS", get_path_projeto() / "ml_models"))
+
+# Tempo de vida das respostas em cache (segundos)
+TTL_SEGUNDOS = float(os.getenv("API_TTL_SEGUNDOS", "60"))
+
+# Observações por janela do modelo de 5 minutos
+TAMANHO_JANELA = 6
+INTERVALO_MINUTOS = 5
+
+# Faixas de incerteza do modelo de 5 minutos (modelos de quantil)
+COLUNAS_QUANTIS = ["wind_p10", "wind_p50", "wind_p90"]
+
+# Energias e períodos com modelos Prophet
+ENERGIAS = [
+    "solar",
+    "wind",
+    "geothermal",
+    "biomass",
+    "biogas",
+    "small_hydro",
+    "coal",
+    "nuclear",
+    "natural_gas",
+    "large_hydro",
+    "batteries",
+    "imports",
+]
+PERIODOS = ["hora", "dia", "mes"]
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Cache em memória com tempo de vida
+# -----------------------------------------------------------------------------
+
+
+class CacheTTL:
+    """Cache de respostas serializadas, com expiração e ETag.
+
+    Cada entrada guarda o corpo JSON já serializado e seu ETag; todas as
+    sessões do dashboard compartilham o mesmo cálculo enquanto a entrada
+    estiver válida. A chave inclui a "versão" da fonte de dados, de modo que
+    uma fonte atualizada invalida as respostas derivadas dela.
+
+    Requisições simultâneas para uma chave ausente fazem um único cálculo:
+    a primeira calcula e as demais esperam pelo resultado (chaves diferentes
+    continuam sendo calculadas em paralelo).
+    """
+
+    def __init__(self, ttl: float = TTL_SEGUNDOS) -> None:
+        self.ttl = ttl
+        self._entradas = {}
+        self._em_calculo = {}
+        self._lock = threading.Lock()
+
+    def obtem(self, chave: tuple, calcula: Callable[[], str]) -> tuple:
+        """Retorna ``(corpo, etag)``, calculando o corpo apenas se necessário."""
+        while True:
+            with self._lock:
+                entrada = self._entradas.get(chave)
+                if entrada is not None and entrada[0] > time.monotonic():
+                    return entrada[1], entrada[2]
+                pronto = self._em_calculo.get(chave)
+                if pronto is None:
+                    pronto = self._em_calculo[chave] = threading.Event()
+                    break
+            # Outra requisição está calculando: espera e confere de novo (se
+            # o cálculo dela falhou, esta assume o cálculo)
+            pronto.wait()
+
+        try:
+            corpo = calcula()
+            etag = '"' + hashlib.sha1(corpo.encode("utf-8")).hexdigest() + '"'
+            with self._lock:
+                # Remove as entradas vencidas antes de inserir a nova
+                agora = time.monotonic()
+                for vencida in [c for c, e in self._entradas.items() if e[0] <= agora]:
+                    del self._entradas[vencida]
+                self._entradas[chave] = (agora + self.ttl, corpo, etag)
+            return corpo, etag
+        finally:
+            with self._lock:
+                del self._em_calculo[chave]
+            pronto.set()
+
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Fontes de dados
+# -----------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=1)
+def sistema_data_vis() -> tuple:
+    """Sistema de arquivos e caminho do ``data.parquet`` (local ou S3)."""
+    return sistema_arquivos(DATA_VIS_PATH, catalogo().storage_options)
+
+
+def versao_data_vis() -> str:
+    """Identifica a versão atual do ``data.parquet`` (mtime e tamanho)."""
+    sistema, caminho = sistema_data_vis()
+    try:
+        info = sistema.get_file_info(caminho)
+    except OSError:
+        info = None
+    if info is None or info.type != pafs.FileType.File:
+        raise HTTPException(status_code=503, detail="data_vis indisponível")
+    return f"{info.mtime_ns}-{info.size}"
+
+
+@lru_cache(maxsize=2)
+def _le_data_vis(versao: str) -> pd.DataFrame:
+    sistema, caminho = sistema_data_vis()
+    df = pq.read_table(caminho, filesystem=sistema).to_pandas()
+    df["interval_start_utc"] = pd.to_datetime(df["interval_start_utc"], utc=True)
+    return df.sort_values("interval_start_utc").reset_index(drop=True)
+
+
+def le_data_vis() -> tuple:
+    """Lê o ``data.parquet`` da camada gold, apenas quando ele muda."""
+    versao = versao_data_vis()
+    return _le_data_vis(versao), versao
+
+
+def separa_data_vis(df: pd.DataFrame) -> tuple:
+    """Separa as observações das previsões acrescentadas pela ``glueDataDelta``."""
+    if "previsto" not in df.columns:
+        return df, df.iloc[0:0]
+    return df.loc[~df["previsto"]], df.loc[df["previsto"]]
+
+
+def le_previsoes_armazenadas() -> pd.DataFrame:
+    """Lê as previsões gravadas pela Lambda de predição (store de previsões)."""
+    try:
+        dt = catalogo().tabela("predicted_data")
+        existentes = {campo.name for campo in dt.schema().fields}
+        colunas = ["interval_start_utc", "wind"] + [
+            c for c in COLUNAS_QUANTIS if c in existentes
+        ]
+        df = dt.to_pandas(columns=colunas)
+    except Exception:
+        return pd.DataFrame(columns=["interval_start_utc", "wind"])
+    df["interval_start_utc"] = pd.to_datetime(df["interval_start_utc"], utc=True)
+    return df.sort_values("interval_start_utc").reset_index(drop=True)
+
+
+# -----------------------------------------------------------------------------
+# Modelos
+# -----------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=1)
+def modelo_lgbm() -> tuple:
+    """Modelo de 5 minutos (compilado) e scaler, carregados uma única vez."""
+    model = joblib.load(DIR_MODELS / "lgbm.joblib")
+    scaler = joblib.load(DIR_MODELS / "min_max_scaler.joblib")
+    return EnsembleCompilado.de_lgbm(model), scaler
+
+
+@lru_cache(maxsize=1)
+def modelo_quantis() -> Optional[ModeloQuantis]:
+    """Modelos de quantil (P10/P50/P90) compilados, se existirem."""
+    path = DIR_MODELS / "lgbm_quantis.joblib"
+    if not path.exists():
+        return None
+    return ModeloQuantis.de_boosters(joblib.load(path))
+
+
+@lru_cache(maxsize=64)
+def modelo_prophet(energia: str, periodo: str):
+    """Modelo Prophet de uma energia e período, carregado uma única vez."""
+    return joblib.load(DIR_MODELS / energia / f"prophet_{periodo}.joblib")
+
+
+# -----------------------------------------------------------------------------
+# Cálculos servidos pela API
+# -----------------------------------------------------------------------------
+
+
+def calcula_previsao(
+    observado: pd.DataFrame, previsto: pd.DataFrame, horizonte: int
+) -> pd.DataFrame:
+    """Previsão dos próximos ``horizonte`` minutos a partir do observado.
+
+    Usa as previsões que já estão na camada gold ou no store de previsões
+    quando elas cobrem o horizonte logo após a última observação; caso
+    contrário, calcula com o modelo de 5 minutos. As faixas de incerteza
+    (``wind_p10``, ``wind_p50``, ``wind_p90``) acompanham a previsão quando
+    foram gravadas ou quando há modelos de quantil.
+    """
+    passos = horizonte // INTERVALO_MINUTOS
+    ultimo = observado["interval_start_utc"].iloc[-1]
+    tempos = [
+        ultimo + pd.Timedelta(minutes=INTERVALO_MINUTOS * (i + 1))
+        for i in range(passos)
+    ]
+
+    for fonte in (lambda: previsto, le_previsoes_armazenadas):
+        armazenado = fonte()
+        colunas = ["interval_start_utc", "wind"] + [
+            c for c in COLUNAS_QUANTIS if c in armazenado.columns
+        ]
+        armazenado = armazenado.loc[
+            armazenado["interval_start_utc"].isin(tempos), colunas
+        ].drop_duplicates("interval_start_utc", keep="last")
+        if len(armazenado) == passos:
+            armazenado = armazenado.sort_values("interval_start_utc")
+            if armazenado.reindex(columns=COLUNAS_QUANTIS).notna().all(axis=None):
+                return armazenado.reset_index(drop=True)
+            return acrescenta_quantis(
+                armazenado[["interval_start_utc", "wind"]], observado
+            )
+
+    model, scaler = modelo_lgbm()
+    janela = observado["wind"].values[-TAMANHO_JANELA:].reshape(-1, 1)
+    y_pred = previsao_recursiva(scaler.transform(janela), passos, model)
+    valores = scaler.inverse_transform(y_pred.reshape(-1, 1)).ravel()
+    return acrescenta_quantis(
+        pd.DataFrame({"interval_start_utc": tempos, "wind": valores}), observado
+    )
+
+
+def acrescenta_quantis(previsao: pd.DataFrame, observado: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta à previsão as faixas P10/P50/P90, se houver modelos de quantil.
+
+    Todos os quantis e horizontes saem de uma única avaliação do ensemble
+    combinado, a partir da última janela observada.
+    """
+    modelo = modelo_quantis()
+    if modelo is None or len(previsao) > modelo.passos:
+        return previsao.reset_index(drop=True)
+
+    _, scaler = modelo_lgbm()
+    janela = observado["wind"].values[-modelo.ensemble.n_features :].reshape(-1, 1)
+    quantis = modelo.preve(scaler.transform(janela).ravel())[0, :, : len(previsao)]
+    valores = scaler.inverse_transform(quantis.reshape(-1, 1)).reshape(quantis.shape)
+
+    previsao = previsao.reset_index(drop=True)
+    for coluna, valores_quantil in zip(modelo.colunas, valores):
+        previsao[f"wind_{coluna}"] = valores_quantil
+    return previsao
+
+
+@lru_cache(maxsize=1)
+def servico_modelos() -> ServicoModelos:
+    """Serviço com os modelos de 5 minutos (lgbm, svr e Prophet por hora)."""
+    return carrega_servico(DIR_MODELS)
+
+
+@lru_cache(maxsize=1)
+def monitor_ao_vivo() -> MonitorAoVivo:
+    """Monitor do modo ao vivo, compartilhado por todas as sessões."""
+    model, scaler = modelo_lgbm()
+    return MonitorAoVivo(
+        FonteDataVis(DATA_VIS_PATH, catalogo().storage_options),
+        model,
+        scaler,
+        tamanho_janela=TAMANHO_JANELA,
+    )
+
+
+def calcula_comparacao(observado: pd.DataFrame, horizonte: int, n_janelas: int) -> dict:
+    """Previsões de cada modelo e do ensemble, com backtest sobre o observado."""
+    servico = servico_modelos()
+    passos = horizonte // INTERVALO_MINUTOS
+    resultado = servico.preve(observado, passos)
+    previsoes = pd.DataFrame(
+        {
+            "interval_start_utc": resultado["tempos"],
+            **{nome: y[0] for nome, y in resultado["modelos"].items()},
+            "ensemble": resultado["ensemble"][0],
+        }
+    )
+    return {
+        "previsoes": json.loads(_df_para_json(previsoes)),
+        "metricas": servico.compara(observado, passos, n_janelas).to_dict(
+            orient="records"
+        ),
+    }
+
+
+def calcula_previsao_periodo(
+    energia: str, periodo: str, periods: int, pontos: int
+) -> dict:
+    """Previsão do Prophet e histórico, já decimados para o gráfico."""
+    model = modelo_prophet(energia, periodo)
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)[["ds", "yhat", "yhat_lower", "yhat_upper"]]
+
+    historico = model.history[["ds", "y"]]
+    historico = historico.iloc[
+        decima(historico["ds"].values, historico["y"].values, pontos, "min_max")
+    ]
+    forecast = forecast.iloc[
+        decima(forecast["ds"].values, forecast["yhat"].values, pontos)
+    ]
+    return {
+        "historico": historico.to_dict(orient="list"),
+        "previsao": forecast.to_dict(orient="list"),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Respostas com ETag
+# -----------------------------------------------------------------------------
+
+
+def _df_para_json(df: pd.DataFrame) -> str:
+    return df.to_json(orient="records", date_format="iso")
+
+
+def responde(request: Request, corpo: str, etag: str) -> Response:
+    """Responde 304 se o cliente já tem a versão atual; senão, o JSON."""
+    cabecalhos = {"ETag": etag, "Cache-Control": f"max-age={int(TTL_SEGUNDOS)}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cabecalhos)
+    return Response(content=corpo, media_type="application/json", headers=cabecalhos)
+
+
+# =============================================================================
+# APLICAÇÃO
+# =============================================================================
+
+app = FastAPI(title="Previsão de Produção de Energia", version="0.1.0")
+cache = CacheTTL()
+
+
+@app.get("/janela")
+def janela(request: Request, n: int = Query(288, ge=1, le=17_280)) -> Response:
+    """Últimas ``n`` observações de vento (padrão: 24h)."""
+    df, versao = le_data_vis()
+
+    def calcula() -> str:
+        observado, _ = separa_data_vis(df)
+        return _df_para_json(observado[["interval_start_utc", "wind"]].tail(n))
+
+    return responde(request, *cache.obtem(("janela", versao, n), calcula))
+
+
+@app.get("/previsao")
+def previsao(
+    request: Request, horizonte: int = Query(30, ge=5, le=30, multiple_of=5)
+) -> Response:
+    """Previsão de vento para os próximos ``horizonte`` minutos."""
+    df, versao = le_data_vis()
+
+    def calcula() -> str:
+        observado, previsto = separa_data_vis(df)
+        return _df_para_json(calcula_previsao(observado, previsto, horizonte))
+
+    return responde(request, *cache.obtem(("previsao", versao, horizonte), calcula))
+
+
+@app.get("/comparacao")
+def comparacao(
+    request: Request,
+    horizonte: int = Query(30, ge=5, le=30, multiple_of=5),
+    n_janelas: int = Query(288, ge=1, le=17_280),
+) -> Response:
+    """Compara os modelos de 5 minutos: previsões, RMSE recente e latência."""
+    df, versao = le_data_vis()
+
+    def calcula() -> str:
+        observado, _ = separa_data_vis(df)
+        return json.dumps(calcula_comparacao(observado, horizonte, n_janelas))
+
+    chave = ("comparacao", versao, horizonte, n_janelas)
+    return responde(request, *cache.obtem(chave, calcula))
+
+
+@app.get("/agregado")
+def agregado(
+    request: Request,
+    freq: str = Query("h", pattern="^(h|D|W|M)$"),
+    agregacao: str = Query("median", pattern="^(mean|median|min|max)$"),
+) -> Response:
+    """Série de vento agregada por ``freq`` (hora, dia, semana ou mês)."""
+    df, versao = le_data_vis()
+
+    def calcula() -> str:
+        observado, _ = separa_data_vis(df)
+        serie = observado.set_index("interval_start_utc")["wind"]
+        regra = {"M": "MS"}.get(freq, freq)
+        rollup = serie.resample(regra).agg(agregacao).dropna().reset_index()
+        return _df_para_json(rollup)
+
+    chave = ("agregado", versao, freq, agregacao)
+    return responde(request, *cache.obtem(chave, calcula))
+
+
+@app.get("/periodo/{energia}/{periodo}")
+def periodo(
+    request: Request,
+    energia: str,
+    periodo: str,
+    periods: int = Query(24, ge=1, le=365),
+    pontos: int = Query(2_000, ge=10, le=20_000),
+) -> Response:
+    """Previsão do Prophet para uma energia e período, pronta para plotar."""
+    if energia not in ENERGIAS or periodo not in PERIODOS:
+        raise HTTPException(status_code=404, detail="Modelo não encontrado")
+
+    def calcula() -> str:
+        dados = calcula_previsao_periodo(energia, periodo, periods, pontos)
+        return json.dumps(dados, default=lambda valor: valor.isoformat())
+
+    chave = ("periodo", energia, periodo, periods, pontos)
+    return responde(request, *cache.obtem(chave, calcula))
+
+
+@app.get("/ao_vivo")
+def ao_vivo(
+    request: Request,
+    desde: Optional[datetime] = None,
+    horizonte: int = Query(30, ge=5, le=30, multiple_of=5),
+) -> Response:
+    """Observações posteriores a ``desde`` e a previsão atualizada.
+
+    A cada chamada apenas a versão do ``data.parquet`` é consultada; as linhas
+    novas entram no buffer do monitor e só a previsão recursiva é recalculada.
+    As faixas P10/P50/P90 acompanham a previsão quando há modelos de quantil.
+    """
+    monitor = monitor_ao_vivo()
+    try:
+        monitor.atualiza()
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="data_vis indisponível")
+    if desde is not None:
+        desde = pd.Timestamp(desde)
+        desde = desde.tz_localize("UTC") if desde.tzinfo is None else desde
+
+    def previsao_ao_vivo(passos: int) -> pd.DataFrame:
+        previsao = monitor.previsao.head(passos)
+        if previsao.empty:
+            return previsao
+        return acrescenta_quantis(previsao, monitor.buffer.como_dataframe())
+
+    def calcula() -> str:
+        passos = horizonte // INTERVALO_MINUTOS
+        return json.dumps(
+            {
+                "observado": json.loads(_df_para_json(monitor.novidades(desde))),
+                "previsao": json.loads(_df_para_json(previsao_ao_vivo(passos))),
+            }
+        )
+
+    chave = ("ao_vivo", monitor.versao, str(desde), horizonte)
+    return responde(request, *cache.obtem(chave, calcula))
@@ -0,0 +1,455 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+from typing import Optional
+
+import numpy as np
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Limite usado pelo LightGBM para considerar um valor como "zero"
+K_ZERO_THRESHOLD = 1e-35
+
+# Objetivos cuja saída bruta do booster já é a predição final
+OBJETIVOS_IDENTIDADE = (
+    "regression",
+    "regression_l1",
+    "huber",
+    "fair",
+    "quantile",
+    "mape",
+)
+
+# Objetivos cuja predição final é exp(saída bruta)
+OBJETIVOS_EXPONENCIAIS = ("poisson", "gamma", "tweedie")
+
+# Atributos de cada nó e seus valores antes de a travessia preenchê-los
+VALORES_INICIAIS_NO = {
+    "feature": 0,
+    "threshold": 0.0,
+    "filhos": (0, 0),
+    "valor": 0.0,
+    "default_left": False,
+    "missing_nan": False,
+    "missing_zero": False,
+}
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Ensemble de árvores achatado em vetores NumPy contíguos
+# -----------------------------------------------------------------------------
+
+
+class EnsembleCompilado:
+    """Avaliador de ensembles de árvores do LightGBM sem o wrapper do sklearn.
+
+    Todas as árvores do booster são achatadas em vetores contíguos (um nó por
+    posição). As folhas apontam para si mesmas, de modo que a travessia é feita
+    por um número fixo de iterações (a profundidade máxima) sem desvios.
+
+    O ganho está na linha única das previsões recursivas (``predict_linha``),
+    onde o custo fixo de cada chamada ao LightGBM domina. Em lotes o
+    ``Booster.predict`` (C++ e multithread) é mais rápido e deve ser preferido.
+
+    Attributes:
+        feature (np.ndarray): Índice da feature testada em cada nó.
+        threshold (np.ndarray): Limiar de cada nó (``x <= threshold`` -> esquerda).
+        filhos (np.ndarray): Vetor ``(n_nos, 2)`` com os filhos esquerdo/direito.
+        default_left (np.ndarray): Direção dos valores ausentes em cada nó.
+        missing_nan (np.ndarray): Nós cujo valor ausente é ``NaN``.
+        missing_zero (np.ndarray): Nós cujo valor ausente é ``0``.
+        valor (np.ndarray): Valor de saída de cada nó (usado só nas folhas).
+        raizes (np.ndarray): Posição da raiz de cada árvore.
+        profundidade (int): Profundidade máxima entre as árvores.
+        n_features (int): Número de features esperado na entrada.
+        transformacao (str): ``"identidade"`` ou ``"exp"``.
+        escala_saida (float | np.ndarray): Fator aplicado à soma das folhas (ex.:
+            random forest); um por saída em ensembles combinados.
+        saida (Optional[np.ndarray]): Saída de cada árvore em ensembles
+            combinados (``combina``); ``None`` para uma única saída.
+        n_internos (int): Número de nós internos. Os nós são renumerados na
+            construção: primeiro os internos, agrupados por feature, depois
+            as folhas.
+    """
+
+    def __init__(
+        self,
+        *,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        filhos: np.ndarray,
+        default_left: np.ndarray,
+        missing_nan: np.ndarray,
+        missing_zero: np.ndarray,
+        valor: np.ndarray,
+        raizes: np.ndarray,
+        profundidade: int,
+        n_features: int,
+        transformacao: str = "identidade",
+        escala_saida=1.0,
+        saida: Optional[np.ndarray] = None,
+    ) -> None:
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.filhos = np.ascontiguousarray(filhos, dtype=np.intp)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.missing_nan = np.ascontiguousarray(missing_nan, dtype=bool)
+        self.missing_zero = np.ascontiguousarray(missing_zero, dtype=bool)
+        self.valor = np.ascontiguousarray(valor, dtype=np.float64)
+        self.raizes = np.ascontiguousarray(raizes, dtype=np.intp)
+        self._renumera()
+        self.profundidade = int(profundidade)
+        self.n_features = int(n_features)
+        self.transformacao = transformacao
+        self.escala_saida = (
+            float(escala_saida)
+            if np.ndim(escala_saida) == 0
+            else np.asarray(escala_saida, dtype=np.float64)
+        )
+        self.saida = None if saida is None else np.asarray(saida, dtype=np.intp)
+        self.n_saidas = 1 if saida is None else int(self.saida.max()) + 1
+
+        # Soma das folhas por saída: `valor[nos] @ _agrupamento`
+        self._agrupamento = (
+            None
+            if saida is None
+            else np.eye(self.n_saidas, dtype=np.float64)[self.saida]
+        )
+
+        # Vetores auxiliares do caminho rápido (sem tratamento de ausentes)
+        self._esquerda = self.filhos[:, 0].copy()
+        self._direita = self.filhos[:, 1].copy()
+        self._tem_missing_zero = bool(self.missing_zero.any())
+
+        # Vetores auxiliares da linha única: `np.repeat(x, _contagem)` alinha
+        # a entrada com os nós internos e as folhas apontam para si mesmas
+        n = self.n_internos
+        self._contagem = np.bincount(self.feature[:n], minlength=self.n_features)
+        self._limiar_internos = self.threshold[:n]
+        self._esquerda_internos = self._esquerda[:n]
+        self._direita_internos = self._direita[:n]
+        self._folhas = np.arange(n, self.feature.size, dtype=np.intp)
+
+    def _renumera(self) -> None:
+        """Coloca os nós internos primeiro, ordenados por feature, e as folhas
+        no fim, atualizando filhos e raízes."""
+        n_nos = self.feature.size
+        interno = self.filhos[:, 0] != np.arange(n_nos)
+        internos = np.flatnonzero(interno)
+        ordem = np.concatenate([
+            internos[np.argsort(self.feature[internos], kind="stable")],
+            np.flatnonzero(~interno),
+        ])
+        posicao = np.empty(n_nos, dtype=np.intp)
+        posicao[ordem] = np.arange(n_nos)
+
+        self.feature = self.feature[ordem]
+        self.threshold = self.threshold[ordem]
+        self.filhos = posicao[self.filhos[ordem]]
+        self.default_left = self.default_left[ordem]
+        self.missing_nan = self.missing_nan[ordem]
+        self.missing_zero = self.missing_zero[ordem]
+        self.valor = self.valor[ordem]
+        self.raizes = posicao[self.raizes]
+        self.n_internos = internos.size
+
+    # -------------------------------------------------------------------------
+    # Construção
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def de_booster(
+        cls, booster, num_iteration: Optional[int] = None
+    ) -> "EnsembleCompilado":
+        """Achata um ``lightgbm.Booster`` em um ``EnsembleCompilado``.
+
+        Args:
+            booster (lightgbm.Booster): Booster treinado.
+            num_iteration (Optional[int]): Número de iterações a considerar. Se
+                ``None``, usa a melhor iteração (quando existir) ou todas.
+
+        Returns:
+            EnsembleCompilado: O ensemble pronto para avaliação.
+
+        Raises:
+            ValueError: Se o modelo usar recursos não suportados (multiclasse,
+                splits categóricos ou objetivos com outra transformação).
+        """
+        modelo = booster.dump_model(num_iteration=num_iteration)
+
+        if modelo["num_tree_per_iteration"] != 1:
+            raise ValueError("Apenas modelos com uma árvore por iteração.")
+
+        objetivo = modelo["objective"].split()[0]
+        if objetivo in OBJETIVOS_IDENTIDADE:
+            transformacao = "identidade"
+        elif objetivo in OBJETIVOS_EXPONENCIAIS:
+            transformacao = "exp"
+        else:
+            raise ValueError(f"Objetivo não suportado: '{objetivo}'")
+
+        # Um vetor por atributo dos nós, preenchidos durante a travessia
+        nos = {nome: [] for nome in VALORES_INICIAIS_NO}
+        raizes = []
+        profundidade = 0
+
+        def novo_no() -> int:
+            for nome, inicial in VALORES_INICIAIS_NO.items():
+                nos[nome].append(inicial)
+            return len(nos["feature"]) - 1
+
+        for arvore in modelo["tree_info"]:
+            raiz = novo_no()
+            raizes.append(raiz)
+            pilha = [(arvore["tree_structure"], raiz, 0)]
+
+            while pilha:
+                no, posicao, nivel = pilha.pop()
+                profundidade = max(profundidade, nivel)
+
+                if "leaf_value" in no:
+                    # Folhas apontam para si mesmas
+                    nos["valor"][posicao] = no["leaf_value"]
+                    nos["filhos"][posicao] = [posicao, posicao]
+                    continue
+
+                if no["decision_type"] != "<=":
+                    raise ValueError("Splits categóricos não são suportados.")
+
+                esquerda, direita = novo_no(), novo_no()
+                nos["feature"][posicao] = no["split_feature"]
+                nos["threshold"][posicao] = no["threshold"]
+                nos["filhos"][posicao] = [esquerda, direita]
+                nos["default_left"][posicao] = no["default_left"]
+                nos["missing_nan"][posicao] = no["missing_type"] == "NaN"
+                nos["missing_zero"][posicao] = no["missing_type"] == "Zero"
+
+                pilha.append((no["left_child"], esquerda, nivel + 1))
+                pilha.append((no["right_child"], direita, nivel + 1))
+
+        n_arvores = len(raizes)
+        escala_saida = (
+            1.0 / n_arvores if modelo.get("average_output") and n_arvores else 1.0
+        )
+
+        nos = {nome: np.array(valores) for nome, valores in nos.items()}
+        nos["filhos"] = nos["filhos"].reshape(-1, 2)
+        return cls(
+            **nos,
+            raizes=np.array(raizes),
+            profundidade=profundidade,
+            n_features=modelo["max_feature_idx"] + 1,
+            transformacao=transformacao,
+            escala_saida=escala_saida,
+        )
+
+    @classmethod
+    def de_lgbm(cls, model) -> "EnsembleCompilado":
+        """Compila um ``LGBMRegressor`` já treinado.
+
+        Args:
+            model (lightgbm.LGBMRegressor): Modelo treinado (ex.: ``lgbm.joblib``).
+
+        Returns:
+            EnsembleCompilado: O ensemble pronto para avaliação.
+        """
+        return cls.de_booster(model.booster_)
+
+    @classmethod
+    def combina(cls, ensembles: list) -> "EnsembleCompilado":
+        """Junta vários ensembles em um só, com uma saída por ensemble.
+
+        Os nós são concatenados em um único conjunto de vetores, de modo que
+        ``predict`` percorre as árvores de todos os modelos na mesma travessia
+        e devolve uma coluna por modelo (ex.: quantis e horizontes).
+
+        Args:
+            ensembles (list): ``EnsembleCompilado`` de saída única, todos com
+                as mesmas features e a mesma transformação.
+
+        Returns:
+            EnsembleCompilado: O ensemble com ``len(ensembles)`` saídas.
+
+        Raises:
+            ValueError: Se os ensembles não forem compatíveis.
+        """
+        if not ensembles:
+            raise ValueError("Nenhum ensemble para combinar.")
+        if any(e.saida is not None for e in ensembles):
+            raise ValueError("Apenas ensembles de saída única podem ser combinados.")
+        if len({(e.n_features, e.transformacao) for e in ensembles}) != 1:
+            raise ValueError("Ensembles com features ou transformações diferentes.")
+
+        deslocamentos = np.cumsum([0] + [e.valor.size for e in ensembles[:-1]])
+        return cls(
+            feature=np.concatenate([e.feature for e in ensembles]),
+            threshold=np.concatenate([e.threshold for e in ensembles]),
+            filhos=np.concatenate([
+                e.filhos + d for e, d in zip(ensembles, deslocamentos)
+            ]),
+            default_left=np.concatenate([e.default_left for e in ensembles]),
+            missing_nan=np.concatenate([e.missing_nan for e in ensembles]),
+            missing_zero=np.concatenate([e.missing_zero for e in ensembles]),
+            valor=np.concatenate([e.valor for e in ensembles]),
+            raizes=np.concatenate([
+                e.raizes + d for e, d in zip(ensembles, deslocamentos)
+            ]),
+            profundidade=max(e.profundidade for e in ensembles),
+            n_features=ensembles[0].n_features,
+            transformacao=ensembles[0].transformacao,
+            escala_saida=np.array([e.escala_saida for e in ensembles]),
+            saida=np.concatenate([
+                np.full(e.raizes.size, i) for i, e in enumerate(ensembles)
+            ]),
+        )
+
+    # -------------------------------------------------------------------------
+    # Avaliação
+    # -------------------------------------------------------------------------
+
+    def _soma_folhas(self, folhas: np.ndarray) -> np.ndarray:
+        if self._agrupamento is None:
+            return folhas.sum(axis=-1)
+        return folhas @ self._agrupamento
+
+    def _finaliza(self, soma: np.ndarray) -> np.ndarray:
+        soma *= self.escala_saida
+        if self.transformacao == "exp":
+            return np.exp(soma)
+        return soma
+
+    def _direcao(self, x: np.ndarray, nos: np.ndarray) -> np.ndarray:
+        """Retorna ``True`` onde a travessia deve seguir para a direita."""
+        nan = np.isnan(x)
+        missing_nan = self.missing_nan[nos]
+        x = np.where(nan & ~missing_nan, 0.0, x)
+        ausente = (missing_nan & nan) | (
+            self.missing_zero[nos] & (np.abs(x) <= K_ZERO_THRESHOLD)
+        )
+        return np.where(ausente, ~self.default_left[nos], ~(x <= self.threshold[nos]))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Avalia um lote de linhas com travessia vetorizada.
+
+        Args:
+            X (np.ndarray): Matriz ``(n_linhas, n_features)``.
+
+        Returns:
+            np.ndarray: Vetor ``(n_linhas,)`` com as predições, ou matriz
+                ``(n_linhas, n_saidas)`` em ensembles combinados.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Esperadas {self.n_features} features, recebidas {X.shape[1]}."
+            )
+
+        n_linhas = X.shape[0]
+        nos = np.broadcast_to(self.raizes, (n_linhas, self.raizes.size)).copy()
+        linhas = np.arange(n_linhas)[:, None]
+        simples = not self._tem_missing_zero and not np.isnan(X).any()
+
+        for _ in range(self.profundidade):
+            x = X[linhas, self.feature[nos]]
+            if simples:
+                nos = np.where(
+                    x <= self.threshold[nos], self._esquerda[nos], self._direita[nos]
+                )
+            else:
+                nos = self.filhos[nos, self._direcao(x, nos).astype(np.intp)]
+
+        return self._finaliza(self._soma_folhas(self.valor[nos]))
+
+    def predict_linha(self, x: np.ndarray) -> float:
+        """Avalia uma única linha; caminho enxuto para previsões recursivas.
+
+        A direção de todos os nós internos é calculada de uma só vez (poucas
+        operações sobre vetores longos, sem indexação da entrada) e a
+        travessia apenas segue os ponteiros de um nó por árvore.
+
+        Args:
+            x (np.ndarray): Vetor ``(n_features,)``.
+
+        Returns:
+            float: A predição para a linha (vetor ``(n_saidas,)`` em
+                ensembles combinados).
+        """
+        x = np.asarray(x, dtype=np.float64).ravel()
+        valores = np.repeat(x, self._contagem)
+        if self._tem_missing_zero or np.isnan(x).any():
+            direita = self._direcao(valores, slice(0, self.n_internos))
+        else:
+            direita = valores > self._limiar_internos
+        proximo = np.concatenate((
+            np.where(direita, self._direita_internos, self._esquerda_internos),
+            self._folhas,
+        ))
+
+        nos = self.raizes
+        for _ in range(self.profundidade):
+            nos = proximo[nos]
+
+        resultado = self._finaliza(self._soma_folhas(self.valor[nos]))
+        return float(resultado) if self.saida is None else resultado
+
+
+# -----------------------------------------------------------------------------
+# Erro de paridade com o LightGBM
+# -----------------------------------------------------------------------------
+
+
+class ErroParidade(ValueError):
+    """O ensemble compilado não reproduz as predições do LightGBM."""
+
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Compara o ensemble compilado com o modelo original
+# -----------------------------------------------------------------------------
+
+
+def verifica_paridade(
+    model, compilado: EnsembleCompilado, X: np.ndarray, tolerancia: float = 1e-9
+) -> float:
+    """Verifica se o ensemble compilado reproduz as predições do LightGBM.
+
+    Compara os dois caminhos de avaliação (lote e linha única); uma amostra
+    de algumas centenas de linhas basta.
+
+    Args:
+        model: Modelo LightGBM original (``LGBMRegressor`` ou ``Booster``).
+        compilado (EnsembleCompilado): Ensemble compilado a partir de ``model``.
+        X (np.ndarray): Linhas usadas na comparação.
+        tolerancia (float): Maior diferença absoluta aceitável.
+
+    Returns:
+        float: A maior diferença absoluta encontrada.
+
+    Raises:
+        ErroParidade: Se a diferença exceder a tolerância.
+    """
+    esperado = np.asarray(model.predict(X), dtype=np.float64).ravel()
+    if not len(X):
+        return 0.0
+    linhas = np.array([compilado.predict_linha(x) for x in np.asarray(X)])
+    diferenca = max(
+        float(np.max(np.abs(esperado - compilado.predict(X)))),
+        float(np.max(np.abs(esperado - linhas))),
+    )
+    if diferenca > tolerancia:
+        raise ErroParidade(
+            f"Ensemble compilado diverge do LightGBM: {diferenca:.3e} > "
+            f"{tolerancia:.3e}"
+        )
+    return diferenca
@@ -0,0 +1,364 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import Callable, Optional
+
+import pandas as pd
+import pyarrow.dataset as ds
+from deltalake import DeltaTable
+
+try:
+    import fcntl
+except ImportError:  # Windows: o índice fica protegido só entre threads
+    fcntl = None
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Limites padrão do cache
+MAX_BYTES = 2 * 1024**3
+MAX_ENTRADAS = 256
+
+# Nomes do índice e da sua trava dentro do diretório do cache
+NOME_INDICE = "indice.json"
+NOME_TRAVA = "indice.lock"
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Leitura incremental de uma tabela Delta
+# -----------------------------------------------------------------------------
+
+
+def arquivos_adicionados(
+    dt: DeltaTable, versao_antiga: int, storage_options: Optional[dict] = None
+) -> Optional[list]:
+    """Lista os arquivos acrescentados a uma tabela Delta desde ``versao_antiga``.
+
+    Args:
+        dt (DeltaTable): Handle da tabela na versão de interesse.
+        versao_antiga (int): Versão de referência.
+        storage_options (Optional[dict]): Opções de acesso ao storage.
+
+    Returns:
+        Optional[list]: URIs dos arquivos novos, ou ``None`` se
+            algum arquivo da versão antiga foi removido (overwrite, optimize,
+            delete), caso em que a leitura incremental não é possível.
+    """
+    antigos = set(
+        DeltaTable(
+            dt.table_uri, version=versao_antiga, storage_options=storage_options
+        ).file_uris()
+    )
+    novos = set(dt.file_uris())
+    if not antigos <= novos:
+        return None
+    return sorted(novos - antigos)
+
+
+def le_arquivos(
+    dt: DeltaTable, arquivos: list, colunas: Optional[list] = None
+) -> pd.DataFrame:
+    """Lê apenas os ``arquivos`` indicados de uma tabela Delta."""
+    dataset = dt.to_pyarrow_dataset()
+    nomes = {PurePosixPath(arquivo).name for arquivo in arquivos}
+    fragmentos = [
+        fragmento
+        for fragmento in dataset.get_fragments()
+        if PurePosixPath(fragmento.path).name in nomes
+    ]
+    parcial = ds.FileSystemDataset(
+        fragmentos,
+        schema=dataset.schema,
+        format=dataset.format,
+        filesystem=dataset.filesystem,
+    )
+    return parcial.to_table(columns=colunas).to_pandas()
+
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Cache em disco de séries derivadas de tabelas Delta
+# -----------------------------------------------------------------------------
+
+
+class CacheDerivados:
+    """Memoiza em Parquet leituras e agregações de tabelas Delta.
+
+    Há dois níveis de entradas:
+
+    - **base**: as colunas pedidas de uma tabela, ordenadas. A chave inclui a
+      versão Delta; quando a tabela avança apenas com appends, a entrada da
+      versão anterior é reaproveitada e somente os arquivos novos são lidos.
+    - **derivada**: o resultado de uma função (filtro, agregação...) aplicada
+      à base, chaveado por versão, colunas, nome da função e parâmetros.
+
+    As entradas são removidas por LRU sempre que o total passa de ``max_bytes``
+    ou de ``max_entradas``; entradas de versões superadas são descartadas.
+    O mesmo diretório pode ser usado por vários processos (front, scripts):
+    cada leitura e escrita do índice é feita sob uma trava de arquivo.
+
+    Attributes:
+        dir_cache (Path): Diretório onde ficam os Parquets e o índice.
+        max_bytes (int): Tamanho máximo do cache em disco.
+        max_entradas (int): Número máximo de entradas.
+    """
+
+    def __init__(
+        self,
+        dir_cache: Path,
+        max_bytes: int = MAX_BYTES,
+        max_entradas: int = MAX_ENTRADAS,
+    ) -> None:
+        self.dir_cache = Path(dir_cache)
+        self.dir_cache.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Índice
+    # -------------------------------------------------------------------------
+
+    @property
+    def _path_indice(self) -> Path:
+        return self.dir_cache / NOME_INDICE
+
+    @contextmanager
+    def _indice_travado(self):
+        """Exclusão mútua no índice entre threads e entre processos."""
+        with self._lock, open(self.dir_cache / NOME_TRAVA, "ab") as trava_f:
+            if fcntl is not None:
+                # Liberada ao fechar o arquivo
+                fcntl.flock(trava_f, fcntl.LOCK_EX)
+            yield
+
+    def _le_indice(self) -> dict:
+        try:
+            with open(self._path_indice, encoding="utf-8") as json_f:
+                return json.load(json_f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _grava_indice(self, indice: dict) -> None:
+        # Escrita atômica: uma falha no meio nunca deixa um índice parcial
+        temporario = self._path_indice.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(temporario, "w", encoding="utf-8") as json_f:
+            json.dump(indice, json_f)
+        os.replace(temporario, self._path_indice)
+
+    @staticmethod
+    def _chave(componentes: dict) -> str:
+        texto = json.dumps(componentes, sort_keys=True, default=str)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+    def _remove(self, indice: dict, chave: str) -> None:
+        entrada = indice.pop(chave, None)
+        if entrada is not None:
+            (self.dir_cache / entrada["arquivo"]).unlink(missing_ok=True)
+
+    def _despeja(self, indice: dict) -> None:
+        """Remove as entradas menos usadas até respeitar os limites."""
+        por_uso = sorted(indice, key=lambda chave: indice[chave]["ultimo_acesso"])
+        total = sum(entrada["bytes"] for entrada in indice.values())
+        while por_uso and (
+            total > self.max_bytes or len(indice) > self.max_entradas
+        ):
+            chave = por_uso.pop(0)
+            total -= indice[chave]["bytes"]
+            self._remove(indice, chave)
+
+    def _busca(self, chave: str) -> Optional[pd.DataFrame]:
+        with self._indice_travado():
+            indice = self._le_indice()
+            entrada = indice.get(chave)
+            if entrada is None:
+                return None
+            try:
+                df = pd.read_parquet(self.dir_cache / entrada["arquivo"])
+            except FileNotFoundError:
+                self._remove(indice, chave)
+                self._grava_indice(indice)
+                return None
+            entrada["ultimo_acesso"] = time.time()
+            self._grava_indice(indice)
+            return df
+
+    def _guarda(self, chave: str, df: pd.DataFrame, metadados: dict) -> None:
+        arquivo = f"{chave}.parquet"
+        temporario = self.dir_cache / f"{chave}.{uuid.uuid4().hex}.tmp"
+        df.to_parquet(temporario)
+        os.replace(temporario, self.dir_cache / arquivo)
+        with self._indice_travado():
+            indice = self._le_indice()
+            # Versões anteriores da mesma família ficam obsoletas
+            for outra in [
+                c
+                for c, e in indice.items()
+                if e.get("familia") == metadados["familia"] and c != chave
+            ]:
+                self._remove(indice, outra)
+            indice[chave] = {
+                **metadados,
+                "arquivo": arquivo,
+                "bytes": (self.dir_cache / arquivo).stat().st_size,
+                "ultimo_acesso": time.time(),
+            }
+            self._despeja(indice)
+            self._grava_indice(indice)
+
+    # -------------------------------------------------------------------------
+    # API pública
+    # -------------------------------------------------------------------------
+
+    def tabela(
+        self,
+        table_uri: str,
+        colunas: list,
+        ordenar_por: Optional[str] = None,
+        storage_options: Optional[dict] = None,
+        dt: Optional[DeltaTable] = None,
+    ) -> pd.DataFrame:
+        """Retorna as ``colunas`` da tabela (ordenadas), lendo só o que mudou.
+
+        Args:
+            table_uri (str): URI da tabela Delta.
+            colunas (list): Colunas a serem lidas.
+            ordenar_por (Optional[str]): Coluna usada na ordenação.
+            storage_options (Optional[dict]): Opções de acesso ao storage.
+            dt (Optional[DeltaTable]): Handle já aberto da tabela (evita
+                reconstruí-lo).
+
+        Returns:
+            pd.DataFrame: As colunas pedidas na versão atual da tabela.
+        """
+        dt = dt or DeltaTable(table_uri, storage_options=storage_options)
+        versao = dt.version()
+        familia = self._chave(
+            {"uri": table_uri, "colunas": colunas, "ordenar_por": ordenar_por}
+        )
+        chave = self._chave({"familia": familia, "versao": versao})
+
+        df = self._busca(chave)
+        if df is not None:
+            return df
+
+        df = self._atualiza_incremental(
+            dt, familia, colunas, ordenar_por, storage_options
+        )
+        if df is None:
+            df = dt.to_pandas(columns=colunas)
+            if ordenar_por is not None:
+                df = df.sort_values(by=ordenar_por, kind="stable")
+            df = df.reset_index(drop=True)
+
+        self._guarda(
+            chave, df, {"familia": familia, "uri": table_uri, "versao": versao}
+        )
+        return df
+
+    def _atualiza_incremental(
+        self,
+        dt: DeltaTable,
+        familia: str,
+        colunas: list,
+        ordenar_por: Optional[str],
+        storage_options: Optional[dict],
+    ) -> Optional[pd.DataFrame]:
+        """Aplica à entrada de uma versão anterior apenas os arquivos novos."""
+        versao = dt.version()
+        with self._indice_travado():
+            anteriores = [
+                (chave, entrada)
+                for chave, entrada in self._le_indice().items()
+                if entrada.get("familia") == familia and entrada["versao"] < versao
+            ]
+        if not anteriores:
+            return None
+
+        chave, entrada = max(anteriores, key=lambda item: item[1]["versao"])
+        base = self._busca(chave)
+        if base is None:
+            return None
+
+        novos = arquivos_adicionados(dt, entrada["versao"], storage_options)
+        if novos is None:
+            return None
+        if not novos:
+            return base
+
+        acrescimo = le_arquivos(dt, novos, colunas)
+        if ordenar_por is not None:
+            acrescimo = acrescimo.sort_values(by=ordenar_por, kind="stable")
+            em_ordem = base.empty or (
+                acrescimo[ordenar_por].min() >= base[ordenar_por].iloc[-1]
+            )
+        df = pd.concat([base, acrescimo], ignore_index=True)
+        if ordenar_por is not None and not em_ordem:
+            df = df.sort_values(by=ordenar_por, kind="stable").reset_index(drop=True)
+        return df
+
+    def deriva(
+        self,
+        table_uri: str,
+        funcao: Callable,
+        params: dict,
+        colunas: list,
+        *,
+        ordenar_por: Optional[str] = None,
+        storage_options: Optional[dict] = None,
+        dt: Optional[DeltaTable] = None,
+    ) -> pd.DataFrame:
+        """Memoiza ``funcao(base, **params)`` para a versão atual da tabela.
+
+        Args:
+            table_uri (str): URI da tabela Delta.
+            funcao (Callable): Filtro/agregação aplicado à base.
+            params (dict): Parâmetros de ``funcao`` (fazem parte da chave).
+            colunas (list): Colunas da base.
+            ordenar_por (Optional[str]): Coluna usada na ordenação da base.
+            storage_options (Optional[dict]): Opções de acesso ao storage.
+            dt (Optional[DeltaTable]): Handle já aberto da tabela.
+
+        Returns:
+            pd.DataFrame: O resultado de ``funcao``.
+        """
+        dt = dt or DeltaTable(table_uri, storage_options=storage_options)
+        versao = dt.version()
+        componentes = {
+            "uri": table_uri,
+            "colunas": colunas,
+            "ordenar_por": ordenar_por,
+            "funcao": f"{funcao.__module__}.{funcao.__qualname__}",
+            "params": params,
+        }
+        familia = self._chave(componentes)
+        chave = self._chave({"familia": familia, "versao": versao})
+
+        df = self._busca(chave)
+        if df is not None:
+            return df
+
+        base = self.tabela(
+            table_uri, colunas, ordenar_por, storage_options=storage_options, dt=dt
+        )
+        df = funcao(base, **params)
+        self._guarda(
+            chave, df, {"familia": familia, "uri": table_uri, "versao": versao}
+        )
+        return df
@@ -0,0 +1,205 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import threading
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+import pyarrow.fs as pafs
+from deltalake import DeltaTable
+
+from config.config import settings
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Raízes locais (ex.: `lake`) são relativas à raiz do projeto
+DIR_RAIZ = Path(__file__).resolve().parent.parent
+
+# Opções do delta-rs (`storage_options`) e o equivalente no S3 do pyarrow
+OPCOES_S3 = {
+    "AWS_REGION": "region",
+    "AWS_ACCESS_KEY_ID": "access_key",
+    "AWS_SECRET_ACCESS_KEY": "secret_key",
+    "AWS_SESSION_TOKEN": "session_token",
+}
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Catálogo de tabelas e arquivos do lake
+# -----------------------------------------------------------------------------
+
+
+class Catalogo:
+    """Resolve tabelas e arquivos do lake a partir do ``config/settings.toml``.
+
+    Cada tabela/arquivo é declarado uma única vez com sua camada (bronze,
+    silver, gold) e caminho relativo; o perfil ativo do dynaconf (``dev``
+    ou ``prod``, via ``ENV_FOR_DYNACONF``) define a raiz de cada camada e as
+    opções de acesso ao storage.
+
+    Os handles de ``DeltaTable`` são abertos uma única vez e atualizados com
+    ``update_incremental``, que lê apenas os commits novos do log.
+
+    Attributes:
+        raizes (dict): Raiz de cada camada (diretório local ou ``s3://``).
+        storage_options (dict): Opções de acesso ao storage.
+    """
+
+    def __init__(
+        self,
+        raizes: Optional[dict] = None,
+        storage_options: Optional[dict] = None,
+    ) -> None:
+        self.raizes = dict(settings.raizes if raizes is None else raizes)
+        self.storage_options = dict(
+            settings.storage_options if storage_options is None else storage_options
+        )
+        self._tabelas = {nome: dict(e) for nome, e in settings.tabelas.items()}
+        self._arquivos = {nome: dict(e) for nome, e in settings.arquivos.items()}
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Endereços
+    # -------------------------------------------------------------------------
+
+    def raiz(self, camada: str) -> str:
+        raiz = str(self.raizes[camada])
+        if "://" not in raiz and not Path(raiz).is_absolute():
+            raiz = str(DIR_RAIZ / raiz)
+        return raiz.rstrip("/")
+
+    @staticmethod
+    def _entrada(entradas: dict, nome: str) -> dict:
+        try:
+            return entradas[nome.lower()]
+        except KeyError:
+            raise KeyError(f"'{nome}' não está declarado no config/settings.toml")
+
+    def uri(self, nome: str) -> str:
+        """URI da tabela Delta ``nome``."""
+        entrada = self._entrada(self._tabelas, nome)
+        return f"{self.raiz(entrada['camada'])}/{entrada['caminho']}"
+
+    def arquivo(self, nome: str) -> str:
+        """Caminho (ou URI) do arquivo ``nome``."""
+        entrada = self._entrada(self._arquivos, nome)
+        return f"{self.raiz(entrada['camada'])}/{entrada['caminho']}"
+
+    def bucket(self, camada: str) -> Optional[str]:
+        """Bucket do S3 da camada (``None`` se a camada for local)."""
+        raiz = self.raiz(camada)
+        return urlparse(raiz).netloc if raiz.startswith("s3://") else None
+
+    def chave(self, nome: str) -> str:
+        """Chave de um arquivo ou tabela dentro do bucket da sua camada."""
+        entradas = self._arquivos if nome.lower() in self._arquivos else self._tabelas
+        return self._entrada(entradas, nome)["caminho"]
+
+    # -------------------------------------------------------------------------
+    # Tabelas Delta
+    # -------------------------------------------------------------------------
+
+    def tabela(self, nome: str, atualiza: bool = True) -> DeltaTable:
+        """Handle da tabela ``nome``, aberto uma única vez por processo.
+
+        Args:
+            nome (str): Nome da tabela no catálogo.
+            atualiza (bool): Aplica os commits novos (``update_incremental``)
+                a um handle já aberto.
+
+        Returns:
+            DeltaTable: O handle na versão mais recente.
+        """
+        with self._lock:
+            dt = self._handles.get(nome)
+            if dt is None:
+                dt = DeltaTable(self.uri(nome), storage_options=self.storage_options)
+                self._handles[nome] = dt
+            elif atualiza:
+                dt.update_incremental()
+            return dt
+
+    def esquece(self, nome: Optional[str] = None) -> None:
+        """Descarta o handle de uma tabela (ou de todas)."""
+        with self._lock:
+            if nome is None:
+                self._handles.clear()
+            else:
+                self._handles.pop(nome, None)
+
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Sistema de arquivos de um endereço do lake
+# -----------------------------------------------------------------------------
+
+
+def sistema_arquivos(uri: str, storage_options: Optional[dict] = None) -> tuple:
+    """``pyarrow.fs.FileSystem`` e caminho de um arquivo ou diretório do lake.
+
+    Aceita caminhos locais e URIs (``s3://``, ``file://``). No S3 as opções
+    de acesso do delta-rs (região e credenciais) são repassadas ao
+    ``S3FileSystem``, o que também evita a consulta da região do bucket.
+
+    Args:
+        uri (str): Caminho local ou URI.
+        storage_options (Optional[dict]): Opções de acesso ao storage.
+
+    Returns:
+        tuple: ``(sistema, caminho)`` para ``get_file_info``, leituras etc.
+    """
+    if "://" not in uri:
+        return pafs.LocalFileSystem(), str(Path(uri).absolute())
+    endereco = urlparse(uri)
+    if endereco.scheme in {"s3", "s3a"}:
+        opcoes = {
+            OPCOES_S3[chave.upper()]: valor
+            for chave, valor in (storage_options or {}).items()
+            if chave.upper() in OPCOES_S3
+        }
+        caminho = f"{endereco.netloc}{endereco.path}".rstrip("/")
+        return pafs.S3FileSystem(**opcoes), caminho
+    return pafs.FileSystem.from_uri(uri)
+
+
+# -----------------------------------------------------------------------------
+# Catálogo padrão do processo
+# -----------------------------------------------------------------------------
+
+# Catálogo em uso no processo, criado no primeiro uso
+_CATALOGO = {}
+
+
+def catalogo() -> Catalogo:
+    """Catálogo do perfil ativo, criado no primeiro uso."""
+    if "atual" not in _CATALOGO:
+        _CATALOGO["atual"] = Catalogo()
+    return _CATALOGO["atual"]
+
+
+def usa_catalogo(novo: Optional[Catalogo]) -> Optional[Catalogo]:
+    """Substitui o catálogo padrão (ex.: apontar tudo para um lake de teste).
+
+    Args:
+        novo (Optional[Catalogo]): Catálogo a usar; com ``None``, o próximo
+            ``catalogo()`` volta a criar o do perfil ativo.
+
+    Returns:
+        Optional[Catalogo]: O catálogo anterior (``None`` se ainda não havia
+            sido criado), para ser restaurado depois.
+    """
+    anterior = _CATALOGO.pop("atual", None)
+    if novo is not None:
+        _CATALOGO["atual"] = novo
+    return anterior
@@ -0,0 +1,156 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# O LTTB fixa o primeiro e o último ponto e escolhe ao menos um entre eles
+MIN_PONTOS_LTTB = 3
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Utilitários
+# -----------------------------------------------------------------------------
+
+
+def _para_float(x) -> np.ndarray:
+    """Converte o eixo x (números ou datas) em ``float64`` para os cálculos.
+
+    Datas com fuso (``datetime64[ns, tz]``) e vetores de ``Timestamp``/
+    ``datetime`` viram nanossegundos desde a época, em UTC.
+    """
+    if isinstance(getattr(x, "dtype", None), pd.DatetimeTZDtype):
+        return _nanossegundos(x)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    if x.dtype == object and x.size and isinstance(x[0], (datetime, np.datetime64)):
+        return _nanossegundos(x)
+    return x.astype(np.float64)
+
+
+def _nanossegundos(x) -> np.ndarray:
+    datas = pd.DatetimeIndex(pd.to_datetime(x, utc=True))
+    return datas.as_unit("ns").asi8.astype(np.float64)
+
+
+# -----------------------------------------------------------------------------
+# Largest-Triangle-Three-Buckets
+# -----------------------------------------------------------------------------
+
+
+def lttb(x, y, n_pontos: int) -> np.ndarray:
+    """Seleciona ``n_pontos`` pelo algoritmo Largest-Triangle-Three-Buckets.
+
+    Mantém o primeiro e o último ponto; em cada balde intermediário escolhe o
+    ponto que forma o maior triângulo com o ponto escolhido no balde anterior
+    e a média do balde seguinte, preservando a forma visual da série.
+
+    Args:
+        x: Eixo x (números ou datas), em ordem crescente.
+        y: Valores da série.
+        n_pontos (int): Número de pontos desejado (>= 3).
+
+    Returns:
+        np.ndarray: Índices dos pontos selecionados, em ordem crescente.
+    """
+    n = len(y)
+    if n_pontos >= n or n_pontos < MIN_PONTOS_LTTB:
+        return np.arange(n)
+
+    xf = _para_float(x)
+    yf = np.asarray(y, dtype=np.float64)
+
+    # Limites dos baldes intermediários (o primeiro e o último ponto são fixos)
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+    inicio, fim = limites[:-1], limites[1:]
+
+    # Média de cada balde, usada como vértice do balde seguinte
+    soma_x = np.add.reduceat(xf[1 : n - 1], inicio - 1)
+    soma_y = np.add.reduceat(yf[1 : n - 1], inicio - 1)
+    media_x = np.append(soma_x / (fim - inicio), xf[-1])
+    media_y = np.append(soma_y / (fim - inicio), yf[-1])
+
+    selecionados = np.empty(n_pontos, dtype=np.int64)
+    selecionados[0], selecionados[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_pontos - 2):
+        bx, by = xf[inicio[i] : fim[i]], yf[inicio[i] : fim[i]]
+        area = np.abs(
+            (xf[anterior] - media_x[i + 1]) * (by - yf[anterior])
+            - (xf[anterior] - bx) * (media_y[i + 1] - yf[anterior])
+        )
+        anterior = inicio[i] + int(np.argmax(area))
+        selecionados[i + 1] = anterior
+
+    return selecionados
+
+
+# -----------------------------------------------------------------------------
+# Mínimo/máximo por balde
+# -----------------------------------------------------------------------------
+
+
+def min_max(y, n_pontos: int) -> np.ndarray:
+    """Mantém, em cada balde, o ponto mínimo e o máximo (picos preservados).
+
+    Totalmente vetorizado; indicado para séries muito longas ou ruidosas.
+
+    Args:
+        y: Valores da série.
+        n_pontos (int): Número aproximado de pontos desejado.
+
+    Returns:
+        np.ndarray: Índices dos pontos selecionados, em ordem crescente.
+    """
+    n = len(y)
+    n_baldes = n_pontos // 2
+    if n_pontos >= n or n_baldes < 1:
+        return np.arange(n)
+
+    yf = np.asarray(y, dtype=np.float64)
+    tamanho = int(np.ceil(n / n_baldes))
+    completos = (n // tamanho) * tamanho
+
+    baldes = yf[:completos].reshape(-1, tamanho)
+    base = np.arange(baldes.shape[0]) * tamanho
+    indices = [base + baldes.argmin(axis=1), base + baldes.argmax(axis=1)]
+    if completos < n:
+        resto = yf[completos:]
+        indices.append(completos + np.array([resto.argmin(), resto.argmax()]))
+
+    return np.unique(np.concatenate(indices + [np.array([0, n - 1])]))
+
+
+# -----------------------------------------------------------------------------
+# Interface única
+# -----------------------------------------------------------------------------
+
+
+def decima(x, y, n_pontos: int, metodo: str = "lttb") -> np.ndarray:
+    """Retorna os índices da série reduzida a ``n_pontos`` pontos.
+
+    Args:
+        x: Eixo x (números ou datas), em ordem crescente.
+        y: Valores da série.
+        n_pontos (int): Número de pontos desejado.
+        metodo (str): ``"lttb"`` ou ``"min_max"``.
+
+    Returns:
+        np.ndarray: Índices dos pontos selecionados.
+    """
+    if metodo == "lttb":
+        return lttb(x, y, n_pontos)
+    if metodo == "min_max":
+        return min_max(y, n_pontos)
+    raise ValueError(f"Método de decimação desconhecido: '{metodo}'")
@@ -0,0 +1,366 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import json
+import time
+from typing import Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+from deltalake import DeltaTable, WriterProperties
+from deltalake.writer import write_deltalake
+
+from src.catalogo import sistema_arquivos
+from src.features import FONTES
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Instantes em microssegundos e UTC (resolução suportada pelo Delta)
+TIPO_TEMPO = pa.timestamp("us", tz="UTC")
+
+# Potências em MW: float32 é exato para inteiros até 2^24 e aceita ausentes
+TIPO_FONTE = pa.float32()
+
+# Partições por ano e mês: as leituras recentes (24h) tocam 1 ou 2 partições
+PARTICOES = ["year", "month"]
+
+# Esquema das tabelas `delta_table` (carga inicial) e `energy_grid_api`
+ESQUEMA_ENERGY_GRID = pa.schema([
+    pa.field("interval_start_utc", TIPO_TEMPO, nullable=False),
+    pa.field("interval_end_utc", TIPO_TEMPO, nullable=False),
+    *[pa.field(fonte, TIPO_FONTE) for fonte in FONTES],
+    pa.field("year", pa.int16(), nullable=False),
+    pa.field("month", pa.int8(), nullable=False),
+])
+
+# Compressão dos arquivos Parquet (menor que o snappy padrão, leitura rápida)
+COMPRESSAO = "ZSTD"
+
+# Linhas convertidas por lote na migração
+TAMANHO_LOTE = 100_000
+
+# Subdiretório da tabela onde a migração grava os arquivos novos
+PREFIXO_MIGRACAO = "migracao-v"
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Erros
+# -----------------------------------------------------------------------------
+
+
+class ErroMigracao(RuntimeError):
+    """A tabela recebeu commits enquanto a migração regravava os dados."""
+
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Conversão para o esquema
+# -----------------------------------------------------------------------------
+
+
+def _coluna_utc(tabela: pa.Table, nome: str) -> pa.Array:
+    """Coluna ``{nome}_utc``, derivada de ``{nome}_local`` se necessário."""
+    for coluna in (f"{nome}_utc", f"{nome}_local"):
+        if coluna in tabela.column_names:
+            valores = tabela.column(coluna)
+            break
+    else:
+        raise KeyError(f"A tabela não tem '{nome}_utc' nem '{nome}_local'.")
+
+    if pa.types.is_string(valores.type) or pa.types.is_large_string(valores.type):
+        valores = pa.array(
+            pd.to_datetime(valores.to_pandas(), utc=True), type=TIPO_TEMPO
+        )
+    if valores.type.tz is None:
+        raise ValueError(f"'{coluna}' não tem fuso horário.")
+    # Trocar o fuso não altera os valores: o timestamp Arrow já é em UTC
+    return valores.cast(TIPO_TEMPO)
+
+
+def aplica_esquema(dados) -> pa.Table:
+    """Converte um lote do ``caiso_fuel_mix`` para ``ESQUEMA_ENERGY_GRID``.
+
+    Aceita tanto a carga inicial (``interval_*_local``) quanto a ingestão
+    incremental (``interval_*_utc``); colunas antigas de partição
+    (``year_month``) e colunas fora do esquema são descartadas, fontes
+    ausentes viram nulos e as partições são calculadas do instante UTC.
+
+    Args:
+        dados (pd.DataFrame | pa.Table | pa.RecordBatch): Dados brutos.
+
+    Returns:
+        pa.Table: Tabela no esquema definido.
+    """
+    if isinstance(dados, pd.DataFrame):
+        tabela = pa.Table.from_pandas(dados, preserve_index=False)
+    elif isinstance(dados, pa.RecordBatch):
+        tabela = pa.Table.from_batches([dados])
+    else:
+        tabela = dados
+
+    inicio = _coluna_utc(tabela, "interval_start")
+    colunas = {
+        "interval_start_utc": inicio,
+        "interval_end_utc": _coluna_utc(tabela, "interval_end"),
+    }
+    for fonte in FONTES:
+        colunas[fonte] = (
+            tabela.column(fonte).cast(TIPO_FONTE)
+            if fonte in tabela.column_names
+            else pa.nulls(tabela.num_rows, TIPO_FONTE)
+        )
+    colunas["year"] = pc.year(inicio).cast(pa.int16())
+    colunas["month"] = pc.month(inicio).cast(pa.int8())
+
+    return pa.Table.from_pydict(colunas, schema=ESQUEMA_ENERGY_GRID)
+
+
+# -----------------------------------------------------------------------------
+# Escrita com o esquema
+# -----------------------------------------------------------------------------
+
+
+def escreve_energy_grid(
+    table_uri: str,
+    dados,
+    mode: str = "append",
+    storage_options: Optional[dict] = None,
+    **kwargs,
+) -> None:
+    """Grava na tabela já no esquema, com partições por ano e mês e ZSTD.
+
+    Args:
+        table_uri (str): URI da tabela Delta.
+        dados: Dados brutos (``pd.DataFrame``, ``pa.Table``) ou um
+            ``pa.RecordBatchReader`` já no esquema.
+        mode (str): Modo do ``write_deltalake``.
+        storage_options (Optional[dict]): Opções de acesso ao storage.
+        **kwargs: Repassados ao ``write_deltalake`` (ex.: ``description``).
+    """
+    if not isinstance(dados, pa.RecordBatchReader):
+        dados = aplica_esquema(dados)
+    write_deltalake(
+        table_uri,
+        dados,
+        partition_by=PARTICOES,
+        mode=mode,
+        storage_options=storage_options,
+        writer_properties=WriterProperties(compression=COMPRESSAO),
+        **kwargs,
+    )
+
+
+# -----------------------------------------------------------------------------
+# Filtros com poda de partições
+# -----------------------------------------------------------------------------
+
+
+def _utc(instante) -> pd.Timestamp:
+    instante = pd.Timestamp(instante)
+    if instante.tzinfo is None:
+        return instante.tz_localize("UTC")
+    return instante.tz_convert("UTC")
+
+
+def filtro_periodo(inicio, fim=None) -> ds.Expression:
+    """Filtro ``inicio <= interval_start_utc < fim`` que também poda partições.
+
+    As condições sobre ``year``/``month`` fazem o ``pyarrow`` descartar os
+    arquivos das partições fora do período sem abri-los.
+    """
+    inicio = _utc(inicio)
+    ano, mes = ds.field("year"), ds.field("month")
+
+    filtro = ((ano > inicio.year) | ((ano == inicio.year) & (mes >= inicio.month))) & (
+        ds.field("interval_start_utc") >= pa.scalar(inicio, type=TIPO_TEMPO)
+    )
+    if fim is not None:
+        fim = _utc(fim)
+        filtro &= ((ano < fim.year) | ((ano == fim.year) & (mes <= fim.month))) & (
+            ds.field("interval_start_utc") < pa.scalar(fim, type=TIPO_TEMPO)
+        )
+    return filtro
+
+
+# -----------------------------------------------------------------------------
+# Migração de tabelas existentes
+# -----------------------------------------------------------------------------
+
+
+def _lotes_no_esquema(
+    dataset: ds.Dataset, tamanho_lote: int
+) -> Iterator[pa.RecordBatch]:
+    for lote in dataset.to_batches(batch_size=tamanho_lote):
+        if lote.num_rows:
+            yield from aplica_esquema(lote).to_batches()
+
+
+def _acao_remove(arquivo: dict, instante_ms: int) -> dict:
+    particoes = {
+        coluna: None if valor is None else str(valor)
+        for coluna, valor in arquivo["partition_values"].items()
+    }
+    return {
+        "remove": {
+            "path": arquivo["path"],
+            "deletionTimestamp": instante_ms,
+            "dataChange": False,
+            "extendedFileMetadata": True,
+            "partitionValues": particoes,
+            "size": arquivo["size_bytes"],
+        }
+    }
+
+
+def _acoes_da_troca(dt: DeltaTable, sistema, raiz: str, subdiretorio: str) -> list:
+    """Ações que trocam os arquivos de ``dt`` pelos gravados em ``subdiretorio``.
+
+    O metadado (esquema e partições) e os ``add`` (com as estatísticas) vêm
+    do primeiro commit da tabela gravada no subdiretório; o ``id`` da tabela
+    original é mantido. ``dataChange`` falso marca a troca como uma
+    reorganização dos mesmos dados, como num ``optimize``.
+    """
+    instante_ms = int(time.time() * 1000)
+    log = f"{raiz}/{subdiretorio}/_delta_log/{0:020d}.json"
+    with sistema.open_input_stream(log) as log_f:
+        novas = [json.loads(linha) for linha in log_f.read().decode().splitlines()]
+
+    acoes = []
+    for acao in novas:
+        if "metaData" in acao:
+            acoes.append({"metaData": {**acao["metaData"], "id": dt.metadata().id}})
+        elif "add" in acao:
+            caminho = f"{subdiretorio}/{acao['add']['path']}"
+            acoes.append({"add": {**acao["add"], "path": caminho, "dataChange": False}})
+    acoes += [
+        _acao_remove(arquivo, instante_ms)
+        for arquivo in dt.get_add_actions(flatten=False).to_pylist()
+    ]
+    acoes.append({
+        "commitInfo": {
+            "timestamp": instante_ms,
+            "operation": "WRITE",
+            "operationParameters": {
+                "mode": "Overwrite",
+                "partitionBy": json.dumps(PARTICOES),
+            },
+        }
+    })
+    return acoes
+
+
+def _troca_arquivos(
+    table_uri: str,
+    dt: DeltaTable,
+    subdiretorio: str,
+    storage_options: Optional[dict] = None,
+) -> None:
+    """Grava, como a versão seguinte a ``dt``, o commit que aplica a migração.
+
+    Raises:
+        ErroMigracao: Se a tabela recebeu outro commit depois de ``dt``; os
+            arquivos do subdiretório são apagados e a tabela fica intacta.
+    """
+    sistema, raiz = sistema_arquivos(table_uri, storage_options)
+    commit = f"{raiz}/_delta_log/{dt.version() + 1:020d}.json"
+    try:
+        if sistema.get_file_info(commit).type != pafs.FileType.NotFound:
+            raise ErroMigracao(
+                f"{table_uri} recebeu commits depois da versão {dt.version()} "
+                "durante a migração: pause a ingestão e rode de novo."
+            )
+        acoes = _acoes_da_troca(dt, sistema, raiz, subdiretorio)
+        with sistema.open_output_stream(commit) as log_f:
+            log_f.write("".join(json.dumps(a) + "\n" for a in acoes).encode())
+    except BaseException:
+        sistema.delete_dir(f"{raiz}/{subdiretorio}")
+        raise
+    # Os arquivos ficam; o log da tabela auxiliar não é mais necessário
+    sistema.delete_dir(f"{raiz}/{subdiretorio}/_delta_log")
+
+
+def migra_tabela(
+    table_uri: str,
+    storage_options: Optional[dict] = None,
+    destino_uri: Optional[str] = None,
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> dict:
+    """Regrava uma tabela existente no esquema e nas partições definidas.
+
+    A leitura é feita em lotes (sem carregar a tabela inteira) a partir da
+    versão atual. O ``deltalake`` não aceita trocar as colunas de partição
+    num overwrite, então os dados são gravados como uma tabela auxiliar no
+    subdiretório ``migracao-v<versão>`` da própria tabela. Um único commit,
+    na versão seguinte, passa a apontar para esses arquivos com o esquema e
+    as partições novos:
+
+    - leitores e ``CacheDerivados`` veem a tabela antiga ou a migrada, nunca
+      um estado intermediário;
+    - a versão continua crescendo, então os handles abertos
+      (``update_incremental``) e os caches chaveados por versão seguem
+      válidos sem reinício;
+    - a versão anterior continua legível por *time travel* até um
+      ``vacuum``. Não use ``restore`` para desfazer: o ``deltalake`` 0.22
+      também não troca as partições nele.
+
+    A ingestão deve estar pausada. Se a tabela receber um commit durante a
+    migração, ela falha sem alterar a tabela.
+
+    Args:
+        table_uri (str): Tabela a migrar.
+        storage_options (Optional[dict]): Opções de acesso ao storage.
+        destino_uri (Optional[str]): Grava em outra tabela (que não pode
+            existir) e mantém a original intacta.
+        tamanho_lote (int): Linhas convertidas por lote.
+
+    Returns:
+        dict: Versões de origem e migrada, linhas e bytes antes e depois.
+
+    Raises:
+        ErroMigracao: Se a tabela mudou durante a migração.
+    """
+    table_uri = table_uri.rstrip("/")
+    dt = DeltaTable(table_uri, storage_options=storage_options)
+    versao = dt.version()
+    bytes_antes = _bytes_da_tabela(dt)
+    subdiretorio = f"{PREFIXO_MIGRACAO}{versao}"
+
+    leitor = pa.RecordBatchReader.from_batches(
+        ESQUEMA_ENERGY_GRID, _lotes_no_esquema(dt.to_pyarrow_dataset(), tamanho_lote)
+    )
+    escreve_energy_grid(
+        destino_uri or f"{table_uri}/{subdiretorio}",
+        leitor,
+        mode="error",
+        storage_options=storage_options,
+        description=f"Migrada para o esquema do energy_grid_api (versão {versao})",
+    )
+    if destino_uri is None:
+        _troca_arquivos(table_uri, dt, subdiretorio, storage_options)
+
+    migrada = DeltaTable(destino_uri or table_uri, storage_options=storage_options)
+    return {
+        "versao_origem": versao,
+        "versao": migrada.version(),
+        "linhas": migrada.to_pyarrow_dataset().count_rows(),
+        "bytes_antes": bytes_antes,
+        "bytes_depois": _bytes_da_tabela(migrada),
+    }
+
+
+def _bytes_da_tabela(dt: DeltaTable) -> int:
+    """Tamanho dos arquivos da versão atual, lido do log (sem listar o storage)."""
+    acoes = dt.get_add_actions(flatten=True)
+    return int(pc.sum(pa.table(acoes).column("size_bytes")).as_py() or 0)
@@ -0,0 +1,390 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from numpy.lib.stride_tricks import sliding_window_view
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Fontes de energia do dataset caiso_fuel_mix
+FONTES = [
+    "solar",
+    "wind",
+    "geothermal",
+    "biomass",
+    "biogas",
+    "small_hydro",
+    "coal",
+    "nuclear",
+    "natural_gas",
+    "large_hydro",
+    "batteries",
+    "imports",
+    "other",
+]
+
+# Número de observações anteriores usadas diretamente como features
+LAGS = 6
+
+# Janelas das estatísticas móveis: 30 min, 1 h, 3 h e 24 h
+JANELAS = (6, 12, 36, 288)
+
+# Períodos (em segundos) das codificações cíclicas de calendário
+CICLOS = {"dia": 86_400, "semana": 7 * 86_400, "ano": 365.25 * 86_400}
+
+# Fuso da rede (CAISO): as codificações cíclicas usam o relógio local
+FUSO_REDE = "America/Los_Angeles"
+
+# Intervalo entre observações
+INTERVALO = pd.Timedelta(minutes=5)
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Utilitários de conversão
+# -----------------------------------------------------------------------------
+
+
+def _para_arrow(tabela: Union[pd.DataFrame, pa.Table]) -> pa.Table:
+    if isinstance(tabela, pa.Table):
+        return tabela
+    return pa.Table.from_pandas(tabela, preserve_index=False)
+
+
+def _coluna_float(tabela: pa.Table, nome: str) -> np.ndarray:
+    coluna = tabela.column(nome).combine_chunks().cast(pa.float64())
+    return coluna.to_numpy(zero_copy_only=False)
+
+
+def _coluna_epoch(tabela: pa.Table, nome: str) -> np.ndarray:
+    """Converte uma coluna de timestamps em segundos desde a época (UTC)."""
+    coluna = tabela.column(nome).combine_chunks()
+    if pa.types.is_timestamp(coluna.type):
+        coluna = coluna.cast(pa.timestamp("ns", tz=coluna.type.tz))
+    else:
+        coluna = pa.array(pd.to_datetime(coluna.to_pandas(), utc=True))
+    return coluna.cast(pa.int64()).to_numpy(zero_copy_only=False) / 1e9
+
+
+def _segundos_locais(tempos: np.ndarray, fuso: str) -> np.ndarray:
+    """Converte segundos UTC para o relógio local de ``fuso`` (com horário de
+    verão), mantendo a escala em segundos."""
+    instantes = pd.to_datetime(tempos, unit="s", utc=True).tz_convert(fuso)
+    locais = instantes.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+    return locais.astype(np.int64) / 1e9
+
+
+def historico_necessario(
+    lags: int = LAGS, janelas: Sequence[int] = JANELAS, **_
+) -> int:
+    """Observações anteriores exigidas por ``calcula_features``.
+
+    Aceita os mesmos parâmetros de ``calcula_features`` (os demais são
+    ignorados), para que os chamadores possam repassar seus ``kwargs``.
+    """
+    return max([lags, *janelas])
+
+
+# -----------------------------------------------------------------------------
+# Janelas deslizantes (features "raw" do modelo atual)
+# -----------------------------------------------------------------------------
+
+
+def janelas_deslizantes(valores: np.ndarray, tamanho_janela: int) -> tuple:
+    """Monta as janelas de ``tamanho_janela`` observações e o valor seguinte.
+
+    Equivalente ao laço ``X.append(valores[i:i + tamanho_janela])`` usado
+    originalmente, mas sem cópias: ``X`` é uma visão sobre ``valores``.
+
+    Args:
+        valores (np.ndarray): Série temporal ordenada.
+        tamanho_janela (int): Número de observações por janela.
+
+    Returns:
+        tuple: ``X`` com shape ``(n - tamanho_janela, tamanho_janela)`` e ``y``.
+    """
+    valores = np.asarray(valores).ravel()
+    X = sliding_window_view(valores[:-1], tamanho_janela)
+    y = valores[tamanho_janela:]
+    return X, y
+
+
+# -----------------------------------------------------------------------------
+# Estatísticas móveis
+# -----------------------------------------------------------------------------
+
+
+def _estatisticas_moveis(x: np.ndarray, janela: int) -> tuple:
+    """Média, desvio, mínimo e máximo de ``x[t - janela:t]`` para cada ``t``.
+
+    As posições sem histórico suficiente (``t < janela``) ficam com ``NaN``.
+    Média e desvio usam somas acumuladas sobre a série centralizada (evita
+    perda de precisão); mínimo e máximo reduzem uma visão sem cópia.
+
+    Valores ausentes (``NaN``) são ignorados em todas as estatísticas: as
+    somas acumuladas contam apenas as observações válidas de cada janela, de
+    modo que uma lacuna não contamina as janelas seguintes. Janelas sem
+    nenhuma observação válida ficam com ``NaN``.
+    """
+    n = x.size
+    saida = [np.full(n, np.nan) for _ in range(4)]
+    if n <= janela:
+        return tuple(saida)
+
+    valido = ~np.isnan(x)
+    centro = np.nanmean(x) if valido.any() else 0.0
+    xc = np.where(valido, x - centro, 0.0)
+    s0 = np.concatenate(([0], np.cumsum(valido)))
+    s1 = np.concatenate(([0.0], np.cumsum(xc)))
+    s2 = np.concatenate(([0.0], np.cumsum(xc * xc)))
+
+    contagem = (s0[janela:] - s0[:-janela])[:-1]
+    soma = (s1[janela:] - s1[:-janela])[:-1]
+    soma_q = (s2[janela:] - s2[:-janela])[:-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.where(contagem > 0, soma / contagem, np.nan)
+        variancia = np.maximum(soma_q / contagem - media * media, 0.0)
+
+    # `fmin`/`fmax` ignoram NaN (e devolvem NaN se a janela inteira faltar)
+    visao = sliding_window_view(x[:-1], janela)
+    saida[0][janela:] = media + centro
+    saida[1][janela:] = np.sqrt(variancia)
+    saida[2][janela:] = np.fmin.reduce(visao, axis=1)
+    saida[3][janela:] = np.fmax.reduce(visao, axis=1)
+    return tuple(saida)
+
+
+# -----------------------------------------------------------------------------
+# Nomes das features
+# -----------------------------------------------------------------------------
+
+
+def nomes_features(
+    coluna_alvo: str = "wind",
+    lags: int = LAGS,
+    janelas: Sequence[int] = JANELAS,
+    outras_fontes: Optional[Sequence[str]] = None,
+) -> list:
+    """Lista os nomes das colunas geradas por ``calcula_features``, em ordem."""
+    if outras_fontes is None:
+        outras_fontes = [f for f in FONTES if f != coluna_alvo]
+
+    nomes = [f"{coluna_alvo}_lag_{i}" for i in range(lags, 0, -1)]
+    for janela in janelas:
+        nomes += [
+            f"{coluna_alvo}_{estatistica}_{janela}"
+            for estatistica in ("media", "desvio", "min", "max")
+        ]
+    for ciclo in CICLOS:
+        nomes += [f"{ciclo}_sin", f"{ciclo}_cos"]
+    nomes += [f"{fonte}_lag_1" for fonte in outras_fontes]
+    return nomes
+
+
+# -----------------------------------------------------------------------------
+# Geração das features
+# -----------------------------------------------------------------------------
+
+
+def calcula_features(
+    tabela: Union[pd.DataFrame, pa.Table],
+    *,
+    coluna_tempo: str = "interval_start_utc",
+    coluna_alvo: str = "wind",
+    lags: int = LAGS,
+    janelas: Sequence[int] = JANELAS,
+    outras_fontes: Optional[Sequence[str]] = None,
+    fuso: str = FUSO_REDE,
+) -> tuple:
+    """Gera a matriz de features para prever ``coluna_alvo`` no instante ``t``.
+
+    Cada linha usa apenas informação anterior a ``t``: os ``lags`` últimos
+    valores do alvo, estatísticas móveis sobre cada janela, o valor anterior
+    das demais fontes e a codificação cíclica (seno/cosseno) do próprio
+    instante ``t`` para hora do dia, dia da semana e dia do ano, no horário
+    local da rede (``fuso``), em que o ciclo diário da carga e da geração
+    acontece. As primeiras ``historico_necessario`` linhas, sem histórico
+    suficiente, são descartadas. A tabela deve estar ordenada pelo tempo.
+
+    Args:
+        tabela (Union[pd.DataFrame, pa.Table]): Dados ordenados pelo tempo.
+        coluna_tempo (str): Coluna com o início do intervalo.
+        coluna_alvo (str): Fonte de energia a ser prevista.
+        lags (int): Número de observações anteriores do alvo.
+        janelas (Sequence[int]): Tamanhos das janelas móveis.
+        outras_fontes (Optional[Sequence[str]]): Demais fontes usadas como
+            features. Se ``None``, todas as de ``FONTES`` exceto o alvo.
+        fuso (str): Fuso das codificações cíclicas.
+
+    Returns:
+        tuple: ``X`` (``float32``), ``y`` e os instantes ``t`` (segundos UTC).
+    """
+    tabela = _para_arrow(tabela)
+    if outras_fontes is None:
+        outras_fontes = [
+            f for f in FONTES if f != coluna_alvo and f in tabela.column_names
+        ]
+
+    alvo = _coluna_float(tabela, coluna_alvo)
+    tempos = _coluna_epoch(tabela, coluna_tempo)
+    n = alvo.size
+    historico = historico_necessario(lags, janelas)
+    nomes = nomes_features(coluna_alvo, lags, janelas, outras_fontes)
+
+    X = np.empty((max(n - historico, 0), len(nomes)), dtype=np.float32)
+    if n <= historico:
+        return X, alvo[historico:], tempos[historico:]
+
+    coluna = 0
+
+    # Lags do alvo: x[t - lags], ..., x[t - 1]
+    X[:, coluna : coluna + lags] = sliding_window_view(alvo[:-1], lags)[
+        historico - lags :
+    ]
+    coluna += lags
+
+    # Estatísticas móveis do alvo
+    for janela in janelas:
+        for estatistica in _estatisticas_moveis(alvo, janela):
+            X[:, coluna] = estatistica[historico:]
+            coluna += 1
+
+    # Codificação cíclica do instante previsto, no relógio local
+    locais = _segundos_locais(tempos[historico:], fuso)
+    for periodo in CICLOS.values():
+        angulo = 2 * np.pi * (locais % periodo) / periodo
+        X[:, coluna] = np.sin(angulo)
+        X[:, coluna + 1] = np.cos(angulo)
+        coluna += 2
+
+    # Valor anterior das demais fontes
+    for fonte in outras_fontes:
+        X[:, coluna] = _coluna_float(tabela, fonte)[historico - 1 : -1]
+        coluna += 1
+
+    return X, alvo[historico:], tempos[historico:]
+
+
+def gera_features_em_blocos(
+    tabela: Union[pd.DataFrame, pa.Table], tamanho_bloco: int = 100_000, **kwargs
+) -> Iterator[tuple]:
+    """Gera as features em blocos de até ``tamanho_bloco`` linhas.
+
+    Cada bloco é calculado sobre sua fatia da tabela acrescida do histórico
+    necessário, de modo que o resultado concatenado é idêntico ao de
+    ``calcula_features`` sobre a tabela inteira, com memória limitada.
+
+    Args:
+        tabela (Union[pd.DataFrame, pa.Table]): Dados ordenados pelo tempo.
+        tamanho_bloco (int): Número máximo de linhas por bloco.
+        **kwargs: Parâmetros repassados para ``calcula_features``.
+
+    Yields:
+        tuple: ``X``, ``y`` e instantes de cada bloco.
+    """
+    tabela = _para_arrow(tabela)
+    historico = historico_necessario(**kwargs)
+    for inicio in range(historico, tabela.num_rows, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, tabela.num_rows)
+        fatia = tabela.slice(inicio - historico, fim - inicio + historico)
+        yield calcula_features(fatia, **kwargs)
+
+
+def salva_features_parquet(
+    tabela: Union[pd.DataFrame, pa.Table],
+    dir_saida: Path,
+    tamanho_bloco: int = 100_000,
+    **kwargs,
+) -> list:
+    """Escreve as features em arquivos Parquet, um por bloco.
+
+    Args:
+        tabela (Union[pd.DataFrame, pa.Table]): Dados ordenados pelo tempo.
+        dir_saida (Path): Diretório de saída (``parte-00000.parquet``, ...).
+        tamanho_bloco (int): Número máximo de linhas por arquivo.
+        **kwargs: Parâmetros repassados para ``calcula_features``.
+
+    Returns:
+        list: Caminhos dos arquivos gerados.
+    """
+    dir_saida = Path(dir_saida)
+    dir_saida.mkdir(parents=True, exist_ok=True)
+
+    tabela = _para_arrow(tabela)
+    coluna_alvo = kwargs.get("coluna_alvo", "wind")
+    outras_fontes = kwargs.get("outras_fontes") or [
+        f for f in FONTES if f != coluna_alvo and f in tabela.column_names
+    ]
+    kwargs["outras_fontes"] = outras_fontes
+    nomes = nomes_features(
+        coluna_alvo,
+        kwargs.get("lags", LAGS),
+        kwargs.get("janelas", JANELAS),
+        outras_fontes,
+    )
+
+    arquivos = []
+    blocos = gera_features_em_blocos(tabela, tamanho_bloco, **kwargs)
+    for i, (X, y, tempos) in enumerate(blocos):
+        colunas = {"t": pa.array((tempos * 1e6).astype(np.int64)).cast(
+            pa.timestamp("us", tz="UTC")
+        )}
+        colunas.update({nome: X[:, j] for j, nome in enumerate(nomes)})
+        colunas["y"] = y
+        caminho = dir_saida / f"parte-{i:05d}.parquet"
+        pq.write_table(pa.table(colunas), caminho)
+        arquivos.append(caminho)
+    return arquivos
+
+
+# -----------------------------------------------------------------------------
+# Uso online (Lambda de predição)
+# -----------------------------------------------------------------------------
+
+
+def features_proximo_intervalo(
+    tabela_recente: Union[pd.DataFrame, pa.Table],
+    coluna_tempo: str = "interval_start_utc",
+    **kwargs,
+) -> np.ndarray:
+    """Gera a linha de features do intervalo seguinte ao último observado.
+
+    Usa exatamente o mesmo código do treino: acrescenta à tabela uma linha
+    com o próximo instante (e alvo ausente) e calcula apenas o trecho final.
+
+    Args:
+        tabela_recente (Union[pd.DataFrame, pa.Table]): Últimas observações,
+            com pelo menos ``historico_necessario(**kwargs)`` linhas.
+        coluna_tempo (str): Coluna com o início do intervalo.
+        **kwargs: Parâmetros repassados para ``calcula_features``.
+
+    Returns:
+        np.ndarray: Matriz ``(1, n_features)``.
+    """
+    df = (
+        tabela_recente.to_pandas()
+        if isinstance(tabela_recente, pa.Table)
+        else tabela_recente
+    )
+    historico = historico_necessario(**kwargs)
+    df = df.tail(historico)
+    if len(df) < historico:
+        raise ValueError(
+            f"São necessárias {historico} observações, recebidas {len(df)}."
+        )
+
+    proxima = {coluna_tempo: pd.to_datetime(df[coluna_tempo]).iloc[-1] + INTERVALO}
+    df = pd.concat([df, pd.DataFrame([proxima])], ignore_index=True)
+    X, _, _ = calcula_features(df, coluna_tempo=coluna_tempo, **kwargs)
+    return X
@@ -0,0 +1,458 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import json
+from typing import Callable, Optional
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+from deltalake.writer import write_deltalake
+
+from src.catalogo import sistema_arquivos
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Observações equivalentes da média móvel exponencial (~1 dia de dados)
+JANELA_EFETIVA = 288
+
+# Observações usadas para congelar a distribuição de referência (~1 semana)
+N_REFERENCIA = 2_016
+
+# Observações recentes guardadas para casar com previsões atrasadas (~6h)
+N_OBSERVADOS_RECENTES = 72
+
+# Previsões sem observação há mais que isto são descartadas
+VALIDADE_PENDENTES = pd.Timedelta(hours=6)
+
+# Limites que disparam o retreino
+LIMITE_RMSE = 500.0
+LIMITE_PSI = 0.2
+MIN_AMOSTRAS = 50
+
+# Nome do arquivo de estado dentro da tabela de métricas (ignorado pelo Delta)
+NOME_ESTADO = "_estado_monitor.json"
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Leitura apenas das versões novas de uma tabela Delta
+# -----------------------------------------------------------------------------
+
+
+def _ultima_versao(sistema, raiz: str) -> int:
+    """Versão mais recente, pelo nome dos commits em ``_delta_log``."""
+    versoes = [
+        int(info.base_name[: -len(".json")])
+        for info in sistema.get_file_info(pafs.FileSelector(f"{raiz}/_delta_log"))
+        if info.base_name.endswith(".json") and info.base_name[:-5].isdigit()
+    ]
+    if not versoes:
+        raise FileNotFoundError(f"'{raiz}' não é uma tabela Delta.")
+    return max(versoes)
+
+
+def arquivos_das_versoes(
+    table_uri: str, versao_antiga: int, storage_options: Optional[dict] = None
+) -> tuple:
+    """Arquivos com dados novos gravados depois de ``versao_antiga``.
+
+    Lê os commits ``_delta_log/<versão>.json`` a partir de ``versao_antiga +
+    1`` até o primeiro que ainda não existe, em vez de abrir a tabela (o que
+    reprocessaria o log inteiro): o custo depende só do número de commits
+    novos. Ações ``add`` sem ``dataChange`` (``optimize``) são ignoradas,
+    pois apenas reorganizam dados já existentes.
+
+    Returns:
+        tuple: Caminhos dos arquivos, na ordem em que foram commitados, e a
+        última versão lida.
+    """
+    sistema, raiz = sistema_arquivos(table_uri, storage_options)
+    arquivos = []
+    versao = versao_antiga
+    while True:
+        commit = f"{raiz}/_delta_log/{versao + 1:020d}.json"
+        try:
+            with sistema.open_input_stream(commit) as log_f:
+                linhas = log_f.read().decode("utf-8").splitlines()
+        except FileNotFoundError:
+            return arquivos, versao
+        for linha in linhas:
+            acao = json.loads(linha).get("add")
+            if acao is not None and acao.get("dataChange", True):
+                arquivos.append(f"{raiz}/{unquote(acao['path'])}")
+        versao += 1
+
+
+def le_arquivos_novos(
+    table_uri: str,
+    arquivos: list,
+    colunas: list,
+    storage_options: Optional[dict] = None,
+) -> list:
+    """Lê cada arquivo em um ``DataFrame`` (um por commit da Lambda)."""
+    sistema, _ = sistema_arquivos(table_uri, storage_options)
+    tabelas = []
+    for arquivo in arquivos:
+        dataset = ds.dataset(arquivo, format="parquet", filesystem=sistema)
+        presentes = [c for c in colunas if c in dataset.schema.names]
+        tabelas.append(dataset.to_table(columns=presentes).to_pandas())
+    return tabelas
+
+
+def le_incremental(
+    table_uri: str,
+    versao_antiga: Optional[int],
+    colunas: list,
+    storage_options: Optional[dict] = None,
+) -> tuple:
+    """Retorna os ``DataFrame``s gravados desde ``versao_antiga`` e a versão atual.
+
+    Na primeira execução (``versao_antiga`` nula) apenas a versão atual é
+    registrada: o histórico não é relido.
+    """
+    if versao_antiga is None:
+        sistema, raiz = sistema_arquivos(table_uri, storage_options)
+        return [], _ultima_versao(sistema, raiz)
+    arquivos, versao = arquivos_das_versoes(table_uri, versao_antiga, storage_options)
+    return le_arquivos_novos(table_uri, arquivos, colunas, storage_options), versao
+
+
+# -----------------------------------------------------------------------------
+# Estatísticas
+# -----------------------------------------------------------------------------
+
+
+def psi(referencia: np.ndarray, atual: np.ndarray, epsilon: float = 1e-6) -> float:
+    """Population Stability Index entre dois histogramas (contagens)."""
+    r = np.asarray(referencia, dtype=np.float64)
+    a = np.asarray(atual, dtype=np.float64)
+    if r.sum() == 0 or a.sum() == 0:
+        return 0.0
+    r = np.clip(r / r.sum(), epsilon, None)
+    a = np.clip(a / a.sum(), epsilon, None)
+    return float(np.sum((a - r) * np.log(a / r)))
+
+
+def casa_ordenado(
+    tempos_previstos: np.ndarray, tempos_observados: np.ndarray
+) -> np.ndarray:
+    """Índice da observação de cada previsão (``-1`` se ainda não chegou).
+
+    Merge ordenado: ``tempos_observados`` deve estar ordenado e sem repetições.
+    """
+    if not len(tempos_observados):
+        return np.full(len(tempos_previstos), -1)
+    posicoes = np.searchsorted(tempos_observados, tempos_previstos)
+    posicoes = np.minimum(posicoes, len(tempos_observados) - 1)
+    encontrados = tempos_observados[posicoes] == tempos_previstos
+    return np.where(encontrados, posicoes, -1)
+
+
+def _para_ns(tempos) -> np.ndarray:
+    return (
+        pd
+        .to_datetime(pd.Series(tempos), utc=True)
+        .dt.tz_localize(None)
+        .to_numpy(dtype="datetime64[ns]")
+        .astype(np.int64)
+    )
+
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Monitor de acurácia e drift
+# -----------------------------------------------------------------------------
+
+
+class MonitorModelo:
+    """Acompanha o erro por horizonte e o drift da entrada em tempo constante.
+
+    O estado é compacto e independe do tamanho do histórico:
+
+    - previsões ainda sem observação (no máximo ``VALIDADE_PENDENTES``);
+    - as ``N_OBSERVADOS_RECENTES`` observações mais novas (para previsões
+      que chegam depois da observação);
+    - médias móveis exponenciais de erro, erro absoluto e erro quadrático
+      por horizonte;
+    - histogramas da geração observada: a referência (congelada após
+      ``N_REFERENCIA`` observações) e o atual, com decaimento exponencial.
+
+    Attributes:
+        estado (dict): Estado serializável em JSON.
+    """
+
+    def __init__(self, estado: Optional[dict] = None, limites_bins=None) -> None:
+        if estado is None:
+            estado = {
+                "versoes": {"previsoes": None, "observados": None},
+                "pendentes": [],
+                "observados_recentes": [],
+                "erros": {},
+                "drift": {
+                    "limites": None if limites_bins is None else list(limites_bins),
+                    "referencia": None,
+                    "acumulado": None,
+                    "n_referencia": 0,
+                    "atual": None,
+                },
+            }
+        self.estado = estado
+
+    # -------------------------------------------------------------------------
+    # Atualizações
+    # -------------------------------------------------------------------------
+
+    def _atualiza_erros(self, horizontes: np.ndarray, erros: np.ndarray) -> None:
+        alfa = 1.0 / JANELA_EFETIVA
+        for horizonte, erro in zip(horizontes.tolist(), erros.tolist()):
+            chave = str(int(horizonte))
+            m = self.estado["erros"].setdefault(
+                chave, {"n": 0, "erro": 0.0, "erro_abs": 0.0, "erro_quad": 0.0}
+            )
+            # Nas primeiras observações a média é simples; depois, exponencial
+            peso = max(alfa, 1.0 / (m["n"] + 1))
+            m["erro"] += peso * (erro - m["erro"])
+            m["erro_abs"] += peso * (abs(erro) - m["erro_abs"])
+            m["erro_quad"] += peso * (erro**2 - m["erro_quad"])
+            m["n"] += 1
+
+    def _atualiza_drift(self, valores: np.ndarray) -> None:
+        drift = self.estado["drift"]
+        if drift["limites"] is None:
+            # Sem limites definidos, usa os decis do primeiro lote
+            drift["limites"] = np.unique(
+                np.quantile(valores, np.linspace(0, 1, 11))
+            ).tolist()
+        limites = np.asarray(drift["limites"])
+        # Bin 0: abaixo do primeiro limite; último bin: acima do último
+        bins = np.searchsorted(limites, valores, side="right")
+        n_bins = len(limites) + 1
+
+        if drift["referencia"] is None:
+            acumulado = np.zeros(n_bins)
+            if drift["acumulado"] is not None:
+                acumulado = np.asarray(drift["acumulado"])
+            faltam = N_REFERENCIA - drift["n_referencia"]
+            acumulado += np.bincount(bins[:faltam], minlength=n_bins)
+            drift["n_referencia"] += min(faltam, len(bins))
+            drift["acumulado"] = acumulado.tolist()
+            if drift["n_referencia"] >= N_REFERENCIA:
+                drift["referencia"] = drift["acumulado"]
+            bins = bins[faltam:]
+
+        # Histograma atual com decaimento exponencial por observação
+        atual = (
+            np.zeros(n_bins) if drift["atual"] is None else np.asarray(drift["atual"])
+        )
+        decaimento = 1.0 - 1.0 / JANELA_EFETIVA
+        pesos = decaimento ** np.arange(len(bins) - 1, -1, -1)
+        atual = atual * decaimento ** len(bins) + np.bincount(
+            bins, weights=pesos, minlength=n_bins
+        )
+        drift["atual"] = atual.tolist()
+
+    def processa(self, previsoes: list, observados: list) -> int:
+        """Casa as previsões e observações novas e atualiza as estatísticas.
+
+        Args:
+            previsoes (list): ``DataFrame``s novos do ``predicted_data`` (um
+                por commit), com ``interval_start_utc``, ``wind`` e
+                ``horizonte`` (ou a posição no commit, em tabelas antigas).
+            observados (list): ``DataFrame``s novos do ``energy_grid_api``.
+
+        Returns:
+            int: Número de previsões casadas neste lote.
+        """
+        # Previsões pendentes + novas, no formato (tempo em ns, horizonte, valor)
+        linhas = [np.asarray(self.estado["pendentes"], dtype=np.float64).reshape(-1, 3)]
+        for commit in previsoes:
+            if commit.empty:
+                continue
+            df = commit.sort_values("interval_start_utc")
+            if "horizonte" in df.columns:
+                horizontes = df["horizonte"].to_numpy(dtype=np.float64)
+            else:
+                # Commits anteriores à coluna: a posição no commit é o horizonte
+                horizontes = 5.0 * np.arange(1, len(df) + 1)
+            linhas.append(
+                np.column_stack([
+                    _para_ns(df["interval_start_utc"]),
+                    horizontes,
+                    df["wind"].to_numpy(np.float64),
+                ])
+            )
+        pendentes = np.concatenate(linhas)
+
+        # Observações recentes + novas, ordenadas e sem repetições
+        recentes = np.asarray(
+            self.estado["observados_recentes"], dtype=np.float64
+        ).reshape(-1, 2)
+        novos = [
+            np.column_stack([
+                _para_ns(df["interval_start_utc"]),
+                df["wind"].to_numpy(np.float64),
+            ])
+            for df in observados
+            if not df.empty
+        ]
+        obs = np.concatenate([recentes, *novos])
+        ordem = np.argsort(obs[:, 0], kind="stable")[::-1]
+        _, unicos = np.unique(obs[ordem, 0], return_index=True)
+        obs = obs[ordem[unicos]]
+
+        # O drift considera apenas as observações inéditas
+        if len(obs) > len(recentes):
+            inedito = ~np.isin(obs[:, 0], recentes[:, 0])
+            self._atualiza_drift(obs[inedito, 1])
+
+        indices = casa_ordenado(pendentes[:, 0], obs[:, 0])
+        casadas = indices >= 0
+        self._atualiza_erros(
+            pendentes[casadas, 1], obs[indices[casadas], 1] - pendentes[casadas, 2]
+        )
+
+        # Estado compacto para o próximo lote
+        if len(obs):
+            limite = obs[-1, 0] - VALIDADE_PENDENTES.value
+            restantes = pendentes[~casadas]
+            self.estado["pendentes"] = restantes[restantes[:, 0] >= limite].tolist()
+        else:
+            self.estado["pendentes"] = pendentes.tolist()
+        self.estado["observados_recentes"] = obs[-N_OBSERVADOS_RECENTES:].tolist()
+        return int(casadas.sum())
+
+    # -------------------------------------------------------------------------
+    # Métricas
+    # -------------------------------------------------------------------------
+
+    def psi_atual(self) -> Optional[float]:
+        drift = self.estado["drift"]
+        if drift["referencia"] is None or drift["atual"] is None:
+            return None
+        return psi(drift["referencia"], drift["atual"])
+
+    def metricas(
+        self,
+        limite_rmse: float = LIMITE_RMSE,
+        limite_psi: float = LIMITE_PSI,
+        min_amostras: int = MIN_AMOSTRAS,
+    ) -> pd.DataFrame:
+        """Uma linha por horizonte com viés, MAE, RMSE, PSI e o alerta de retreino."""
+        valor_psi = self.psi_atual()
+        linhas = []
+        for chave, m in sorted(
+            self.estado["erros"].items(), key=lambda item: int(item[0])
+        ):
+            rmse = float(np.sqrt(m["erro_quad"]))
+            alerta_rmse = m["n"] >= min_amostras and rmse > limite_rmse
+            alerta_psi = valor_psi is not None and valor_psi > limite_psi
+            linhas.append({
+                "horizonte": int(chave),
+                "n": m["n"],
+                "vies": m["erro"],
+                "mae": m["erro_abs"],
+                "rmse": rmse,
+                "psi": np.nan if valor_psi is None else valor_psi,
+                "retreinar": bool(alerta_rmse or alerta_psi),
+            })
+        return pd.DataFrame(
+            linhas,
+            columns=["horizonte", "n", "vies", "mae", "rmse", "psi", "retreinar"],
+        )
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+
+def carrega_estado(
+    metricas_uri: str, storage_options: Optional[dict] = None
+) -> Optional[dict]:
+    sistema, raiz = sistema_arquivos(metricas_uri, storage_options)
+    try:
+        with sistema.open_input_stream(f"{raiz}/{NOME_ESTADO}") as estado_f:
+            return json.loads(estado_f.read().decode("utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def salva_estado(
+    metricas_uri: str, estado: dict, storage_options: Optional[dict] = None
+) -> None:
+    sistema, raiz = sistema_arquivos(metricas_uri, storage_options)
+    sistema.create_dir(raiz, recursive=True)
+    with sistema.open_output_stream(f"{raiz}/{NOME_ESTADO}") as estado_f:
+        estado_f.write(json.dumps(estado).encode("utf-8"))
+
+
+def executa_monitor(
+    previsoes_uri: str,
+    observados_uri: str,
+    metricas_uri: str,
+    *,
+    storage_options: Optional[dict] = None,
+    limites_bins=None,
+    dispara_retreino: Optional[Callable[[pd.DataFrame], None]] = None,
+    **limites,
+) -> pd.DataFrame:
+    """Processa as versões novas das duas tabelas e grava as métricas.
+
+    Args:
+        previsoes_uri (str): Tabela ``predicted_data``.
+        observados_uri (str): Tabela ``energy_grid_api``.
+        metricas_uri (str): Tabela Delta de métricas (o estado do monitor
+            fica em ``_estado_monitor.json`` dentro dela).
+        storage_options (Optional[dict]): Opções de acesso ao storage.
+        limites_bins: Limites dos bins do histograma de drift (ex.: a faixa do
+            scaler do treino); padrão, os decis do primeiro lote.
+        dispara_retreino (Optional[Callable]): Chamado com as métricas quando
+            algum limite é ultrapassado.
+        **limites: ``limite_rmse``, ``limite_psi`` e ``min_amostras``.
+
+    Returns:
+        pd.DataFrame: As métricas deste lote.
+    """
+    monitor = MonitorModelo(carrega_estado(metricas_uri, storage_options), limites_bins)
+    versoes = monitor.estado["versoes"]
+
+    previsoes, versoes["previsoes"] = le_incremental(
+        previsoes_uri,
+        versoes["previsoes"],
+        ["interval_start_utc", "wind", "horizonte"],
+        storage_options,
+    )
+    observados, versoes["observados"] = le_incremental(
+        observados_uri,
+        versoes["observados"],
+        ["interval_start_utc", "wind"],
+        storage_options,
+    )
+    casadas = monitor.processa(previsoes, observados)
+
+    metricas = monitor.metricas(**limites)
+    if casadas:
+        metricas.insert(0, "calculado_em", pd.Timestamp.now(tz="UTC"))
+        write_deltalake(
+            metricas_uri,
+            metricas,
+            description="Métricas de acurácia e drift das previsões.",
+            mode="append",
+            storage_options=storage_options,
+        )
+        if dispara_retreino is not None and metricas["retreinar"].any():
+            dispara_retreino(metricas)
+
+    salva_estado(metricas_uri, monitor.estado, storage_options)
+    return metricas
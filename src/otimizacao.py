@@ -0,0 +1,335 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import json
+import multiprocessing as mp
+import os
+from pathlib import Path
+from typing import Optional
+
+import lightgbm as lgb
+import numpy as np
+import optuna
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Parâmetros fixos em todas as tentativas
+PARAMS_FIXOS = {
+    "objective": "regression",
+    "metric": "rmse",
+    "max_bin": 255,
+    "verbosity": -1,
+}
+
+# Rodadas máximas de boosting e paciência do early stopping
+NUM_BOOST_ROUND = 2_000
+EARLY_STOPPING_ROUNDS = 50
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Matrizes de treino em disco (memory-mapped)
+# -----------------------------------------------------------------------------
+
+
+def salva_memmap(X: np.ndarray, y: np.ndarray, dir_saida: Path) -> None:
+    """Grava ``X`` e ``y`` em ``.npy`` para serem abertos via memory-map.
+
+    Args:
+        X (np.ndarray): Matriz de features, em ordem temporal.
+        y (np.ndarray): Vetor alvo.
+        dir_saida (Path): Diretório onde os arquivos serão gravados.
+    """
+    dir_saida = Path(dir_saida)
+    dir_saida.mkdir(parents=True, exist_ok=True)
+    np.save(dir_saida / "X.npy", np.ascontiguousarray(X))
+    np.save(dir_saida / "y.npy", np.ascontiguousarray(y))
+
+
+def carrega_memmap(dir_dados: Path) -> tuple:
+    """Abre ``X`` e ``y`` em modo somente leitura, sem copiá-los para a memória.
+
+    Todos os processos que abrem os mesmos arquivos compartilham as páginas
+    do cache do sistema operacional.
+
+    Args:
+        dir_dados (Path): Diretório com ``X.npy`` e ``y.npy``.
+
+    Returns:
+        tuple: ``X`` e ``y`` como ``np.memmap``.
+    """
+    dir_dados = Path(dir_dados)
+    X = np.load(dir_dados / "X.npy", mmap_mode="r")
+    y = np.load(dir_dados / "y.npy", mmap_mode="r")
+    return X, y
+
+
+# -----------------------------------------------------------------------------
+# Validação cruzada temporal
+# -----------------------------------------------------------------------------
+
+
+def folds_temporais(
+    n_linhas: int,
+    n_folds: int = 4,
+    tamanho_validacao: Optional[int] = None,
+    max_linhas_treino: Optional[int] = None,
+    gap: int = 6,
+) -> list:
+    """Divide a série em folds ordenados no tempo (janela de treino crescente).
+
+    Cada fold treina em um trecho contíguo anterior ao trecho de validação,
+    separados por ``gap`` linhas para que janelas de treino não se sobreponham
+    aos alvos da validação. Com ``max_linhas_treino`` a janela de treino
+    passa a deslizar, limitando o custo de cada tentativa.
+
+    Args:
+        n_linhas (int): Número de linhas da série.
+        n_folds (int): Número de folds.
+        tamanho_validacao (Optional[int]): Linhas por validação. Se ``None``,
+            ``n_linhas // (n_folds + 1)``.
+        max_linhas_treino (Optional[int]): Limite de linhas de treino por fold.
+        gap (int): Linhas descartadas entre treino e validação.
+
+    Returns:
+        list: Pares ``(slice_treino, slice_validacao)``.
+    """
+    if tamanho_validacao is None:
+        tamanho_validacao = n_linhas // (n_folds + 1)
+
+    folds = []
+    for i in range(n_folds):
+        fim_validacao = n_linhas - (n_folds - 1 - i) * tamanho_validacao
+        inicio_validacao = fim_validacao - tamanho_validacao
+        fim_treino = inicio_validacao - gap
+        inicio_treino = (
+            0 if max_linhas_treino is None else max(0, fim_treino - max_linhas_treino)
+        )
+        if fim_treino <= inicio_treino:
+            raise ValueError("Dados insuficientes para o número de folds pedido.")
+        folds.append(
+            (slice(inicio_treino, fim_treino), slice(inicio_validacao, fim_validacao))
+        )
+    return folds
+
+
+def constroi_datasets(X: np.ndarray, y: np.ndarray, folds: list) -> list:
+    """Constrói (uma única vez) os ``lgb.Dataset`` binarizados de cada fold.
+
+    As fatias de ``X``/``y`` são visões do memory-map; o LightGBM lê as linhas
+    diretamente delas ao binarizar, e os datasets são reutilizados por todas
+    as tentativas do processo.
+    """
+    datasets = []
+    for treino, validacao in folds:
+        d_treino = lgb.Dataset(
+            X[treino],
+            label=y[treino],
+            params={
+                "max_bin": PARAMS_FIXOS["max_bin"],
+                "feature_pre_filter": False,
+                "verbosity": -1,
+            },
+            free_raw_data=True,
+        ).construct()
+        d_validacao = lgb.Dataset(
+            X[validacao], label=y[validacao], reference=d_treino, free_raw_data=True
+        ).construct()
+        datasets.append((d_treino, d_validacao))
+    return datasets
+
+
+# -----------------------------------------------------------------------------
+# Espaço de busca e objetivo
+# -----------------------------------------------------------------------------
+
+
+def sugere_parametros(trial: optuna.Trial) -> dict:
+    """Espaço de busca dos hiperparâmetros do LightGBM."""
+    return {
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "num_leaves": trial.suggest_int("num_leaves", 15, 255, log=True),
+        "max_depth": trial.suggest_int("max_depth", -1, 16),
+        "min_child_samples": trial.suggest_int(
+            "min_child_samples", 5, 500, log=True
+        ),
+        "feature_fraction": trial.suggest_float("feature_fraction", 0.5, 1.0),
+        "bagging_fraction": trial.suggest_float("bagging_fraction", 0.5, 1.0),
+        "bagging_freq": trial.suggest_int("bagging_freq", 0, 5),
+        "lambda_l1": trial.suggest_float("lambda_l1", 1e-8, 10.0, log=True),
+        "lambda_l2": trial.suggest_float("lambda_l2", 1e-8, 10.0, log=True),
+    }
+
+
+def cria_objetivo(datasets: list, num_threads: int):
+    """Cria a função objetivo: RMSE médio nos folds com early stopping.
+
+    Após cada fold, a média parcial é reportada ao Optuna (o fold é o
+    "recurso" do ``SuccessiveHalvingPruner``) e a tentativa é interrompida
+    se não estiver entre as melhores.
+    """
+
+    def objetivo(trial: optuna.Trial) -> float:
+        params = {**PARAMS_FIXOS, **sugere_parametros(trial)}
+        params["num_threads"] = num_threads
+
+        erros, iteracoes = [], []
+        for passo, (d_treino, d_validacao) in enumerate(datasets):
+            booster = lgb.train(
+                params,
+                d_treino,
+                num_boost_round=NUM_BOOST_ROUND,
+                valid_sets=[d_validacao],
+                callbacks=[
+                    lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)
+                ],
+            )
+            erros.append(booster.best_score["valid_0"]["rmse"])
+            iteracoes.append(booster.best_iteration)
+
+            trial.report(float(np.mean(erros)), step=passo)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+
+        trial.set_user_attr("num_boost_round", int(np.mean(iteracoes)))
+        return float(np.mean(erros))
+
+    return objetivo
+
+
+# -----------------------------------------------------------------------------
+# Execução em paralelo
+# -----------------------------------------------------------------------------
+
+
+def cria_estudo(nome: str, storage: str) -> optuna.Study:
+    """Cria (ou retoma) o estudo persistido em ``storage``."""
+    return optuna.create_study(
+        study_name=nome,
+        storage=storage,
+        direction="minimize",
+        load_if_exists=True,
+        sampler=optuna.samplers.TPESampler(multivariate=True),
+        pruner=optuna.pruners.SuccessiveHalvingPruner(min_resource=1),
+    )
+
+
+def _worker(
+    nome: str,
+    storage: str,
+    dir_dados: str,
+    folds: list,
+    num_threads: int,
+    **kwargs_optimize,
+) -> None:
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    X, y = carrega_memmap(Path(dir_dados))
+    datasets = constroi_datasets(X, y, folds)
+    estudo = optuna.load_study(study_name=nome, storage=storage)
+    estudo.optimize(
+        cria_objetivo(datasets, num_threads), gc_after_trial=True, **kwargs_optimize
+    )
+
+
+def otimiza(
+    dir_dados: Path,
+    nome_estudo: str,
+    storage: str,
+    *,
+    n_trials: int = 100,
+    timeout: Optional[float] = 3_600,
+    n_workers: Optional[int] = None,
+    **kwargs_folds,
+) -> optuna.Study:
+    """Busca os hiperparâmetros do LightGBM em paralelo, com tempo limitado.
+
+    Cada worker é um processo que abre os mesmos arquivos memory-mapped,
+    constrói os datasets dos folds uma vez e avalia tentativas do mesmo
+    estudo persistido; os núcleos da máquina são divididos entre os workers.
+    Rodar novamente com o mesmo ``nome_estudo``/``storage`` retoma a busca.
+
+    Args:
+        dir_dados (Path): Diretório com ``X.npy`` e ``y.npy`` (ordem temporal).
+        nome_estudo (str): Nome do estudo no storage.
+        storage (str): URL do storage do Optuna (ex.: ``sqlite:///...``).
+        n_trials (int): Total de tentativas desta execução.
+        timeout (Optional[float]): Tempo máximo, em segundos, por worker.
+        n_workers (Optional[int]): Número de processos. Padrão: até 4.
+        **kwargs_folds: Parâmetros repassados para ``folds_temporais``.
+
+    Returns:
+        optuna.Study: O estudo com todas as tentativas.
+
+    Raises:
+        RuntimeError: Se algum worker terminar com erro.
+    """
+    n_cpus = os.cpu_count() or 1
+    n_workers = n_workers or min(4, n_cpus)
+    num_threads = max(1, n_cpus // n_workers)
+
+    estudo = cria_estudo(nome_estudo, storage)
+    _, y = carrega_memmap(dir_dados)
+    folds = folds_temporais(len(y), **kwargs_folds)
+
+    trials_por_worker = [
+        n_trials // n_workers + (i < n_trials % n_workers) for i in range(n_workers)
+    ]
+    contexto = mp.get_context("spawn")
+    processos = [
+        contexto.Process(
+            target=_worker,
+            args=(nome_estudo, storage, str(dir_dados), folds, num_threads),
+            kwargs={"n_trials": n, "timeout": timeout},
+        )
+        for n in trials_por_worker
+        if n > 0
+    ]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join()
+
+    # Um worker que morre (import, memória, lock do SQLite) não levanta erro
+    # no processo pai: sem esta checagem o estudo voltaria com menos tentativas
+    falhas = [
+        f"worker {i} (exitcode {processo.exitcode})"
+        for i, processo in enumerate(processos)
+        if processo.exitcode != 0
+    ]
+    if falhas:
+        raise RuntimeError(
+            f"{len(falhas)} de {len(processos)} workers falharam: "
+            f"{', '.join(falhas)}. As tentativas concluídas estão salvas em "
+            f"'{storage}' e a busca pode ser retomada."
+        )
+
+    return estudo
+
+
+# -----------------------------------------------------------------------------
+# Modelo final
+# -----------------------------------------------------------------------------
+
+
+def melhores_parametros(estudo: optuna.Study) -> dict:
+    """Parâmetros do ``LGBMRegressor`` correspondentes à melhor tentativa."""
+    melhor = estudo.best_trial
+    params = {
+        chave: valor
+        for chave, valor in {**PARAMS_FIXOS, **melhor.params}.items()
+        if chave not in {"metric", "verbosity"}
+    }
+    params["n_estimators"] = melhor.user_attrs.get("num_boost_round", 100)
+    params["verbose"] = -1
+    return params
+
+
+def salva_parametros(params: dict, caminho: Path) -> None:
+    """Grava os parâmetros escolhidos em JSON."""
+    with open(caminho, "w", encoding="utf-8") as json_f:
+        json.dump(params, json_f, indent=4)
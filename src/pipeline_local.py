@@ -0,0 +1,362 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import cProfile
+import importlib.util
+import os
+import sys
+import time
+import types
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+import joblib
+import pandas as pd
+
+from src.cache_derivados import CacheDerivados
+from src.catalogo import Catalogo, catalogo, usa_catalogo
+from src.esquema import escreve_energy_grid
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Lambdas na ordem em que o pipeline as executa
+LAMBDAS = ("get_data_delta", "predict_data_delta", "glue_data_delta")
+
+# Variáveis de ambiente esperadas pelas Lambdas (os buckets vêm do catálogo)
+AMBIENTE_LAMBDAS = {"GRIDSTATUS_API_KEY": "local"}
+
+# Camadas do catálogo, todas apontadas para o mesmo lake local
+CAMADAS = ("bronze", "silver", "gold")
+
+# Objetos do bucket de modelos e seus equivalentes em `ml_models`
+MODELOS_LOCAIS = {
+    "models/regression_model.joblib": "lgbm.joblib",
+    "models/min_max_scaler.joblib": "min_max_scaler.joblib",
+    "models/quantile_model.joblib": "lgbm_quantis.joblib",
+}
+
+# Intervalo entre execuções do `getDataDeltaSchedule`
+INTERVALO_AGENDAMENTO = pd.Timedelta(minutes=30)
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Relógio simulado
+# -----------------------------------------------------------------------------
+
+
+class RelogioSimulado:
+    """Relógio que parte de ``inicio`` e anda ``aceleracao`` vezes mais rápido.
+
+    Com ``aceleracao=0`` o tempo só avança com ``avanca`` (execução em
+    sequência, sem esperas).
+    """
+
+    def __init__(self, inicio: pd.Timestamp, aceleracao: float = 0.0) -> None:
+        self.inicio = pd.Timestamp(inicio).tz_convert("UTC")
+        self.aceleracao = aceleracao
+        self._deslocamento = pd.Timedelta(0)
+        self._t0 = time.monotonic()
+
+    def agora(self) -> pd.Timestamp:
+        decorrido = (time.monotonic() - self._t0) * self.aceleracao
+        return self.inicio + self._deslocamento + pd.Timedelta(seconds=decorrido)
+
+    def avanca(self, delta: pd.Timedelta) -> None:
+        self._deslocamento += delta
+
+    def espera_ate(self, instante: pd.Timestamp) -> None:
+        """Dorme o tempo real equivalente até o relógio chegar a ``instante``."""
+        falta = (instante - self.agora()).total_seconds()
+        if falta <= 0:
+            return
+        if self.aceleracao > 0:
+            time.sleep(falta / self.aceleracao)
+        else:
+            self.avanca(instante - self.agora())
+
+    def classe_datetime(self) -> type:
+        """Subclasse de ``datetime`` cujo ``now`` segue este relógio."""
+        relogio = self
+
+        class DatetimeSimulado(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                agora = relogio.agora().to_pydatetime()
+                return agora.astimezone(tz) if tz else agora.replace(tzinfo=None)
+
+        return DatetimeSimulado
+
+
+# -----------------------------------------------------------------------------
+# GridStatus reproduzido a partir de `data/raw`
+# -----------------------------------------------------------------------------
+
+
+class GridStatusReplay:
+    """Substituto do ``GridStatusClient`` que responde com os CSVs de ``data/raw``.
+
+    Os arquivos são lidos uma única vez; ``get_dataset`` devolve as linhas
+    cujo início está em ``[start, end)``, como a API do GridStatus.
+    """
+
+    def __init__(self, dir_raw: Path) -> None:
+        arquivos = sorted(Path(dir_raw).glob("*.csv"))
+        if not arquivos:
+            raise FileNotFoundError(f"Nenhum CSV encontrado em '{dir_raw}'")
+        dados = pd.concat(
+            [pd.read_csv(arquivo, sep="\t", encoding="utf-8") for arquivo in arquivos],
+            ignore_index=True,
+        )
+        dados.insert(
+            0,
+            "interval_start_utc",
+            pd.to_datetime(dados["interval_start_local"], utc=True),
+        )
+        dados.insert(
+            1, "interval_end_utc", pd.to_datetime(dados["interval_end_local"], utc=True)
+        )
+        dados = dados.drop(columns=["interval_start_local", "interval_end_local"])
+        self.dados = dados.sort_values("interval_start_utc").reset_index(drop=True)
+
+    def __call__(self, api_key: Optional[str] = None) -> "GridStatusReplay":
+        # Usado no lugar da classe: `GridStatusClient(api_key=...)`
+        return self
+
+    def get_dataset(
+        self,
+        dataset: str,
+        start: str,
+        end: str,
+        tz: str = "UTC",
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        inicio, fim = pd.Timestamp(start), pd.Timestamp(end)
+        inicio = inicio.tz_localize(tz) if inicio.tzinfo is None else inicio
+        fim = fim.tz_localize(tz) if fim.tzinfo is None else fim
+        tempos = self.dados["interval_start_utc"]
+        i, j = tempos.searchsorted(inicio), tempos.searchsorted(fim)
+        resultado = self.dados.iloc[i:j]
+        if limit is not None:
+            resultado = resultado.head(limit)
+        return resultado.reset_index(drop=True)
+
+
+# -----------------------------------------------------------------------------
+# Lake em disco no lugar do S3
+# -----------------------------------------------------------------------------
+
+
+class LakeLocal:
+    """Mapeia ``s3://<bucket>/<chave>`` para ``<dir_lake>/<chave>``.
+
+    As tabelas Delta já chegam ao lake pelo catálogo (todas as camadas com
+    raiz em ``dir_lake``); aqui ficam só os acessos via boto3 das Lambdas,
+    cujo bucket é descartado para manter o mesmo layout.
+    """
+
+    def __init__(self, dir_lake: Path, dir_models: Path) -> None:
+        self.dir_lake = Path(dir_lake)
+        self.dir_models = Path(dir_models)
+        self.dir_lake.mkdir(parents=True, exist_ok=True)
+
+    def caminho(self, uri: str) -> str:
+        if "://" not in uri:
+            return str(self.dir_lake / uri)
+        return str(self.dir_lake / urlparse(uri).path.strip("/"))
+
+    # Substitutos das funções de IO das Lambdas -------------------------------
+
+    def save_on_s3(self, bucket: str, s3_file_path: str, data_buffer: BytesIO) -> None:
+        destino = Path(self.caminho(s3_file_path))
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        data_buffer.seek(0)
+        # Escrita atômica: a API nunca lê um arquivo parcial
+        temporario = destino.with_suffix(".tmp")
+        temporario.write_bytes(data_buffer.read())
+        os.replace(temporario, destino)
+
+    def s3_file_exists(self, bucket: str, file_key: str) -> bool:
+        return Path(self.caminho(file_key)).exists()
+
+    def load_parquet_from_s3(self, object_key: str) -> pd.DataFrame:
+        return pd.read_parquet(self.caminho(object_key))
+
+    def load_joblib_from_s3(self, object_key: str):
+        return joblib.load(self.dir_models / MODELOS_LOCAIS[object_key])
+
+    def get_s3_latest_parquet(self) -> str:
+        arquivos = [
+            arquivo
+            for arquivo in (self.dir_lake / "energy_grid_api").rglob("*.parquet")
+            if "_delta_log" not in arquivo.parts
+        ]
+        mais_recente = max(arquivos, key=lambda arquivo: arquivo.stat().st_mtime_ns)
+        return str(mais_recente.relative_to(self.dir_lake))
+
+
+# -----------------------------------------------------------------------------
+# Orquestrador
+# -----------------------------------------------------------------------------
+
+
+class PipelineLocal:
+    """Executa ingestão → predição → agregação localmente, sem AWS.
+
+    O catálogo passa a apontar todas as camadas para o lake local e cada
+    Lambda é carregada com ``importlib`` como um módulo independente, com as
+    funções de IO via boto3, o relógio e o cliente do GridStatus substituídos
+    pelos equivalentes locais. O código dos handlers é o mesmo do deploy.
+
+    ``fecha`` (ou o fim de um bloco ``with``) desfaz as trocas feitas fora do
+    pipeline: o catálogo, as variáveis de ambiente e o ``gridstatusio`` de
+    substituição voltam ao que eram, assim como os atributos trocados nas
+    Lambdas.
+
+    Attributes:
+        lake (LakeLocal): Lake em disco.
+        relogio (RelogioSimulado): Relógio usado pelos handlers.
+        grid_client (GridStatusReplay): Fonte dos dados "ao vivo".
+        tempos (list): Duração de cada handler em cada execução.
+    """
+
+    def __init__(
+        self,
+        dir_projeto: Path,
+        inicio: pd.Timestamp,
+        aceleracao: float = 0.0,
+        dir_lake: Optional[Path] = None,
+    ) -> None:
+        dir_projeto = Path(dir_projeto)
+        self._ambiente_anterior = {
+            nome: os.environ.get(nome) for nome in AMBIENTE_LAMBDAS
+        }
+        for nome, valor in AMBIENTE_LAMBDAS.items():
+            os.environ.setdefault(nome, valor)
+        self._modulos_substituidos = []
+        self._originais = []
+
+        self.dir_projeto = dir_projeto
+        self.lake = LakeLocal(
+            dir_lake or dir_projeto / "lake", dir_projeto / "ml_models"
+        )
+        # Antes de carregar as Lambdas, que consultam o catálogo ao importar
+        self._catalogo_anterior = usa_catalogo(
+            Catalogo(
+                raizes={camada: str(self.lake.dir_lake) for camada in CAMADAS},
+                storage_options={},
+            )
+        )
+        self.relogio = RelogioSimulado(inicio, aceleracao)
+        self.grid_client = GridStatusReplay(dir_projeto / "data/raw")
+        self.tempos = []
+        self.lambdas = {nome: self._carrega_lambda(nome) for nome in LAMBDAS}
+
+    def _carrega_lambda(self, nome: str) -> types.ModuleType:
+        path = self.dir_projeto / "lambda_functions" / nome / "lambda_function.py"
+        nome_modulo = f"lambda_local_{nome}"
+
+        # O gridstatusio só é necessário no deploy: localmente, o replay o substitui
+        if (
+            nome == "get_data_delta"
+            and importlib.util.find_spec("gridstatusio") is None
+        ):
+            sys.modules["gridstatusio"] = types.SimpleNamespace(
+                GridStatusClient=self.grid_client
+            )
+            self._modulos_substituidos.append("gridstatusio")
+
+        spec = importlib.util.spec_from_file_location(nome_modulo, path)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+
+        substitutos = {
+            "datetime": self.relogio.classe_datetime(),
+            "GridStatusClient": self.grid_client,
+            "save_on_s3": self.lake.save_on_s3,
+            "s3_file_exists": self.lake.s3_file_exists,
+            "load_parquet_from_s3": self.lake.load_parquet_from_s3,
+            "load_joblib_from_s3": self.lake.load_joblib_from_s3,
+            "get_s3_latest_parquet": self.lake.get_s3_latest_parquet,
+            "cache": CacheDerivados(self.lake.dir_lake / "_cache_derivados"),
+        }
+        for atributo, substituto in substitutos.items():
+            if hasattr(modulo, atributo):
+                self._originais.append((modulo, atributo, getattr(modulo, atributo)))
+                setattr(modulo, atributo, substituto)
+        return modulo
+
+    def fecha(self) -> None:
+        """Desfaz as substituições feitas para executar as Lambdas localmente."""
+        for modulo, atributo, original in reversed(self._originais):
+            setattr(modulo, atributo, original)
+        self._originais.clear()
+        for nome in self._modulos_substituidos:
+            sys.modules.pop(nome, None)
+        self._modulos_substituidos.clear()
+        usa_catalogo(self._catalogo_anterior)
+        for nome, valor in self._ambiente_anterior.items():
+            if valor is None:
+                os.environ.pop(nome, None)
+            else:
+                os.environ[nome] = valor
+
+    def __enter__(self) -> "PipelineLocal":
+        return self
+
+    def __exit__(self, *excecao) -> None:
+        self.fecha()
+
+    def semeia_historico(self, duracao: pd.Timedelta) -> None:
+        """Grava no ``energy_grid_api`` o histórico anterior ao início simulado.
+
+        O histórico termina onde começa a meia-hora buscada pela primeira
+        execução, para não haver linhas repetidas.
+        """
+        fim = self.relogio.agora().floor(INTERVALO_AGENDAMENTO) - INTERVALO_AGENDAMENTO
+        dados = self.grid_client.get_dataset(
+            "caiso_fuel_mix", start=str(fim - duracao), end=str(fim), tz="UTC"
+        )
+        escreve_energy_grid(catalogo().uri("energy_grid_api"), dados, mode="append")
+
+    def executa_uma_vez(self, perfil: Optional[cProfile.Profile] = None) -> dict:
+        """Executa as três Lambdas em sequência e retorna a duração de cada uma."""
+        duracoes = {"instante": self.relogio.agora()}
+        for nome, modulo in self.lambdas.items():
+            inicio = time.perf_counter()
+            if perfil is not None:
+                perfil.runcall(modulo.handler, {}, None)
+            else:
+                modulo.handler({}, None)
+            duracoes[nome] = time.perf_counter() - inicio
+        self.tempos.append(duracoes)
+        return duracoes
+
+    def executa(
+        self,
+        n_execucoes: int,
+        intervalo: pd.Timedelta = INTERVALO_AGENDAMENTO,
+        perfil: Optional[cProfile.Profile] = None,
+    ) -> pd.DataFrame:
+        """Executa o pipeline ``n_execucoes`` vezes, a cada ``intervalo`` simulado.
+
+        Sem aceleração, o relógio salta direto para a próxima execução; com
+        aceleração, o orquestrador espera o tempo real equivalente.
+
+        Returns:
+            pd.DataFrame: Duração (segundos) de cada handler por execução.
+        """
+        proxima = self.relogio.agora().ceil(intervalo)
+        for _ in range(n_execucoes):
+            self.relogio.espera_ate(proxima)
+            self.executa_uma_vez(perfil)
+            proxima += intervalo
+        return pd.DataFrame(self.tempos)
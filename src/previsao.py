@@ -0,0 +1,126 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+
+from src.features import INTERVALO, features_proximo_intervalo, historico_necessario
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Previsão recursiva de uma janela
+# -----------------------------------------------------------------------------
+
+
+def previsao_recursiva(janela_escalada: np.ndarray, passos: int, modelo) -> np.ndarray:
+    """Prevê ``passos`` pontos à frente realimentando a janela com as predições.
+
+    A janela desliza sobre um único buffer pré-alocado, evitando concatenações
+    e idas e voltas pelo scaler a cada passo. Os valores permanecem na escala
+    do modelo; a transformação inversa deve ser feita uma única vez ao final.
+
+    Args:
+        janela_escalada (np.ndarray): Últimas observações já escalonadas.
+        passos (int): Número de pontos a prever.
+        modelo: Objeto com ``predict_linha`` (ex.: ``EnsembleCompilado``).
+
+    Returns:
+        np.ndarray: Vetor ``(passos,)`` com as predições escalonadas.
+    """
+    janela = np.asarray(janela_escalada, dtype=np.float64).ravel()
+    tamanho_janela = janela.size
+
+    buffer = np.empty(tamanho_janela + passos)
+    buffer[:tamanho_janela] = janela
+
+    for i in range(passos):
+        buffer[tamanho_janela + i] = modelo.predict_linha(
+            buffer[i : i + tamanho_janela]
+        )
+
+    return buffer[tamanho_janela:]
+
+
+# -----------------------------------------------------------------------------
+# Previsão recursiva de várias janelas (backtesting)
+# -----------------------------------------------------------------------------
+
+
+def previsao_recursiva_lote(
+    janelas_escaladas: np.ndarray, passos: int, modelo
+) -> np.ndarray:
+    """Versão em lote de ``previsao_recursiva``: todas as janelas avançam juntas.
+
+    Args:
+        janelas_escaladas (np.ndarray): Matriz ``(n_janelas, tamanho_janela)``.
+        passos (int): Número de pontos a prever por janela.
+        modelo: Objeto com ``predict`` em lote (ex.: ``EnsembleCompilado``).
+
+    Returns:
+        np.ndarray: Matriz ``(n_janelas, passos)`` com as predições escalonadas.
+    """
+    janelas = np.asarray(janelas_escaladas, dtype=np.float64)
+    n_janelas, tamanho_janela = janelas.shape
+
+    buffer = np.empty((n_janelas, tamanho_janela + passos))
+    buffer[:, :tamanho_janela] = janelas
+
+    for i in range(passos):
+        buffer[:, tamanho_janela + i] = modelo.predict(
+            buffer[:, i : i + tamanho_janela]
+        )
+
+    return buffer[:, tamanho_janela:]
+
+
+# -----------------------------------------------------------------------------
+# Previsão recursiva com features adicionais
+# -----------------------------------------------------------------------------
+
+
+def previsao_recursiva_features(
+    historico: pd.DataFrame,
+    passos: int,
+    modelo,
+    coluna_tempo: str = "interval_start_utc",
+    coluna_alvo: str = "wind",
+    **kwargs,
+) -> np.ndarray:
+    """Previsão recursiva para modelos treinados com ``src.features``.
+
+    A cada passo a linha de features do próximo intervalo é gerada pelo mesmo
+    código do treino; a predição entra no histórico como novo valor do alvo
+    e as demais fontes repetem a última observação.
+
+    Args:
+        historico (pd.DataFrame): Últimas observações ordenadas pelo tempo.
+        passos (int): Número de pontos a prever.
+        modelo: Objeto com ``predict_linha`` (ex.: ``EnsembleCompilado``).
+        coluna_tempo (str): Coluna com o início do intervalo.
+        coluna_alvo (str): Fonte de energia prevista.
+        **kwargs: Parâmetros repassados para ``calcula_features``.
+
+    Returns:
+        np.ndarray: Vetor ``(passos,)`` com as predições, na escala original.
+    """
+    kwargs["coluna_alvo"] = coluna_alvo
+    tamanho = historico_necessario(**kwargs)
+    df = historico.tail(tamanho).reset_index(drop=True)
+    df[coluna_tempo] = pd.to_datetime(df[coluna_tempo])
+    df[coluna_alvo] = df[coluna_alvo].astype(np.float64)
+
+    previsoes = np.empty(passos)
+    for i in range(passos):
+        x = features_proximo_intervalo(df, coluna_tempo=coluna_tempo, **kwargs)
+        previsoes[i] = modelo.predict_linha(x[0])
+
+        nova_linha = df.iloc[[-1]].copy()
+        nova_linha[coluna_tempo] += INTERVALO
+        nova_linha[coluna_alvo] = previsoes[i]
+        df = pd.concat([df.iloc[1:], nova_linha], ignore_index=True)
+
+    return previsoes
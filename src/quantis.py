@@ -0,0 +1,213 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+from typing import Optional
+
+import lightgbm as lgb
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.arvore_compilada import EnsembleCompilado
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Quantis previstos (P10, P50 e P90)
+QUANTIS = (0.1, 0.5, 0.9)
+
+# Pontos de 5 minutos previstos diretamente (meia hora)
+PASSOS = 6
+
+# Parâmetros padrão de cada modelo de quantil
+PARAMS_PADRAO = {"learning_rate": 0.05, "verbosity": -1}
+NUM_BOOST_ROUND = 200
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Quantis de todos os horizontes em uma única travessia
+# -----------------------------------------------------------------------------
+
+
+class ModeloQuantis:
+    """Previsão probabilística direta: um LightGBM por quantil e horizonte.
+
+    Cada modelo prevê um quantil do ponto ``h`` passos à frente a partir da
+    mesma janela escalonada usada pelo modelo de 5 minutos. Todos são
+    combinados em um único ``EnsembleCompilado`` com uma saída por par
+    (quantil, horizonte), de modo que uma única chamada a ``predict`` produz
+    todos os quantis de todos os horizontes, sem recursão.
+
+    Attributes:
+        ensemble (EnsembleCompilado): Ensemble combinado, saídas na ordem
+            ``quantil × horizonte``.
+        quantis (tuple): Quantis previstos, em ordem crescente.
+        passos (int): Horizontes previstos (1 a ``passos``).
+    """
+
+    def __init__(
+        self,
+        ensemble: EnsembleCompilado,
+        quantis: tuple = QUANTIS,
+        passos: int = PASSOS,
+    ) -> None:
+        if ensemble.n_saidas != len(quantis) * passos:
+            raise ValueError(
+                f"Esperadas {len(quantis) * passos} saídas, o ensemble tem "
+                f"{ensemble.n_saidas}."
+            )
+        self.ensemble = ensemble
+        self.quantis = tuple(quantis)
+        self.passos = int(passos)
+
+    @property
+    def colunas(self) -> list:
+        """Nome das colunas de cada quantil (ex.: ``p10``, ``p50``, ``p90``)."""
+        return [f"p{round(100 * q):02d}" for q in self.quantis]
+
+    @classmethod
+    def de_boosters(cls, salvo: dict) -> "ModeloQuantis":
+        """Compila os modelos salvos por ``treina_quantis``.
+
+        Args:
+            salvo (dict): ``quantis``, ``passos`` e ``modelos`` (lista por
+                quantil com um ``lightgbm.Booster`` por horizonte).
+
+        Returns:
+            ModeloQuantis: O modelo pronto para avaliação.
+        """
+        ensembles = [
+            EnsembleCompilado.de_booster(modelo)
+            for modelos_quantil in salvo["modelos"]
+            for modelo in modelos_quantil
+        ]
+        return cls(
+            EnsembleCompilado.combina(ensembles), salvo["quantis"], salvo["passos"]
+        )
+
+    def preve(self, janelas: np.ndarray) -> np.ndarray:
+        """Quantis de todos os horizontes para um lote de janelas.
+
+        Os quantis são ordenados em cada horizonte, para que as faixas nunca
+        se cruzem.
+
+        Args:
+            janelas (np.ndarray): Matriz ``(n_janelas, tamanho_janela)`` ou
+                uma única janela, já escalonadas.
+
+        Returns:
+            np.ndarray: Matriz ``(n_janelas, n_quantis, passos)`` na escala do
+                modelo.
+        """
+        janelas = np.asarray(janelas, dtype=np.float64)
+        if janelas.ndim == 1:
+            janelas = janelas.reshape(1, -1)
+        if janelas.shape[0] == 1:
+            saidas = self.ensemble.predict_linha(janelas[0])
+        else:
+            saidas = self.ensemble.predict(janelas)
+        saidas = saidas.reshape(janelas.shape[0], len(self.quantis), self.passos)
+        return np.sort(saidas, axis=1)
+
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Alvos de vários horizontes sobre as mesmas janelas
+# -----------------------------------------------------------------------------
+
+
+def alvos_multi_horizonte(X: np.ndarray, y: np.ndarray, passos: int = PASSOS) -> tuple:
+    """Alvos dos ``passos`` pontos seguintes a cada janela.
+
+    Reaproveita as janelas de ``janelas_deslizantes``: como ``y[i]`` é o ponto
+    seguinte à janela ``i``, o ponto ``h`` passos à frente é ``y[i + h - 1]``.
+
+    Args:
+        X (np.ndarray): Janelas consecutivas ``(n, tamanho_janela)``.
+        y (np.ndarray): Valor seguinte a cada janela ``(n,)``.
+        passos (int): Horizontes.
+
+    Returns:
+        tuple: ``X`` com as ``n - passos + 1`` janelas que têm todos os alvos
+            e ``Y`` com shape ``(n - passos + 1, passos)``.
+    """
+    Y = sliding_window_view(np.asarray(y).ravel(), passos)
+    return X[: Y.shape[0]], Y
+
+
+# -----------------------------------------------------------------------------
+# Treino dos modelos de quantil
+# -----------------------------------------------------------------------------
+
+
+def treina_quantis(
+    X: np.ndarray,
+    Y: np.ndarray,
+    quantis: tuple = QUANTIS,
+    params: Optional[dict] = None,
+    num_boost_round: int = NUM_BOOST_ROUND,
+) -> dict:
+    """Treina um booster de quantil para cada quantil e horizonte.
+
+    Todos compartilham as mesmas janelas (e o mesmo scaler): o ``Dataset`` do
+    LightGBM, com os bins das features, é construído uma única vez e só o
+    rótulo é trocado entre os horizontes.
+
+    Args:
+        X (np.ndarray): Janelas escalonadas ``(n, tamanho_janela)``.
+        Y (np.ndarray): Alvos escalonados ``(n, passos)``.
+        quantis (tuple): Quantis a treinar.
+        params (Optional[dict]): Parâmetros do ``lgb.train``.
+        num_boost_round (int): Árvores por modelo.
+
+    Returns:
+        dict: ``quantis``, ``passos`` e ``modelos`` (lista por quantil com um
+            booster por horizonte), no formato lido por
+            ``ModeloQuantis.de_boosters``.
+    """
+    params = {**PARAMS_PADRAO, **(params or {}), "objective": "quantile"}
+    Y = np.asarray(Y, dtype=np.float64)
+    dataset = lgb.Dataset(
+        np.ascontiguousarray(X, dtype=np.float64),
+        label=Y[:, 0],
+        params={"verbosity": -1},
+        free_raw_data=False,
+    ).construct()
+
+    quantis = tuple(sorted(quantis))
+    modelos = [[] for _ in quantis]
+    for h in range(Y.shape[1]):
+        dataset.set_label(Y[:, h])
+        for i, quantil in enumerate(quantis):
+            booster = lgb.train(
+                {**params, "alpha": quantil}, dataset, num_boost_round=num_boost_round
+            )
+            modelos[i].append(booster)
+
+    return {"quantis": quantis, "passos": Y.shape[1], "modelos": modelos}
+
+
+# -----------------------------------------------------------------------------
+# Cobertura dos intervalos
+# -----------------------------------------------------------------------------
+
+
+def cobertura(previsto: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    """Fração dos valores reais abaixo de cada quantil, por horizonte.
+
+    Args:
+        previsto (np.ndarray): Saída de ``ModeloQuantis.preve``.
+        Y (np.ndarray): Valores reais ``(n_janelas, passos)``.
+
+    Returns:
+        np.ndarray: Matriz ``(n_quantis, passos)``; bem calibrado, cada linha
+            fica próxima do seu quantil.
+    """
+    return (np.asarray(Y)[:, None, :] <= previsto).mean(axis=0)
@@ -0,0 +1,291 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import time
+from pathlib import Path
+from typing import Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.previsao import previsao_recursiva_lote
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Observações por janela dos modelos de 5 minutos
+TAMANHO_JANELA = 6
+
+# Intervalo entre observações
+INTERVALO = pd.Timedelta(minutes=5)
+
+# Fuso dos períodos usados no treino do Prophet (`scripts/03_train_model_prophet.py`)
+FUSO_PROPHET = "America/Sao_Paulo"
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Adaptadores de modelos
+# -----------------------------------------------------------------------------
+
+
+class ModeloJanela:
+    """Modelo que prevê o próximo ponto a partir da janela escalonada.
+
+    Serve para o LightGBM (booster) e para o SVR: ambos recebem a matriz de
+    janelas e avançam juntos, passo a passo, com ``previsao_recursiva_lote``.
+    """
+
+    escalonado = True
+
+    def __init__(self, modelo) -> None:
+        self.modelo = modelo
+
+    def preve(self, janelas: np.ndarray, tempos: np.ndarray, passos: int) -> np.ndarray:
+        return previsao_recursiva_lote(janelas, passos, self.modelo)
+
+
+class ModeloProphet:
+    """Prophet agregado (ex.: por hora) consultado nos instantes previstos.
+
+    Não usa a janela: cada instante é levado ao início do seu período
+    (``freq``) e cada período distinto é previsto uma única vez.
+    """
+
+    escalonado = False
+
+    def __init__(self, modelo, freq: str = "h", fuso: str = FUSO_PROPHET) -> None:
+        self.modelo = modelo
+        self.freq = freq
+        self.fuso = fuso
+
+    def preve(self, janelas: np.ndarray, tempos: np.ndarray, passos: int) -> np.ndarray:
+        instantes = pd.DatetimeIndex(tempos.ravel())
+        if instantes.tz is not None:
+            instantes = instantes.tz_convert(self.fuso).tz_localize(None)
+        periodos = instantes.floor(self.freq)
+
+        unicos = periodos.unique()
+        forecast = self.modelo.predict(pd.DataFrame({"ds": unicos}))
+        yhat = pd.Series(forecast["yhat"].values, index=unicos)
+        return yhat.reindex(periodos).to_numpy().reshape(tempos.shape)
+
+
+# -----------------------------------------------------------------------------
+# Serviço de previsão com vários modelos
+# -----------------------------------------------------------------------------
+
+
+class ServicoModelos:
+    """Executa vários modelos sobre as mesmas janelas e combina as previsões.
+
+    O escalonamento e a montagem das janelas são feitos uma única vez; cada
+    modelo registrado recebe a mesma matriz ``(n_janelas, tamanho_janela)``
+    e os instantes previstos. O resultado traz as previsões de cada modelo
+    (na escala original), o ensemble ponderado e a latência de cada modelo.
+
+    Attributes:
+        scaler: Scaler usado no treino dos modelos de janela.
+        tamanho_janela (int): Observações por janela.
+        modelos (dict): Adaptadores registrados, por nome.
+        pesos (dict): Peso de cada modelo no ensemble.
+    """
+
+    def __init__(self, scaler, tamanho_janela: int = TAMANHO_JANELA) -> None:
+        self.scaler = scaler
+        self.tamanho_janela = tamanho_janela
+        self.modelos = {}
+        self.pesos = {}
+
+    def registra(self, nome: str, modelo, peso: float = 1.0) -> "ServicoModelos":
+        """Registra um adaptador (``ModeloJanela``, ``ModeloProphet``...)."""
+        self.modelos[nome] = modelo
+        self.pesos[nome] = peso
+        return self
+
+    # -------------------------------------------------------------------------
+    # Janelas
+    # -------------------------------------------------------------------------
+
+    def janelas(self, valores: np.ndarray, n_janelas: int = 1) -> np.ndarray:
+        """As últimas ``n_janelas`` janelas da série, já escalonadas.
+
+        A última janela termina na observação mais recente.
+        """
+        valores = np.asarray(valores, dtype=np.float64).ravel()
+        necessario = n_janelas + self.tamanho_janela - 1
+        escalados = self.scaler.transform(valores[-necessario:].reshape(-1, 1))
+        return sliding_window_view(escalados.ravel(), self.tamanho_janela)
+
+    @staticmethod
+    def tempos_previstos(ultimos: pd.DatetimeIndex, passos: int) -> np.ndarray:
+        """Instantes ``(n_janelas, passos)`` seguintes ao fim de cada janela."""
+        ultimos = pd.DatetimeIndex(ultimos)
+        deslocamentos = INTERVALO * np.arange(1, passos + 1)
+        return np.array([ultimo + deslocamentos for ultimo in ultimos])
+
+    # -------------------------------------------------------------------------
+    # Previsão
+    # -------------------------------------------------------------------------
+
+    def preve_janelas(
+        self,
+        janelas: np.ndarray,
+        tempos: np.ndarray,
+        passos: int,
+        nomes: Optional[list] = None,
+    ) -> dict:
+        """Executa os modelos sobre janelas já escalonadas.
+
+        Args:
+            janelas (np.ndarray): Matriz ``(n_janelas, tamanho_janela)``.
+            tempos (np.ndarray): Instantes previstos ``(n_janelas, passos)``
+                (só os modelos que não usam a janela precisam deles).
+            passos (int): Pontos previstos por janela.
+            nomes (Optional[list]): Subconjunto de modelos; padrão, todos.
+
+        Returns:
+            dict: ``modelos`` (previsões ``(n_janelas, passos)`` na escala
+                original, por nome), ``ensemble`` e ``latencia`` (segundos
+                por modelo).
+        """
+        nomes = list(self.modelos) if nomes is None else nomes
+        janelas = np.asarray(janelas, dtype=np.float64)
+
+        previsoes, latencia = {}, {}
+        for nome in nomes:
+            modelo = self.modelos[nome]
+            inicio = time.perf_counter()
+            y_pred = modelo.preve(janelas, tempos, passos)
+            if modelo.escalonado:
+                y_pred = self.scaler.inverse_transform(
+                    y_pred.reshape(-1, 1)
+                ).reshape(y_pred.shape)
+            latencia[nome] = time.perf_counter() - inicio
+            previsoes[nome] = y_pred
+
+        pesos = np.array([self.pesos[nome] for nome in nomes])
+        ensemble = np.tensordot(
+            pesos / pesos.sum(), np.stack([previsoes[nome] for nome in nomes]), axes=1
+        )
+        return {"modelos": previsoes, "ensemble": ensemble, "latencia": latencia}
+
+    def preve(
+        self,
+        historico: pd.DataFrame,
+        passos: int,
+        coluna_tempo: str = "interval_start_utc",
+        coluna_alvo: str = "wind",
+        nomes: Optional[list] = None,
+    ) -> dict:
+        """Previsão dos próximos ``passos`` pontos a partir do histórico.
+
+        Returns:
+            dict: Como em ``preve_janelas``, para uma única janela, mais os
+                ``tempos`` previstos.
+        """
+        janelas = self.janelas(historico[coluna_alvo].values)
+        ultimo = pd.DatetimeIndex(historico[coluna_tempo].iloc[[-1]])
+        tempos = self.tempos_previstos(ultimo, passos)
+        resultado = self.preve_janelas(janelas, tempos, passos, nomes)
+        resultado["tempos"] = tempos[0]
+        return resultado
+
+    def compara(
+        self,
+        historico: pd.DataFrame,
+        passos: int,
+        n_janelas: int,
+        *,
+        coluna_tempo: str = "interval_start_utc",
+        coluna_alvo: str = "wind",
+        nomes: Optional[list] = None,
+    ) -> pd.DataFrame:
+        """Backtest das últimas ``n_janelas`` janelas com valores já observados.
+
+        Returns:
+            pd.DataFrame: RMSE e latência (total e por janela) de cada modelo
+                e do ensemble, ordenado pelo RMSE.
+        """
+        valores = historico[coluna_alvo].values.astype(np.float64)
+        tempos_obs = pd.DatetimeIndex(historico[coluna_tempo])
+
+        # Janelas que terminam `passos` pontos antes do fim, para haver alvo
+        fim = len(valores) - passos
+        janelas = self.janelas(valores[:fim], n_janelas)
+        n_janelas = janelas.shape[0]
+        tempos = self.tempos_previstos(tempos_obs[fim - n_janelas : fim], passos)
+        reais = sliding_window_view(valores[fim - n_janelas + 1 :], passos)
+
+        resultado = self.preve_janelas(janelas, tempos, passos, nomes)
+        previsoes = {**resultado["modelos"], "ensemble": resultado["ensemble"]}
+        latencia = {
+            **resultado["latencia"],
+            "ensemble": sum(resultado["latencia"].values()),
+        }
+        return (
+            pd.DataFrame(
+                {
+                    "modelo": list(previsoes),
+                    "rmse": [
+                        float(np.sqrt(np.mean((y - reais) ** 2)))
+                        for y in previsoes.values()
+                    ],
+                    "latencia_s": [latencia[nome] for nome in previsoes],
+                    "latencia_por_janela_ms": [
+                        1_000 * latencia[nome] / n_janelas for nome in previsoes
+                    ],
+                }
+            )
+            .sort_values("rmse")
+            .reset_index(drop=True)
+        )
+
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Serviço com os modelos salvos em `ml_models`
+# -----------------------------------------------------------------------------
+
+
+def carrega_servico(
+    dir_models: Path,
+    nomes: tuple = ("lgbm", "svr", "prophet"),
+    energia: str = "wind",
+) -> ServicoModelos:
+    """Monta o serviço com os modelos disponíveis em ``dir_models``.
+
+    - ``lgbm``: ``lgbm.joblib``, avaliado em lote pelo ``Booster`` nativo;
+    - ``svr``: ``svr.joblib``;
+    - ``prophet``: ``{energia}/prophet_hora.joblib`` (exige o ``prophet``).
+
+    Modelos cujo arquivo não existe são ignorados.
+    """
+    dir_models = Path(dir_models)
+    servico = ServicoModelos(joblib.load(dir_models / "min_max_scaler.joblib"))
+
+    arquivos = {
+        "lgbm": dir_models / "lgbm.joblib",
+        "svr": dir_models / "svr.joblib",
+        "prophet": dir_models / energia / "prophet_hora.joblib",
+    }
+    for nome in nomes:
+        if not arquivos[nome].exists():
+            continue
+        modelo = joblib.load(arquivos[nome])
+        if nome == "lgbm":
+            servico.registra(nome, ModeloJanela(modelo.booster_))
+        elif nome == "svr":
+            servico.registra(nome, ModeloJanela(modelo))
+        else:
+            servico.registra(nome, ModeloProphet(modelo, freq="h"))
+    return servico
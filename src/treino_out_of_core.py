@@ -0,0 +1,262 @@
+# =============================================================================
+# BIBLIOTECAS E MÓDULOS
+# =============================================================================
+
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+import lightgbm as lgb
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from deltalake import DeltaTable
+
+from src.features import FONTES, calcula_features, historico_necessario
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Linhas lidas do lake por lote
+TAMANHO_LOTE = 100_000
+
+# Parâmetros padrão do treino
+PARAMS_PADRAO = {"objective": "regression", "verbosity": -1}
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Bloco de features em disco exposto ao LightGBM
+# -----------------------------------------------------------------------------
+
+
+class SequenciaMemmap(lgb.Sequence):
+    """Bloco de features em ``.npy`` lido sob demanda pelo LightGBM.
+
+    O ``lgb.Dataset`` aceita uma lista de ``Sequence``: ele amostra linhas
+    para definir os bins e depois percorre cada bloco em lotes de
+    ``batch_size`` linhas, sem nunca materializar a matriz inteira.
+    """
+
+    def __init__(self, caminho: Path, batch_size: int = 4_096) -> None:
+        self.dados = np.load(caminho, mmap_mode="r")
+        self.batch_size = batch_size
+
+    def __getitem__(self, idx):
+        # Blocos ficam em float32 no disco; o LightGBM lê as linhas em float64
+        return np.asarray(self.dados[idx], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.dados.shape[0]
+
+
+# =============================================================================
+# FUNÇÕES
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Leitura do lake em lotes ordenados no tempo
+# -----------------------------------------------------------------------------
+
+
+def abre_dataset(fonte: str, storage_options: Optional[dict] = None) -> ds.Dataset:
+    """Abre uma tabela Delta ou um diretório Parquet particionado (hive)."""
+    caminho = Path(fonte)
+    if "://" in fonte or (caminho / "_delta_log").exists():
+        return DeltaTable(fonte, storage_options=storage_options).to_pyarrow_dataset()
+    return ds.dataset(fonte, format="parquet", partitioning="hive")
+
+
+def _inicio_fragmento(fragmento, coluna_tempo: str):
+    """Menor instante de um arquivo, lido das estatísticas do Parquet.
+
+    Arquivos sem estatísticas têm a coluna lida; nos dois casos o retorno é
+    um ``datetime`` (ou número) do Python, comparável entre arquivos.
+    """
+    fragmento.ensure_complete_metadata()
+    minimos = [
+        rg.statistics[coluna_tempo]["min"]
+        for rg in fragmento.row_groups
+        if rg.statistics and coluna_tempo in rg.statistics
+    ]
+    if not minimos:
+        return pc.min(fragmento.to_table(columns=[coluna_tempo]).column(0)).as_py()
+    return min(minimos)
+
+
+def itera_lotes_ordenados(
+    dataset: ds.Dataset,
+    colunas: list,
+    coluna_tempo: str,
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> Iterator[pa.Table]:
+    """Percorre o dataset em lotes, arquivo por arquivo, em ordem temporal.
+
+    Os arquivos são ordenados pelo menor instante (estatísticas do Parquet,
+    sem ler os dados); supõe-se que cada arquivo esteja ordenado e que os
+    arquivos não se sobreponham no tempo, como ocorre nas cargas do lake.
+
+    Args:
+        dataset (ds.Dataset): Dataset aberto com ``abre_dataset``.
+        colunas (list): Colunas a serem lidas.
+        coluna_tempo (str): Coluna com o início do intervalo.
+        tamanho_lote (int): Número máximo de linhas por lote.
+
+    Yields:
+        pa.Table: Lotes com as colunas pedidas.
+    """
+    fragmentos = sorted(
+        dataset.get_fragments(), key=lambda f: _inicio_fragmento(f, coluna_tempo)
+    )
+    for fragmento in fragmentos:
+        for lote in fragmento.to_batches(
+            columns=colunas, batch_size=tamanho_lote, schema=dataset.schema
+        ):
+            if lote.num_rows:
+                yield pa.Table.from_batches([lote])
+
+
+def itera_features(
+    lotes: Iterator[pa.Table], coluna_tempo: str, **kwargs_features
+) -> Iterator[tuple]:
+    """Gera as features lote a lote, carregando o histórico entre lotes.
+
+    As últimas ``historico_necessario`` linhas de cada lote são mantidas e
+    prefixadas ao lote seguinte, de modo que as janelas que cruzam a fronteira
+    entre lotes produzem exatamente as mesmas features do cálculo em memória.
+
+    Yields:
+        tuple: ``X`` e ``y`` de cada lote.
+    """
+    historico = historico_necessario(**kwargs_features)
+    cauda = None
+    for lote in lotes:
+        tabela = lote if cauda is None else pa.concat_tables([cauda, lote])
+        cauda = tabela.slice(max(tabela.num_rows - historico, 0))
+        if tabela.num_rows <= historico:
+            continue
+        X, y, _ = calcula_features(tabela, coluna_tempo=coluna_tempo, **kwargs_features)
+        yield X, y
+
+
+# -----------------------------------------------------------------------------
+# Treino
+# -----------------------------------------------------------------------------
+
+
+def constroi_dataset_em_blocos(
+    blocos: Iterator[tuple],
+    dir_trabalho: Path,
+    params_dataset: Optional[dict] = None,
+) -> lgb.Dataset:
+    """Constrói o ``lgb.Dataset`` binário a partir de blocos gravados em disco.
+
+    Cada bloco de features vai para um ``.npy`` e é exposto ao LightGBM como
+    ``SequenciaMemmap``; em memória ficam apenas o bloco corrente, o alvo e o
+    dataset binarizado (1 byte por feature e linha com ``max_bin <= 255``).
+
+    Args:
+        blocos (Iterator[tuple]): Pares ``(X, y)`` em ordem temporal.
+        dir_trabalho (Path): Diretório para os arquivos temporários.
+        params_dataset (Optional[dict]): Parâmetros do ``lgb.Dataset``.
+
+    Returns:
+        lgb.Dataset: O dataset já construído.
+    """
+    dir_trabalho = Path(dir_trabalho)
+    sequencias, alvos = [], []
+    for i, (X, y) in enumerate(blocos):
+        caminho = dir_trabalho / f"bloco-{i:05d}.npy"
+        np.save(caminho, X)
+        sequencias.append(SequenciaMemmap(caminho))
+        alvos.append(np.asarray(y, dtype=np.float32))
+
+    if not sequencias:
+        raise ValueError("Nenhuma linha de treino foi gerada a partir da fonte.")
+
+    return lgb.Dataset(
+        sequencias,
+        label=np.concatenate(alvos),
+        params={"verbosity": -1, **(params_dataset or {})},
+        free_raw_data=True,
+    ).construct()
+
+
+def treina_out_of_core(
+    fonte: str,
+    *,
+    coluna_tempo: str = "interval_start_utc",
+    modo: str = "dataset",
+    params: Optional[dict] = None,
+    num_boost_round: int = 500,
+    rodadas_por_lote: int = 50,
+    tamanho_lote: int = TAMANHO_LOTE,
+    storage_options: Optional[dict] = None,
+    path_dataset_binario: Optional[Path] = None,
+    **kwargs_features,
+) -> lgb.Booster:
+    """Treina o LightGBM sobre todo o histórico com memória limitada.
+
+    Modos:
+        - ``"dataset"``: o dataset binário do LightGBM é construído em blocos
+          (e opcionalmente salvo em ``path_dataset_binario`` para reuso); o
+          treino é idêntico ao treino em memória.
+        - ``"continuado"``: cada lote treina ``rodadas_por_lote`` árvores a
+          partir do booster anterior; a memória fica limitada a um lote.
+
+    Args:
+        fonte (str): Tabela Delta ou diretório Parquet particionado.
+        coluna_tempo (str): Coluna com o início do intervalo.
+        modo (str): ``"dataset"`` ou ``"continuado"``.
+        params (Optional[dict]): Parâmetros do LightGBM.
+        num_boost_round (int): Rodadas de boosting (modo ``"dataset"``).
+        rodadas_por_lote (int): Rodadas por lote (modo ``"continuado"``).
+        tamanho_lote (int): Linhas lidas do lake por lote.
+        storage_options (Optional[dict]): Opções de acesso ao storage.
+        path_dataset_binario (Optional[Path]): Onde salvar o dataset binário.
+        **kwargs_features: Parâmetros repassados para ``calcula_features``.
+
+    Returns:
+        lgb.Booster: O modelo treinado.
+    """
+    params = {**PARAMS_PADRAO, **(params or {})}
+    dataset = abre_dataset(fonte, storage_options)
+
+    coluna_alvo = kwargs_features.get("coluna_alvo", "wind")
+    outras_fontes = kwargs_features.get("outras_fontes")
+    if outras_fontes is None:
+        outras_fontes = [
+            f for f in FONTES if f != coluna_alvo and f in dataset.schema.names
+        ]
+    kwargs_features["outras_fontes"] = outras_fontes
+
+    colunas = [coluna_tempo, coluna_alvo, *outras_fontes]
+    lotes = itera_lotes_ordenados(dataset, colunas, coluna_tempo, tamanho_lote)
+    blocos = itera_features(lotes, coluna_tempo, **kwargs_features)
+
+    if modo == "dataset":
+        with tempfile.TemporaryDirectory() as dir_trabalho:
+            d_treino = constroi_dataset_em_blocos(blocos, Path(dir_trabalho), params)
+            if path_dataset_binario is not None:
+                d_treino.save_binary(str(path_dataset_binario))
+            return lgb.train(params, d_treino, num_boost_round=num_boost_round)
+
+    if modo == "continuado":
+        booster = None
+        for X, y in blocos:
+            booster = lgb.train(
+                params,
+                lgb.Dataset(X, label=y, free_raw_data=True),
+                num_boost_round=rodadas_por_lote,
+                init_model=booster,
+                keep_training_booster=True,
+            )
+        if booster is None:
+            raise ValueError("Nenhuma linha de treino foi gerada a partir da fonte.")
+        return booster
+
+    raise ValueError(f"Modo desconhecido: '{modo}'")
@@ -3,36 +3,124 @@
 # =============================================================================
 
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, Union
-from config.config import settings
+from typing import Optional
 
-from dotenv import find_dotenv, load_dotenv
-
-load_dotenv(dotenv_path=find_dotenv())
+# O `config.config` (dynaconf) e o `dotenv` só são importados no primeiro uso
 
 # =============================================================================
 # CONSTANTES
 # =============================================================================
 
-NOME_PROJETO = (
-    "alecrim-fiap-tech-challenge-tres"
-    if settings["NOME_PROJETO"] is None
-    else settings["NOME_PROJETO"]
-)
+# Variável de ambiente que fixa o diretório do projeto (ex.: Docker, Lambda)
+VARIAVEL_PROJETO = "PATH_PROJETO"
+
+# Arquivo que marca a raiz do projeto
+MARCADOR_PROJETO = "pyproject.toml"
+
+# Nome padrão do diretório do projeto
+NOME_PROJETO_PADRAO = "alecrim-fiap-tech-challenge-tres"
+
+# Raiz implícita pela localização do pacote: `<projeto>/src/utils.py`
+DIR_PACOTE = Path(__file__).resolve().parent.parent
 
 # =============================================================================
 # FUNÇÕES
 # =============================================================================
 
+# -----------------------------------------------------------------------------
+# Configuração carregada sob demanda
+# -----------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=None)
+def get_nome_projeto() -> str:
+    """Nome do diretório do projeto (``.env``, ``settings.toml`` ou padrão)."""
+    nome = os.getenv("NOME_PROJETO")
+    if nome:
+        return nome
+
+    from config.config import settings
+
+    return settings.get("NOME_PROJETO") or NOME_PROJETO_PADRAO
+
+
+@lru_cache(maxsize=None)
+def carrega_variaveis_ambiente(path_projeto: Path) -> bool:
+    """Carrega o ``.env`` da raiz do projeto uma única vez.
+
+    Returns:
+        bool: Se o arquivo existia e foi carregado.
+    """
+    from dotenv import load_dotenv
+
+    return load_dotenv(dotenv_path=path_projeto / ".env")
+
+
 # -----------------------------------------------------------------------------
 # Retorna o diretório do projeto
 # -----------------------------------------------------------------------------
 
 
+def _eh_raiz(path: Path, nome_projeto: Optional[str]) -> bool:
+    if nome_projeto is not None:
+        return path.name == nome_projeto
+    return (path / MARCADOR_PROJETO).is_file() or path.name == get_nome_projeto()
+
+
+@lru_cache(maxsize=None)
+def _procura_raiz(inicio: Path, nome_projeto: Optional[str]) -> Optional[Path]:
+    for path in (inicio, *inicio.parents):
+        if _eh_raiz(path, nome_projeto):
+            return path
+    return None
+
+
+@lru_cache(maxsize=None)
+def _raiz_padrao() -> Path:
+    variavel = os.getenv(VARIAVEL_PROJETO)
+    if variavel:
+        return Path(variavel).expanduser().resolve()
+    return _procura_raiz(DIR_PACOTE, None) or DIR_PACOTE
+
+
 def get_path_projeto(
-    path_projeto: Path = Path.cwd(), nome_projeto: str = NOME_PROJETO
-) -> Union[Callable, Path]:
-    if path_projeto.name == nome_projeto:
-        return path_projeto
-    return get_path_projeto(path_projeto.parent, nome_projeto)
+    path_projeto: Optional[Path] = None, nome_projeto: Optional[str] = None
+) -> Path:
+    """Diretório raiz do projeto, resolvido uma única vez.
+
+    Sem argumentos, usa, nesta ordem: a variável ``PATH_PROJETO``, o primeiro
+    diretório acima do pacote com ``pyproject.toml`` (ou com o nome do
+    projeto) e, por fim, o diretório que contém o pacote ``src``. Na primeira
+    chamada também carrega o ``.env`` da raiz.
+
+    Args:
+        path_projeto (Optional[Path]): Ponto de partida da busca (sobe pelos
+            diretórios pais até a raiz do sistema de arquivos).
+        nome_projeto (Optional[str]): Procura um diretório com este nome em
+            vez do marcador.
+
+    Raises:
+        FileNotFoundError: A busca a partir de ``path_projeto`` chegou à raiz
+            do sistema de arquivos sem encontrar o projeto.
+    """
+    if path_projeto is None and nome_projeto is None:
+        raiz = _raiz_padrao()
+    else:
+        inicio = Path.cwd() if path_projeto is None else Path(path_projeto)
+        raiz = _procura_raiz(inicio.resolve(), nome_projeto)
+        if raiz is None:
+            alvo = (
+                f"um diretório chamado '{nome_projeto}'"
+                if nome_projeto is not None
+                else f"'{MARCADOR_PROJETO}'"
+            )
+            raise FileNotFoundError(
+                f"Projeto não encontrado: nenhum diretório entre '{inicio}' e a "
+                f"raiz do sistema de arquivos contém {alvo}. Defina a variável "
+                f"{VARIAVEL_PROJETO} com o diretório do projeto."
+            )
+
+    carrega_variaveis_ambiente(raiz)
+    return raiz
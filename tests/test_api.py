@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pyarrow.fs as pafs
+import pytest
+from fastapi import HTTPException, Request
+from sklearn.preprocessing import MinMaxScaler
+
+from src import api
+from src.ao_vivo import FonteDataVis, MonitorAoVivo
+from src.arvore_compilada import EnsembleCompilado
+from src.quantis import ModeloQuantis, alvos_multi_horizonte, treina_quantis
+
+N_THREADS = 8
+
+
+@pytest.fixture
+def data_vis(tmp_path, monkeypatch):
+    caminho = tmp_path / "data.parquet"
+    monkeypatch.setattr(api, "DATA_VIS_PATH", str(caminho))
+    api.sistema_data_vis.cache_clear()
+    yield caminho
+    api.sistema_data_vis.cache_clear()
+
+
+def test_cache_calcula_uma_vez_para_requisicoes_simultaneas():
+    cache = api.CacheTTL(ttl=60)
+    chamadas = []
+
+    def calcula():
+        chamadas.append(1)
+        time.sleep(0.2)
+        return '{"ok": true}'
+
+    respostas = []
+    threads = [
+        threading.Thread(target=lambda: respostas.append(cache.obtem(("k",), calcula)))
+        for _ in range(N_THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(chamadas) == 1
+    assert len(respostas) == N_THREADS
+    assert len(set(respostas)) == 1
+
+
+def test_cache_refaz_o_calculo_que_falhou():
+    cache = api.CacheTTL(ttl=60)
+
+    def falha():
+        raise RuntimeError("fonte indisponível")
+
+    with pytest.raises(RuntimeError):
+        cache.obtem(("k",), falha)
+    assert cache.obtem(("k",), lambda: "[]")[0] == "[]"
+
+
+def test_versao_e_leitura_do_data_vis_local(data_vis):
+    with pytest.raises(HTTPException) as erro:
+        api.versao_data_vis()
+    assert erro.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+    tempos = pd.date_range("2024-01-01", periods=3, freq="5min", tz="UTC")
+    pd.DataFrame({"interval_start_utc": tempos, "wind": [1.0, 2.0, 3.0]}).to_parquet(
+        data_vis
+    )
+    df, versao = api.le_data_vis()
+
+    assert versao == f"{data_vis.stat().st_mtime_ns}-{data_vis.stat().st_size}"
+    assert df["wind"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_data_vis_no_s3_usa_o_sistema_de_arquivos_do_pyarrow(monkeypatch):
+    monkeypatch.setattr(api, "DATA_VIS_PATH", "s3://bucket-gold/data_vis/data.parquet")
+    monkeypatch.setattr(api.catalogo(), "storage_options", {"AWS_REGION": "us-east-1"})
+    api.sistema_data_vis.cache_clear()
+    try:
+        sistema, caminho = api.sistema_data_vis()
+    finally:
+        api.sistema_data_vis.cache_clear()
+
+    assert isinstance(sistema, pafs.S3FileSystem)
+    assert sistema.region == "us-east-1"
+    assert caminho == "bucket-gold/data_vis/data.parquet"
+
+
+def test_ao_vivo_inclui_as_faixas_de_quantis(data_vis, monkeypatch):
+    rng = np.random.default_rng(0)
+    serie = np.cumsum(rng.normal(size=500))
+    X = np.lib.stride_tricks.sliding_window_view(serie[:-1], api.TAMANHO_JANELA)
+    scaler = MinMaxScaler().fit(serie.reshape(-1, 1))
+    escalonado = scaler.transform(X.reshape(-1, 1)).reshape(X.shape)
+    y = scaler.transform(serie[api.TAMANHO_JANELA :].reshape(-1, 1)).ravel()
+
+    model = EnsembleCompilado.de_booster(
+        lgb.train({"verbosity": -1}, lgb.Dataset(escalonado, y), num_boost_round=5)
+    )
+    quantis = ModeloQuantis.de_boosters(
+        treina_quantis(*alvos_multi_horizonte(escalonado, y), num_boost_round=5)
+    )
+    tempos = pd.date_range("2024-01-01", periods=len(serie), freq="5min", tz="UTC")
+    pd.DataFrame({"interval_start_utc": tempos, "wind": serie}).to_parquet(data_vis)
+
+    monitor = MonitorAoVivo(FonteDataVis(str(data_vis)), model, scaler)
+    monkeypatch.setattr(api, "cache", api.CacheTTL())
+    monkeypatch.setattr(api, "monitor_ao_vivo", lambda: monitor)
+    monkeypatch.setattr(api, "modelo_lgbm", lambda: (model, scaler))
+    monkeypatch.setattr(api, "modelo_quantis", lambda: quantis)
+
+    resposta = api.ao_vivo(Request({"type": "http", "headers": []}), horizonte=30)
+    previsao = pd.DataFrame(json.loads(resposta.body)["previsao"])
+
+    assert len(previsao) == quantis.passos
+    colunas = ["interval_start_utc", "wind", *api.COLUNAS_QUANTIS]
+    assert list(previsao.columns) == colunas
+    faixas = previsao[api.COLUNAS_QUANTIS].to_numpy()
+    assert (np.diff(faixas, axis=1) >= 0).all()
@@ -0,0 +1,128 @@
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from src.arvore_compilada import EnsembleCompilado, ErroParidade, verifica_paridade
+
+N_FEATURES = 6
+TOLERANCIA = 1e-12
+
+# Ausentes gerados nos testes: fração das linhas e limiar das features
+FRACAO_AUSENTES = 0.8
+LIMIAR_AUSENTES = 0.5
+FRACAO_ZEROS = 0.2
+
+# Categoria com efeito no alvo, para forçar um split categórico
+CATEGORIA = 2
+
+
+def _dados(semente: int = 0, n: int = 2_000) -> tuple:
+    rng = np.random.default_rng(semente)
+    X = rng.normal(size=(n, N_FEATURES))
+    y = X[:, 0] - 2 * X[:, 1] * (X[:, 2] > 0) + 0.1 * rng.normal(size=n)
+    return X, y
+
+
+def _treina(X: np.ndarray, y: np.ndarray, **params) -> lgb.Booster:
+    params = {"verbosity": -1, "num_leaves": 15, "min_data_in_leaf": 5, **params}
+    return lgb.train(params, lgb.Dataset(X, label=y), num_boost_round=30)
+
+
+def _confere(booster: lgb.Booster, X: np.ndarray) -> EnsembleCompilado:
+    compilado = EnsembleCompilado.de_booster(booster)
+    esperado = booster.predict(X)
+
+    np.testing.assert_allclose(compilado.predict(X), esperado, rtol=0, atol=TOLERANCIA)
+    linhas = np.array([compilado.predict_linha(x) for x in X])
+    np.testing.assert_allclose(linhas, esperado, rtol=0, atol=TOLERANCIA)
+    return compilado
+
+
+def test_paridade_sem_ausentes():
+    X, y = _dados()
+    _confere(_treina(X, y), X[:300])
+
+
+def test_paridade_com_nan_nos_dois_sentidos():
+    X, y = _dados()
+    rng = np.random.default_rng(1)
+    # NaN concentrado nos valores altos de uma feature e baixos de outra, para
+    # que os splits mandem ausentes para a esquerda em uns e direita em outros
+    sorteio = rng.random((len(X), 2)) < FRACAO_AUSENTES
+    X[(X[:, 0] > LIMIAR_AUSENTES) & sorteio[:, 0], 0] = np.nan
+    X[(X[:, 1] < -LIMIAR_AUSENTES) & sorteio[:, 1], 1] = np.nan
+
+    compilado = _confere(_treina(X, y), X[:500])
+
+    internos = compilado.filhos[:, 0] != np.arange(compilado.feature.size)
+    assert compilado.missing_nan[internos].any()
+    assert compilado.default_left[internos & compilado.missing_nan].any()
+    assert (~compilado.default_left[internos & compilado.missing_nan]).any()
+
+
+def test_paridade_com_nan_em_features_sem_ausentes_no_treino():
+    X, y = _dados()
+    booster = _treina(X, y)
+
+    X_teste = X[:200].copy()
+    X_teste[::3, 2] = np.nan
+    X_teste[1::4, 0] = np.nan
+    _confere(booster, X_teste)
+
+
+def test_paridade_com_zero_como_ausente():
+    X, y = _dados()
+    rng = np.random.default_rng(2)
+    X[rng.random(X.shape) < FRACAO_ZEROS] = 0.0
+
+    compilado = _confere(_treina(X, y, zero_as_missing=True), X[:500])
+
+    assert compilado.missing_zero.any()
+
+
+def test_transformacao_exponencial():
+    X, y = _dados()
+    compilado = _confere(_treina(X, np.exp(y / 4), objective="poisson"), X[:200])
+
+    assert compilado.transformacao == "exp"
+
+
+def test_split_categorico_nao_suportado():
+    X, y = _dados()
+    X[:, 3] = np.random.default_rng(3).integers(0, 5, len(X))
+    y += 3 * (X[:, 3] == CATEGORIA)
+    booster = lgb.train(
+        {"verbosity": -1, "min_data_per_group": 5, "cat_smooth": 1},
+        lgb.Dataset(X, label=y, categorical_feature=[3]),
+        num_boost_round=10,
+    )
+    assert any("==" in str(arvore) for arvore in booster.dump_model()["tree_info"])
+
+    with pytest.raises(ValueError, match="categóricos"):
+        EnsembleCompilado.de_booster(booster)
+
+
+def test_combina_uma_saida_por_modelo():
+    X, y = _dados()
+    boosters = [_treina(X, y), _treina(X, -y, learning_rate=0.2)]
+    combinado = EnsembleCompilado.combina([
+        EnsembleCompilado.de_booster(b) for b in boosters
+    ])
+    esperado = np.column_stack([b.predict(X[:100]) for b in boosters])
+
+    np.testing.assert_allclose(combinado.predict(X[:100]), esperado, atol=TOLERANCIA)
+    np.testing.assert_allclose(
+        combinado.predict_linha(X[0]), esperado[0], atol=TOLERANCIA
+    )
+
+
+def test_verifica_paridade_detecta_divergencia():
+    X, y = _dados()
+    booster = _treina(X, y)
+    compilado = EnsembleCompilado.de_booster(booster)
+
+    assert verifica_paridade(booster, compilado, X[:100]) < TOLERANCIA
+
+    compilado.valor += 1.0
+    with pytest.raises(ErroParidade):
+        verifica_paridade(booster, compilado, X[:100])
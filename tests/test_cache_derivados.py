@@ -0,0 +1,120 @@
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from deltalake import DeltaTable
+from deltalake.writer import write_deltalake
+
+from src.cache_derivados import CacheDerivados
+
+COLUNAS = ["interval_start_utc", "wind"]
+N_PROCESSOS = 4
+N_ENTRADAS_POR_PROCESSO = 20
+
+
+def _dados(inicio: int, n: int) -> pd.DataFrame:
+    tempos = pd.date_range("2024-01-01", periods=n, freq="5min", tz="UTC")
+    return pd.DataFrame({
+        "interval_start_utc": tempos + inicio * pd.Timedelta("5min"),
+        "wind": np.arange(inicio, inicio + n, dtype=np.float64),
+    })
+
+
+def _primeiras(df: pd.DataFrame, n: int) -> pd.DataFrame:
+    return df.head(n)
+
+
+@pytest.fixture
+def tabela(tmp_path):
+    uri = str(tmp_path / "energy_grid_api")
+    write_deltalake(uri, _dados(0, 100))
+    return uri
+
+
+@pytest.fixture
+def sem_leitura_completa(monkeypatch):
+    """Falha se a tabela for lida inteira (em vez do cache ou dos arquivos novos)."""
+
+    def to_pandas(*args, **kwargs):
+        raise AssertionError("leitura completa da tabela")
+
+    return lambda: monkeypatch.setattr(DeltaTable, "to_pandas", to_pandas)
+
+
+def test_mesma_versao_vem_do_cache(tmp_path, tabela, sem_leitura_completa):
+    cache = CacheDerivados(tmp_path / "cache")
+    primeira = cache.tabela(tabela, COLUNAS, "interval_start_utc")
+
+    sem_leitura_completa()
+    pd.testing.assert_frame_equal(
+        cache.tabela(tabela, COLUNAS, "interval_start_utc"), primeira
+    )
+    assert len(cache._le_indice()) == 1
+
+
+def test_append_le_apenas_os_arquivos_novos(tmp_path, tabela, sem_leitura_completa):
+    cache = CacheDerivados(tmp_path / "cache")
+    cache.tabela(tabela, COLUNAS, "interval_start_utc")
+
+    # Um append fora de ordem: a base é reordenada
+    write_deltalake(tabela, _dados(100, 10), mode="append")
+    write_deltalake(tabela, _dados(-10, 10), mode="append")
+    sem_leitura_completa()
+    df = cache.tabela(tabela, COLUNAS, "interval_start_utc")
+
+    assert df["wind"].tolist() == list(range(-10, 110))
+    # Só a entrada da versão atual fica no índice
+    assert [e["versao"] for e in cache._le_indice().values()] == [2]
+
+
+def test_despeja_a_entrada_menos_usada_ao_passar_do_tamanho(tmp_path, tabela):
+    cache = CacheDerivados(tmp_path / "cache")
+
+    def deriva(n):
+        return cache.deriva(tabela, _primeiras, {"n": n}, COLUNAS)
+
+    def linhas_em_cache():
+        return sorted(
+            pq.read_metadata(cache.dir_cache / e["arquivo"]).num_rows
+            for e in cache._le_indice().values()
+        )
+
+    deriva(10)
+    # Cabem a base e mais duas derivadas
+    tamanhos = sorted(e["bytes"] for e in cache._le_indice().values())
+    cache.max_bytes = tamanhos[1] + int(2.5 * tamanhos[0])
+
+    deriva(11)
+    deriva(10)  # usada de novo: a derivada com n=11 passa a ser a mais antiga
+    deriva(12)
+
+    assert linhas_em_cache() == [10, 12, 100]
+    assert len(list(cache.dir_cache.glob("*.parquet"))) == len(cache._le_indice())
+
+
+def _guarda_entradas(dir_cache: str, processo: int) -> None:
+    cache = CacheDerivados(dir_cache)
+    for i in range(N_ENTRADAS_POR_PROCESSO):
+        cache._guarda(
+            f"p{processo}-{i}",
+            pd.DataFrame({"x": [i]}),
+            {"familia": f"p{processo}-{i}", "versao": 0},
+        )
+
+
+def test_processos_concorrentes_nao_perdem_entradas(tmp_path):
+    contexto = mp.get_context("spawn")
+    processos = [
+        contexto.Process(target=_guarda_entradas, args=(str(tmp_path), i))
+        for i in range(N_PROCESSOS)
+    ]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join()
+
+    assert all(processo.exitcode == 0 for processo in processos)
+    indice = CacheDerivados(tmp_path)._le_indice()
+    assert len(indice) == N_PROCESSOS * N_ENTRADAS_POR_PROCESSO
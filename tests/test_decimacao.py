@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.ao_vivo import BufferCircular
+from src.decimacao import decima
+
+N_PONTOS = 50
+
+
+def _serie(n: int = 1_000) -> tuple:
+    tempos = pd.date_range("2024-03-09", periods=n, freq="5min", tz="UTC")
+    valores = np.sin(np.arange(n) / 20) + np.random.default_rng(0).normal(0, 0.1, n)
+    return tempos, valores
+
+
+def test_datas_com_fuso_equivalem_as_datas_sem_fuso():
+    tempos, valores = _serie()
+    esperado = decima(tempos.tz_localize(None).values, valores, N_PONTOS)
+
+    for x in (
+        pd.Series(tempos),
+        pd.Series(tempos.tz_convert("America/Los_Angeles")),
+        pd.Series(tempos).astype(object).values,
+        tempos.as_unit("us"),
+    ):
+        np.testing.assert_array_equal(decima(x, valores, N_PONTOS), esperado)
+
+
+def test_decima_o_buffer_ao_vivo():
+    tempos, valores = _serie()
+    buffer = BufferCircular(len(tempos))
+    buffer.acrescenta(pd.Series(tempos), valores)
+    df = buffer.como_dataframe()
+
+    indices = decima(df["interval_start_utc"], df["wind"], N_PONTOS)
+
+    assert len(indices) == N_PONTOS
+    assert np.all(np.diff(indices) > 0)
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+from deltalake import DeltaTable
+from deltalake.writer import write_deltalake
+
+from src import esquema
+from src.cache_derivados import CacheDerivados
+from src.esquema import (
+    ESQUEMA_ENERGY_GRID,
+    PARTICOES,
+    PREFIXO_MIGRACAO,
+    ErroMigracao,
+    migra_tabela,
+)
+from src.features import FONTES
+from src.monitoramento import arquivos_das_versoes
+
+N_LINHAS = 2_000
+N_NOVAS = 10
+
+
+def _dados_antigos(inicio: str = "2024-11-28", n: int = N_LINHAS) -> pd.DataFrame:
+    """Dados no formato anterior: fontes em int64 e partições antigas."""
+    tempos = pd.date_range(inicio, periods=n, freq="5min", tz="UTC")
+    df = pd.DataFrame({
+        "interval_start_utc": tempos,
+        "interval_end_utc": tempos + pd.Timedelta("5min"),
+    })
+    for fonte in FONTES:
+        df[fonte] = np.arange(n, dtype=np.int64)
+    df["year"] = tempos.year
+    df["year_month"] = tempos.strftime("%Y-%m")
+    return df
+
+
+@pytest.mark.parametrize("particao", ["year", "year_month"])
+def test_migra_tabela_particionada_no_formato_antigo(tmp_path, particao):
+    uri = str(tmp_path / "energy_grid_api")
+    write_deltalake(uri, _dados_antigos(), partition_by=[particao])
+    write_deltalake(
+        uri,
+        _dados_antigos("2025-01-01", N_NOVAS),
+        partition_by=[particao],
+        mode="append",
+    )
+    aberta = DeltaTable(uri)
+    cache = CacheDerivados(tmp_path / "cache")
+    colunas = ["interval_start_utc", "wind"]
+    cache.tabela(uri, colunas, "interval_start_utc", dt=aberta)
+
+    resultado = migra_tabela(uri, tamanho_lote=500)
+
+    migrada = DeltaTable(uri)
+    assert resultado["versao"] == migrada.version() == resultado["versao_origem"] + 1
+    assert resultado["linhas"] == N_LINHAS + N_NOVAS
+    assert migrada.metadata().partition_columns == PARTICOES
+    assert migrada.metadata().id == aberta.metadata().id
+    assert migrada.schema().to_pyarrow().remove_metadata() == ESQUEMA_ENERGY_GRID
+    tabela = migrada.to_pyarrow_table()
+    assert tabela.num_rows == N_LINHAS + N_NOVAS
+    assert set(tabela.column("month").to_pylist()) == {1, 11, 12}
+
+    # Handles já abertos avançam para a versão migrada
+    aberta.update_incremental()
+    assert aberta.metadata().partition_columns == PARTICOES
+    assert aberta.to_pyarrow_dataset().count_rows() == N_LINHAS + N_NOVAS
+
+    # Caches chaveados por versão: a troca é vista e a base é relida
+    base = cache.tabela(uri, colunas, "interval_start_utc", dt=aberta)
+    assert len(base) == N_LINHAS + N_NOVAS
+    assert base["wind"].dtype == np.float32
+
+    # A versão anterior segue legível por time travel
+    anterior = DeltaTable(uri, version=resultado["versao_origem"])
+    assert anterior.metadata().partition_columns == [particao]
+    assert anterior.to_pyarrow_dataset().count_rows() == N_LINHAS + N_NOVAS
+
+    # A troca não é um dado novo para quem lê o log incrementalmente
+    assert arquivos_das_versoes(uri, resultado["versao_origem"]) == (
+        [],
+        resultado["versao"],
+    )
+    log_auxiliar = tmp_path / "energy_grid_api" / f"{PREFIXO_MIGRACAO}1" / "_delta_log"
+    assert not log_auxiliar.exists()
+
+    # Appends depois da migração seguem o esquema novo
+    esquema.escreve_energy_grid(uri, _dados_antigos("2025-02-01", N_NOVAS))
+    assert DeltaTable(uri).to_pyarrow_dataset().count_rows() == N_LINHAS + 2 * N_NOVAS
+
+
+def test_commit_durante_a_migracao_aborta_sem_alterar_a_tabela(tmp_path, monkeypatch):
+    uri = str(tmp_path / "energy_grid_api")
+    write_deltalake(uri, _dados_antigos(), partition_by=["year_month"])
+    escreve = esquema.escreve_energy_grid
+
+    def escreve_com_ingestao(*args, **kwargs):
+        escreve(*args, **kwargs)
+        # A Lambda de ingestão grava enquanto a migração regrava os dados
+        write_deltalake(
+            uri,
+            _dados_antigos("2025-01-01", N_NOVAS),
+            partition_by=["year_month"],
+            mode="append",
+        )
+
+    monkeypatch.setattr(esquema, "escreve_energy_grid", escreve_com_ingestao)
+    with pytest.raises(ErroMigracao):
+        migra_tabela(uri)
+
+    dt = DeltaTable(uri)
+    assert dt.version() == 1
+    assert dt.metadata().partition_columns == ["year_month"]
+    assert dt.to_pyarrow_dataset().count_rows() == N_LINHAS + N_NOVAS
+    assert not (tmp_path / "energy_grid_api" / f"{PREFIXO_MIGRACAO}0").exists()
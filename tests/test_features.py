@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from src.features import (
+    FUSO_REDE,
+    calcula_features,
+    historico_necessario,
+    nomes_features,
+)
+
+JANELA = 4
+PARAMS = {"lags": 1, "janelas": (JANELA,), "outras_fontes": []}
+
+
+def _estatisticas_moveis(x: np.ndarray) -> tuple:
+    """Média, desvio, mínimo e máximo da janela de ``calcula_features`` por ``t``.
+
+    As posições sem histórico (descartadas por ``calcula_features``) ficam
+    com ``NaN``, para que o índice seja o próprio ``t``.
+    """
+    tempos = pd.date_range("2024-01-01", periods=x.size, freq="5min", tz="UTC")
+    df = pd.DataFrame({"interval_start_utc": tempos, "wind": x})
+    X, _, _ = calcula_features(df, **PARAMS)
+    nomes = nomes_features("wind", **PARAMS)
+    sem_historico = np.full(historico_necessario(**PARAMS), np.nan)
+    return tuple(
+        np.concatenate((sem_historico, X[:, nomes.index(f"wind_{nome}_{JANELA}")]))
+        for nome in ("media", "desvio", "min", "max")
+    )
+
+
+def test_lacuna_afeta_apenas_as_janelas_que_a_contem():
+    x = np.arange(20, dtype=np.float64)
+    x[5] = np.nan
+
+    media, desvio, minimo, maximo = _estatisticas_moveis(x)
+
+    # t = 6..9 contém x[5]: estatísticas sobre as observações válidas
+    np.testing.assert_allclose(media[6], np.mean([2, 3, 4]))
+    np.testing.assert_allclose(desvio[6], np.std([2, 3, 4]), rtol=1e-6)
+    np.testing.assert_array_equal([minimo[9], maximo[9]], [6, 8])
+    # Depois da janela com a lacuna, igual à série sem ausentes
+    completo = _estatisticas_moveis(np.arange(20, dtype=np.float64))
+    for obtido, esperado in zip((media, desvio, minimo, maximo), completo):
+        np.testing.assert_allclose(obtido[10:], esperado[10:])
+
+
+def test_janela_sem_observacoes_validas_fica_nan():
+    x = np.arange(12, dtype=np.float64)
+    x[2:6] = np.nan
+
+    estatisticas = _estatisticas_moveis(x)
+
+    assert all(np.isnan(e[6]) for e in estatisticas)
+    assert all(np.isfinite(e[7]) for e in estatisticas)
+
+
+def test_ciclo_diario_no_horario_local_da_rede():
+    nomes = nomes_features("wind", lags=2, janelas=(2,), outras_fontes=[])
+    historico = historico_necessario(lags=2, janelas=(2,))
+
+    # Meio-dia local no horário padrão e no horário de verão: ângulo pi
+    for meio_dia in ("2024-01-15 12:00", "2024-07-15 12:00"):
+        fim = pd.Timestamp(meio_dia, tz=FUSO_REDE).tz_convert("UTC")
+        tempos = pd.date_range(end=fim, periods=historico + 1, freq="5min")
+        df = pd.DataFrame({"interval_start_utc": tempos, "wind": 1.0})
+
+        X, _, _ = calcula_features(df, lags=2, janelas=(2,), outras_fontes=[])
+
+        np.testing.assert_allclose(X[-1, nomes.index("dia_sin")], 0.0, atol=1e-6)
+        np.testing.assert_allclose(X[-1, nomes.index("dia_cos")], -1.0, atol=1e-6)
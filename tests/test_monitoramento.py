@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+import pytest
+from deltalake import DeltaTable
+from deltalake.writer import write_deltalake
+
+from src.monitoramento import (
+    JANELA_EFETIVA,
+    LIMITE_PSI,
+    N_REFERENCIA,
+    MonitorModelo,
+    carrega_estado,
+    executa_monitor,
+    le_incremental,
+    psi,
+)
+
+INICIO = pd.Timestamp("2024-01-01", tz="UTC")
+HORIZONTE = 5
+
+
+def _tempos(inicio: int, n: int) -> pd.DatetimeIndex:
+    return pd.date_range(INICIO + inicio * pd.Timedelta("5min"), periods=n, freq="5min")
+
+
+def _previsoes(inicio: int, valores) -> pd.DataFrame:
+    return pd.DataFrame({
+        "interval_start_utc": _tempos(inicio, len(valores)),
+        "wind": np.asarray(valores, dtype=np.float64),
+        "horizonte": HORIZONTE,
+    })
+
+
+def _observados(inicio: int, valores) -> pd.DataFrame:
+    return pd.DataFrame({
+        "interval_start_utc": _tempos(inicio, len(valores)),
+        "wind": np.asarray(valores, dtype=np.float64),
+    })
+
+
+# -----------------------------------------------------------------------------
+# Estatísticas
+# -----------------------------------------------------------------------------
+
+
+def test_psi():
+    assert psi([50, 50], [50, 50]) == 0
+    esperado = 0.4 * np.log(0.9 / 0.5) - 0.4 * np.log(0.1 / 0.5)
+    np.testing.assert_allclose(psi([50, 50], [90, 10]), esperado)
+
+
+def test_erro_por_horizonte_simples_e_depois_exponencial():
+    monitor = MonitorModelo()
+    erros = np.random.default_rng(0).normal(size=JANELA_EFETIVA)
+    n_depois = 100
+
+    # Previsões zeradas: o erro é o próprio valor observado
+    monitor.processa([_previsoes(0, np.zeros(JANELA_EFETIVA))], [_observados(0, erros)])
+    erro = monitor.estado["erros"][str(HORIZONTE)]
+    assert erro["n"] == JANELA_EFETIVA
+    np.testing.assert_allclose(erro["erro"], erros.mean())
+    np.testing.assert_allclose(erro["erro_quad"], np.mean(erros**2))
+
+    # Erro constante depois da janela: decaimento exponencial em direção a ele
+    monitor.processa(
+        [_previsoes(JANELA_EFETIVA, np.zeros(n_depois))],
+        [_observados(JANELA_EFETIVA, np.ones(n_depois))],
+    )
+    decaimento = (1 - 1 / JANELA_EFETIVA) ** n_depois
+    np.testing.assert_allclose(erro["erro"], 1 + (erros.mean() - 1) * decaimento)
+    assert erro["n"] == JANELA_EFETIVA + n_depois
+
+
+def test_previsao_casada_com_observacao_que_chega_depois():
+    monitor = MonitorModelo()
+    previstos = [1.0, 2.0]
+
+    assert monitor.processa([_previsoes(0, previstos)], []) == 0
+    assert len(monitor.estado["pendentes"]) == len(previstos)
+    assert monitor.processa([], [_observados(0, [2.0, 2.0])]) == len(previstos)
+    assert not monitor.estado["pendentes"]
+    np.testing.assert_allclose(monitor.estado["erros"][str(HORIZONTE)]["erro"], 0.5)
+
+
+def test_drift_compara_com_a_referencia_congelada():
+    limites = [0.0, 10.0, 20.0]
+    monitor = MonitorModelo(limites_bins=limites)
+    rng = np.random.default_rng(1)
+
+    referencia = rng.uniform(0, 20, N_REFERENCIA)
+    monitor.processa([], [_observados(0, referencia)])
+    assert monitor.estado["drift"]["referencia"] is not None
+    assert monitor.psi_atual() < LIMITE_PSI
+
+    # A geração passa a ficar toda no bin mais alto
+    deslocado = rng.uniform(20, 30, JANELA_EFETIVA)
+    monitor.processa([], [_observados(N_REFERENCIA, deslocado)])
+    assert monitor.psi_atual() > LIMITE_PSI
+    np.testing.assert_allclose(
+        monitor.estado["drift"]["referencia"],
+        np.bincount(np.searchsorted(limites, referencia, side="right"), minlength=4),
+    )
+
+
+# -----------------------------------------------------------------------------
+# Leitura incremental e estado
+# -----------------------------------------------------------------------------
+
+
+@pytest.fixture
+def tabelas(tmp_path):
+    uris = {nome: str(tmp_path / nome) for nome in ("previsoes", "observados")}
+    write_deltalake(uris["previsoes"], _previsoes(0, [0.0]))
+    write_deltalake(uris["observados"], _observados(0, [0.0]))
+    uris["metricas"] = str(tmp_path / "metricas")
+    return uris
+
+
+def test_le_apenas_os_arquivos_dos_commits_novos(tabelas):
+    uri = tabelas["observados"]
+    novos, versao = le_incremental(uri, None, ["interval_start_utc", "wind"])
+    assert novos == []
+    assert versao == 0
+
+    write_deltalake(uri, _observados(1, [1.0, 2.0]), mode="append")
+    write_deltalake(uri, _observados(3, [3.0]), mode="append")
+    # `optimize` reescreve os arquivos sem mudar os dados: não conta como novo
+    DeltaTable(uri).optimize.compact()
+
+    novos, versao = le_incremental(uri, 0, ["interval_start_utc", "wind"])
+    assert versao == DeltaTable(uri).version()
+    assert [df["wind"].tolist() for df in novos] == [[1.0, 2.0], [3.0]]
+    assert le_incremental(uri, versao, ["wind"]) == ([], versao)
+
+
+def test_estado_persistido_retoma_de_onde_parou(tabelas):
+    def executa():
+        return executa_monitor(
+            tabelas["previsoes"], tabelas["observados"], tabelas["metricas"]
+        )
+
+    # Primeira execução: só registra as versões, sem reler o histórico
+    assert executa().empty
+    assert carrega_estado(tabelas["metricas"])["versoes"] == {
+        "previsoes": 0,
+        "observados": 0,
+    }
+
+    write_deltalake(tabelas["previsoes"], _previsoes(1, [1.0, 2.0, 3.0]), mode="append")
+    write_deltalake(tabelas["observados"], _observados(1, [2.0, 2.0]), mode="append")
+    assert executa()["n"].tolist() == [2]
+
+    # A terceira previsão estava pendente e casa com a observação nova
+    write_deltalake(tabelas["observados"], _observados(3, [5.0]), mode="append")
+    metricas = executa()
+    assert metricas["n"].tolist() == [3]
+    np.testing.assert_allclose(metricas["vies"], np.mean([1.0, 0.0, 2.0]))
+
+    assert carrega_estado(tabelas["metricas"])["versoes"] == {
+        "previsoes": 1,
+        "observados": 2,
+    }
+    gravadas = DeltaTable(tabelas["metricas"]).to_pandas().sort_values("n")
+    assert gravadas["n"].tolist() == [2, 3]
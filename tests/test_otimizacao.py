@@ -0,0 +1,46 @@
+import numpy as np
+import optuna
+import pytest
+
+from src.otimizacao import otimiza, salva_memmap
+
+N_TRIALS = 4
+
+
+def test_workers_gravam_as_tentativas_no_mesmo_estudo(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 3))
+    salva_memmap(X, X[:, 0] + 0.1 * rng.normal(size=600), tmp_path)
+    storage = f"sqlite:///{tmp_path / 'estudo.db'}"
+
+    estudo = otimiza(
+        tmp_path,
+        "teste",
+        storage,
+        n_trials=N_TRIALS,
+        n_workers=2,
+        n_folds=2,
+        max_linhas_treino=200,
+    )
+
+    # Sem falhas, cada um dos dois workers gravou as suas tentativas
+    tentativas = optuna.load_study(study_name="teste", storage=storage).trials
+    assert len(tentativas) == len(estudo.trials) == N_TRIALS
+    assert all(t.state.is_finished() for t in tentativas)
+    assert estudo.best_trial.user_attrs["num_boost_round"] > 0
+
+
+def test_falha_de_worker_interrompe_a_busca(tmp_path):
+    # `X` com menos linhas que `y`: os folds são válidos no processo pai, mas
+    # os workers falham ao montar os datasets
+    np.save(tmp_path / "X.npy", np.zeros((10, 3)))
+    np.save(tmp_path / "y.npy", np.zeros(500))
+
+    with pytest.raises(RuntimeError, match="2 de 2 workers falharam"):
+        otimiza(
+            tmp_path,
+            "teste",
+            f"sqlite:///{tmp_path / 'estudo.db'}",
+            n_trials=2,
+            n_workers=2,
+        )
@@ -0,0 +1,121 @@
+import os
+import sys
+from datetime import datetime
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+from deltalake import DeltaTable
+from sklearn.preprocessing import MinMaxScaler
+
+from src import catalogo as modulo_catalogo
+from src.features import FONTES
+from src.pipeline_local import (
+    AMBIENTE_LAMBDAS,
+    INTERVALO_AGENDAMENTO,
+    GridStatusReplay,
+    PipelineLocal,
+    RelogioSimulado,
+)
+
+DIR_LAMBDAS = os.path.join(os.path.dirname(__file__), "..", "lambda_functions")
+INICIO = pd.Timestamp("2024-01-02T00:10", tz="UTC")
+N_EXECUCOES = 2
+LINHAS_POR_EXECUCAO = 6
+TAMANHO_JANELA = 6
+LINHAS_SEMEADAS = 12
+LIMITE = 4
+
+
+@pytest.fixture
+def dir_projeto(tmp_path):
+    """Projeto mínimo: dois dias de CSV em `data/raw` e os modelos de 5 minutos."""
+    (tmp_path / "lambda_functions").symlink_to(os.path.abspath(DIR_LAMBDAS))
+    (tmp_path / "data/raw").mkdir(parents=True)
+    (tmp_path / "ml_models").mkdir()
+
+    rng = np.random.default_rng(0)
+    inicio = pd.date_range("2024-01-01", periods=576, freq="5min", tz="-03:00")
+    dados = pd.DataFrame({
+        "interval_start_local": inicio,
+        "interval_end_local": inicio + pd.Timedelta("5min"),
+    })
+    for fonte in FONTES:
+        dados[fonte] = rng.integers(0, 1_000, len(dados))
+    dados.to_csv(tmp_path / "data/raw/2024-01.csv", sep="\t", index=False)
+
+    vento = dados["wind"].to_numpy(dtype=np.float64).reshape(-1, 1)
+    scaler = MinMaxScaler().fit(vento)
+    escalonado = scaler.transform(vento).ravel()
+    X = np.lib.stride_tricks.sliding_window_view(escalonado[:-1], TAMANHO_JANELA)
+    model = lgb.LGBMRegressor(n_estimators=5, verbosity=-1)
+    model.fit(X, escalonado[TAMANHO_JANELA:])
+    joblib.dump(model, tmp_path / "ml_models/lgbm.joblib")
+    joblib.dump(scaler, tmp_path / "ml_models/min_max_scaler.joblib")
+    return tmp_path
+
+
+def test_relogio_simulado_salta_ate_o_instante_sem_esperar():
+    relogio = RelogioSimulado(INICIO)
+    relogio.espera_ate(INICIO + INTERVALO_AGENDAMENTO)
+    assert relogio.agora() == INICIO + INTERVALO_AGENDAMENTO
+
+    agora = relogio.classe_datetime().now()
+    assert agora.tzinfo is None
+    assert pd.Timestamp(agora) == (INICIO + INTERVALO_AGENDAMENTO).tz_localize(None)
+
+
+def test_replay_responde_o_intervalo_pedido(dir_projeto):
+    replay = GridStatusReplay(dir_projeto / "data/raw")
+    assert replay(api_key="local") is replay
+
+    dados = replay.get_dataset(
+        "caiso_fuel_mix", start="2024-01-02T00:00", end="2024-01-02T00:30", limit=LIMITE
+    )
+    assert len(dados) == LIMITE
+    assert dados["interval_start_utc"].iloc[0] == pd.Timestamp("2024-01-02", tz="UTC")
+
+
+def test_pipeline_grava_as_saidas_e_restaura_o_processo(dir_projeto, monkeypatch):
+    for nome in AMBIENTE_LAMBDAS:
+        monkeypatch.delenv(nome, raising=False)
+    anterior = modulo_catalogo.catalogo()
+    gridstatusio = sys.modules.get("gridstatusio")
+
+    with PipelineLocal(dir_projeto, INICIO, dir_lake=dir_projeto / "lake") as pipeline:
+        lake = pipeline.lake.dir_lake
+        modulos = pipeline.lambdas
+        com_s3 = [m for m in modulos.values() if hasattr(m, "save_on_s3")]
+        assert modulo_catalogo.catalogo().raizes["gold"] == str(lake)
+        assert all(modulo.save_on_s3 == pipeline.lake.save_on_s3 for modulo in com_s3)
+
+        pipeline.semeia_historico(LINHAS_SEMEADAS * pd.Timedelta("5min"))
+        tempos = pipeline.executa(N_EXECUCOES)
+
+    assert len(tempos) == N_EXECUCOES
+    assert (tempos[list(modulos)] > 0).all(axis=None)
+
+    # Ingestão: histórico semeado mais as linhas de cada execução
+    observados = DeltaTable(str(lake / "energy_grid_api")).to_pandas()
+    assert len(observados) == LINHAS_SEMEADAS + N_EXECUCOES * LINHAS_POR_EXECUCAO
+    assert observados["interval_start_utc"].is_unique
+
+    # Predição: a meia hora seguinte a cada ingestão
+    previstos = DeltaTable(str(lake / "predicted_data")).to_pandas()
+    assert len(previstos) == N_EXECUCOES * LINHAS_POR_EXECUCAO
+    assert previstos["horizonte"].max() == 5 * LINHAS_POR_EXECUCAO
+
+    # Agregação: observado e previsto no arquivo lido pela API
+    data_vis = pd.read_parquet(lake / "data_vis/data.parquet")
+    assert data_vis["previsto"].sum() == LINHAS_POR_EXECUCAO
+    assert data_vis["interval_start_utc"].is_monotonic_increasing
+
+    # As trocas foram desfeitas ao sair do bloco
+    assert modulo_catalogo.catalogo() is anterior
+    assert sys.modules.get("gridstatusio") is gridstatusio
+    assert all(nome not in os.environ for nome in AMBIENTE_LAMBDAS)
+    for modulo in com_s3:
+        assert modulo.save_on_s3.__module__ == modulo.__name__
+    assert modulos["get_data_delta"].datetime is datetime
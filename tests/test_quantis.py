@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from src.quantis import (
+    PASSOS,
+    QUANTIS,
+    ModeloQuantis,
+    alvos_multi_horizonte,
+    cobertura,
+    treina_quantis,
+)
+
+N_FEATURES = 6
+N_BOOSTERS = 18
+TOLERANCIA = 1e-10
+
+
+@pytest.fixture(scope="module")
+def treinado():
+    rng = np.random.default_rng(0)
+    serie = np.cumsum(rng.normal(size=1_000))
+    X = np.lib.stride_tricks.sliding_window_view(serie[:-1], N_FEATURES)
+    X, Y = alvos_multi_horizonte(X, serie[N_FEATURES:])
+    # Ordem embaralhada: ``treina_quantis`` ordena os quantis
+    return treina_quantis(X, Y, quantis=(0.9, 0.1, 0.5), num_boost_round=10), X, Y
+
+
+def _por_booster(salvo: dict, X: np.ndarray) -> np.ndarray:
+    """Predições dos boosters individuais, ``(n_janelas, n_quantis, passos)``."""
+    return np.array(
+        [[modelo.predict(X) for modelo in modelos] for modelos in salvo["modelos"]]
+    ).transpose(2, 0, 1)
+
+
+def test_ensemble_combinado_reproduz_os_boosters(treinado):
+    salvo, X, _ = treinado
+    modelo = ModeloQuantis.de_boosters(salvo)
+
+    assert salvo["quantis"] == QUANTIS
+    assert modelo.colunas == ["p10", "p50", "p90"]
+    assert modelo.ensemble.n_saidas == len(QUANTIS) * PASSOS == N_BOOSTERS
+
+    # Saídas na ordem quantil × horizonte: a coluna ``i * passos + h`` é o
+    # booster do quantil ``i`` no horizonte ``h``
+    saidas = modelo.ensemble.predict(X[:200])
+    for i, modelos in enumerate(salvo["modelos"]):
+        for h, booster in enumerate(modelos):
+            np.testing.assert_allclose(
+                saidas[:, i * PASSOS + h], booster.predict(X[:200]), atol=TOLERANCIA
+            )
+
+
+def test_preve_quantis_por_horizonte_sem_cruzamentos(treinado):
+    salvo, X, Y = treinado
+    modelo = ModeloQuantis.de_boosters(salvo)
+
+    previsto = modelo.preve(X[:200])
+    assert previsto.shape == (200, len(QUANTIS), PASSOS)
+    np.testing.assert_allclose(
+        previsto, np.sort(_por_booster(salvo, X[:200]), axis=1), atol=TOLERANCIA
+    )
+    assert (np.diff(previsto, axis=1) >= 0).all()
+
+    # Uma única janela segue pelo ``predict_linha``, com o mesmo resultado
+    np.testing.assert_allclose(modelo.preve(X[7]), previsto[7:8], atol=TOLERANCIA)
+    assert cobertura(previsto, Y[:200]).shape == (len(QUANTIS), PASSOS)
+
+
+def test_rejeita_ensemble_com_saidas_a_mais(treinado):
+    salvo, _, _ = treinado
+    modelo = ModeloQuantis.de_boosters(salvo)
+
+    with pytest.raises(ValueError, match="Esperadas 15 saídas"):
+        ModeloQuantis(modelo.ensemble, QUANTIS, passos=5)
@@ -0,0 +1,32 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.treino_out_of_core import abre_dataset, itera_lotes_ordenados
+
+PERIODOS = 4
+
+
+def _parte(inicio: str, periodos: int = PERIODOS) -> pa.Table:
+    tempos = pd.date_range(inicio, periods=periodos, freq="5min", tz="UTC")
+    return pa.table({"interval_start_utc": tempos, "wind": range(periodos)})
+
+
+def test_ordena_arquivos_com_e_sem_estatisticas(tmp_path):
+    # Nomes fora da ordem temporal e só parte dos arquivos com estatísticas
+    arquivos = {
+        "a.parquet": ("2024-01-01 02:00", True),
+        "b.parquet": ("2024-01-01 00:00", False),
+        "c.parquet": ("2024-01-01 01:00", True),
+        "d.parquet": ("2024-01-01 03:00", False),
+    }
+    for nome, (inicio, estatisticas) in arquivos.items():
+        pq.write_table(_parte(inicio), tmp_path / nome, write_statistics=estatisticas)
+
+    lotes = itera_lotes_ordenados(
+        abre_dataset(str(tmp_path)), ["interval_start_utc"], "interval_start_utc"
+    )
+    tempos = pa.concat_tables(lotes).column(0).to_pandas()
+
+    assert tempos.is_monotonic_increasing
+    assert len(tempos) == len(arquivos) * PERIODOS